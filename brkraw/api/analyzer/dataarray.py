@@ -6,14 +6,15 @@ data arrays into more accessible formats, complementing the broader data process
 """
 
 from __future__ import annotations
+import os
 import numpy as np
+from io import BufferedReader
 from copy import copy
 from .base import BaseAnalyzer
 from typing import TYPE_CHECKING
 if TYPE_CHECKING:
     from ..data import ScanInfo
-    from typing import Union
-    from io import BufferedReader
+    from typing import Union, Optional, Iterator
     from zipfile import ZipExtFile
 
 
@@ -33,6 +34,9 @@ class DataArrayAnalyzer(BaseAnalyzer):
         dtype (type): The data type of the data array.
         shape (list[int]): The dimensions of the data array.
         shape_desc (list[str]): Descriptions of the data array dimensions.
+        filepath (Optional[str]): The path of the data file if it can be memory-mapped.
+        frame_shape (tuple[int]): The shape of a single frame, the image dimensions of the data array.
+        num_frames (int): The number of frames, the product of the frame group dimensions.
     """
     def __init__(self, infoobj: 'ScanInfo', fileobj: Union[BufferedReader, ZipExtFile]):
         """Initialize the DataArrayAnalyzer with an information object and a file object.
@@ -51,6 +55,7 @@ class DataArrayAnalyzer(BaseAnalyzer):
         self.dtype = infoobj.dataarray['dtype']
         self.shape = infoobj.image['shape'][:]
         self.shape_desc = infoobj.image['dim_desc'][:]
+        self.frame_shape = tuple(self.shape)
         if infoobj.frame_group and infoobj.frame_group['type']:
             self._calc_array_shape(infoobj)
             
@@ -60,9 +65,76 @@ class DataArrayAnalyzer(BaseAnalyzer):
         self.shape.extend(infoobj.frame_group['shape'][:])
         self.shape_desc.extend([fgid.replace('FG_', '').lower() for fgid in infoobj.frame_group['id']])
     
-    def get_dataarray(self):
+    @property
+    def filepath(self) -> Optional[str]:
+        """The path of the data file if it is a plain file on disk, or None for compressed members.
+        """
+        if isinstance(self.buffer, BufferedReader) and os.path.isfile(self.buffer.name):
+            return self.buffer.name
+        return None
+
+    def get_dataarray(self, mmap: bool = False):
         """Read and return the structured data array from the buffer, applying data type and shape transformations.
+
+        Args:
+            mmap (bool): If True and the data is stored in a plain file, return a read-only `np.memmap` of the
+                file instead of reading it into memory. Data in compressed archives is always read.
         """
+        if mmap and (filepath := self.filepath):
+            return np.memmap(filepath, dtype=self.dtype, mode='r', shape=tuple(self.shape), order='F')
         self.buffer.seek(0)
         return np.frombuffer(self.buffer.read(), self.dtype).reshape(self.shape, order='F')
 
+
+    @property
+    def num_frames(self) -> int:
+        """The number of frames stored in the data array.
+        """
+        return int(np.prod(self.shape[len(self.frame_shape):], dtype=int))
+
+    @property
+    def frame_size(self) -> int:
+        """The size of a single frame in bytes.
+        """
+        return int(np.prod(self.frame_shape, dtype=int)) * np.dtype(self.dtype).itemsize
+
+    def iter_frames(self, frames: Optional[slice] = None) -> Iterator[np.ndarray]:
+        """Yield the frames of the data array one at a time, reading only the bytes of each frame.
+
+        Frames are numbered in the order they are stored, following the frame group dimensions in
+        Fortran order. For compressed members, frames are decompressed sequentially and skipped frames are
+        discarded, so requesting frames in increasing order avoids restarting the decompression, unless the
+        member was opened with random access (see `BaseMethods.default_seekable`).
+
+        Args:
+            frames (Optional[slice]): The frames to yield. Defaults to all frames.
+
+        Yields:
+            numpy.ndarray: Each frame, with the shape `frame_shape` in Fortran order.
+        """
+        frame_size = self.frame_size
+        for index in range(self.num_frames)[frames or slice(None)]:
+            self.buffer.seek(index * frame_size)
+            data = self.buffer.read(frame_size)
+            if len(data) != frame_size:
+                raise ValueError(f"Failed to read frame {index}: the data array is shorter than its shape {self.shape}.")
+            yield np.frombuffer(data, self.dtype).reshape(self.frame_shape, order='F')
+
+    def get_frames(self, frames: Union[int, slice]) -> np.ndarray:
+        """Read a subset of frames from the data array without reading the whole array.
+
+        Args:
+            frames (Union[int, slice]): The index of a single frame, or a slice of frames.
+
+        Returns:
+            numpy.ndarray: A single frame with the shape `frame_shape`, or the selected frames stacked along
+                a last dimension, with the shape `frame_shape + (num_selected,)` in Fortran order.
+        """
+        if isinstance(frames, (int, np.integer)):
+            index = range(self.num_frames)[frames]
+            return next(self.iter_frames(slice(index, index + 1)))
+        indices = range(self.num_frames)[frames]
+        dataarray = np.empty(self.frame_shape + (len(indices),), dtype=self.dtype, order='F')
+        for i, frame in enumerate(self.iter_frames(frames)):
+            dataarray[..., i] = frame
+        return dataarray
@@ -0,0 +1,86 @@
+"""Provides a weak-reference registry that resolves object addresses to live objects.
+
+Objects such as `Study` register themselves and hand out their address, which dependent objects like
+`Scan` keep instead of a strong reference. Addresses are tokens drawn from a counter, not `id()` values,
+so they are never reused within a process. Resolving an address is a single dictionary lookup, and an
+address resolves to None as soon as the object has been unregistered or garbage collected, so a stale
+address can never be dereferenced into a freed or unrelated object.
+
+Classes:
+    ObjectRegistry: A thread-safe mapping of object addresses to weak references.
+
+Attributes:
+    registry (ObjectRegistry): The registry shared by the objects of the `brkraw.api.data` package.
+"""
+
+from __future__ import annotations
+import itertools
+import threading
+import weakref
+from typing import TYPE_CHECKING
+if TYPE_CHECKING:
+    from typing import Any, Optional
+
+
+class ObjectRegistry:
+    """A thread-safe mapping of object addresses to weak references.
+
+    Registered objects are not kept alive by the registry; their entry is dropped when they are collected.
+
+    Methods:
+        register(obj): Registers an object and returns its address.
+        unregister(address): Removes the entry of an address.
+        retrieve(address): Returns the live object registered under an address, or None.
+    """
+    def __init__(self):
+        self._refs = weakref.WeakValueDictionary()
+        self._lock = threading.Lock()
+        self._counter = itertools.count(1)
+
+    def register(self, obj: Any) -> int:
+        """Registers an object under a new address.
+
+        Args:
+            obj (Any): The object to register. It must support weak references.
+
+        Returns:
+            int: The address of the object, to be passed to `retrieve`. It is never handed out again,
+                even after the object is collected.
+        """
+        with self._lock:
+            address = next(self._counter)
+            self._refs[address] = obj
+        return address
+
+    def unregister(self, address: int) -> None:
+        """Removes the entry of an address, if any.
+
+        Args:
+            address (int): The address returned by `register`.
+        """
+        with self._lock:
+            self._refs.pop(address, None)
+
+    def retrieve(self, address: Optional[int]) -> Optional[Any]:
+        """Returns the live object registered under an address.
+
+        Args:
+            address (Optional[int]): The address returned by `register`.
+
+        Returns:
+            The registered object, or None if it was unregistered, collected or never registered.
+        """
+        if address is None:
+            return None
+        with self._lock:
+            return self._refs.get(address)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._refs)
+
+    def __contains__(self, address: int):
+        return self.retrieve(address) is not None
+
+
+registry = ObjectRegistry()
@@ -12,10 +12,11 @@ This module is part of the `brkraw` package which aims to provide tools for MRI
 """
 
 from __future__ import annotations
-import ctypes
+from copy import deepcopy
 from brkraw.api.pvobj import PvScan, PvReco, PvFiles
 from brkraw.api.pvobj.base import BaseBufferHandler
 from brkraw.api.analyzer import ScanInfoAnalyzer, AffineAnalyzer, DataArrayAnalyzer, BaseAnalyzer
+from .registry import registry
 from typing import TYPE_CHECKING
 if TYPE_CHECKING:
     from typing import Optional, Union
@@ -49,10 +50,13 @@ class ScanInfo(BaseAnalyzer):
 class Scan(BaseBufferHandler):
     """Interface class for working with various Pv objects and handling scan information.
 
+    The Scan holds a reference to its pvobj, which keeps the pvobj alive as long as the Scan, and only the
+    registry address of its study, so that a Scan kept in a cache does not keep the study alive.
+
     Attributes:
         pvobj (Union['PvScan', 'PvReco', 'PvFiles']): The photovoltaic object associated with this scan.
         reco_id (Optional[int]): The reconstruction ID for the scan, defaults to None.
-        study_address (Optional[int]): Memory address of the study object, defaults to None.
+        study_address (Optional[int]): Registry address of the study object, defaults to None.
         debug (bool): Flag to enable debug mode, defaults to False.
     """
     def __init__(self, pvobj: Union['PvScan', 'PvReco', 'PvFiles'],
@@ -64,36 +68,31 @@ class Scan(BaseBufferHandler):
         Args:
             pvobj: The ParaVision data object to be used throughout the scan analysis.
             reco_id: Optional reconstruction identifier.
-            study_address: Optional memory address of the associated study object.
+            study_address: Optional registry address of the associated study object, as returned by
+                `registry.register`.
             debug: Flag indicating whether to run in debug mode.
         """
         self.reco_id = reco_id
         self._study_address = study_address
-        self._pvobj_address = id(pvobj)
+        self._pvobj = pvobj
         self.is_debug = debug
         self.set_scaninfo()
         
     def retrieve_pvobj(self) -> Union['PvScan', 'PvReco', 'PvFiles', None]:
-        """Retrieves the pvobj from memory using its stored address.
+        """Retrieves the pvobj bound to this scan.
 
         Returns:
             The pvobj if available; otherwise, None.
         """
-        if self._pvobj_address:
-            return ctypes.cast(self._pvobj_address,
-                               ctypes.py_object).value
-        return None
+        return self._pvobj
     
     def retrieve_study(self) -> Optional['Study']:
-        """Retrieves the study object from memory using its stored address.
+        """Retrieves the study object from the registry using its stored address.
 
         Returns:
-            The study object if available; otherwise, None.
+            The study object if it is still open; otherwise, None.
         """
-        if self._study_address:
-            return ctypes.cast(self._study_address,
-                               ctypes.py_object).value
-        return None
+        return registry.retrieve(self._study_address)
     
     def set_scaninfo(self, reco_id: Optional[int] = None) -> None:
         """Sets the scan information based on the reconstruction ID.
@@ -113,20 +112,26 @@ class Scan(BaseBufferHandler):
             reco_id: Optional reconstruction ID to specify which scan information to retrieve.
             get_analyzer: Flag indicating whether to use the ScanInfoAnalyzer for detailed analysis.
 
+        The analyzer is shared through the analyzer cache of the study when the scan belongs to an open study.
+
         Returns:
             An instance of ScanInfo or ScanInfoAnalyzer with the relevant scan details.
         """
         infoobj = ScanInfo()
         pvobj = self.retrieve_pvobj()
-        analysed = ScanInfoAnalyzer(pvobj=pvobj,  # type: ignore
-                                    reco_id=reco_id, 
-                                    debug=self.is_debug)
+        study = self.retrieve_study()
+        if study is not None and not self.is_debug and pvobj.isinstance('PvScan'):  # type: ignore
+            analysed = study.get_scaninfo_analyzer(pvobj._scan_id, reco_id)  # type: ignore
+        else:
+            analysed = ScanInfoAnalyzer(pvobj=pvobj,  # type: ignore
+                                        reco_id=reco_id, 
+                                        debug=self.is_debug)
         
         if get_analyzer:
             return analysed
         for attr_name in dir(analysed):
             if 'info_' in attr_name:
-                attr_vals = getattr(analysed, attr_name)
+                attr_vals = deepcopy(getattr(analysed, attr_name))
                 if warns := attr_vals.pop('warns', None):
                     infoobj.warns.extend(warns)
                 setattr(infoobj, attr_name.replace('info_', ''), attr_vals)
@@ -161,7 +166,6 @@ class Scan(BaseBufferHandler):
         reco_id = reco_id or self.reco_id
         pvobj = self.retrieve_pvobj()
         fileobj = pvobj.get_2dseq(reco_id=reco_id)  # type: ignore
-        self._buffers.append
         info = self.info if hasattr(self, 'info') else self.get_scaninfo(reco_id)
         return DataArrayAnalyzer(info, fileobj)  # type: ignore
     
@@ -176,12 +180,12 @@ class Scan(BaseBufferHandler):
     
     @property
     def pvobj(self) -> Union['PvScan', 'PvReco', 'PvFiles']:
-        """Retrieves the pvobj from memory.
+        """Retrieves the pvobj bound to this scan.
 
         Returns:
             The current bound pvobj.
         """
-        return self.retrieve_pvobj()  # type: ignore
+        return self._pvobj
     
     @property
     def about_scan(self) -> dict:
@@ -27,17 +27,23 @@ from __future__ import annotations
 import os
 import yaml
 import warnings
+import threading
 from copy import copy
 from pathlib import Path
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from .scan import Scan
+from .registry import registry
 from brkraw import config
 from brkraw.api.pvobj import PvStudy
 from brkraw.api.analyzer.base import BaseAnalyzer
+from brkraw.api.analyzer import ScanInfoAnalyzer
 from xnippet.parser import RecipeParser
 from typing import TYPE_CHECKING
 if TYPE_CHECKING:
-    from typing import Optional
+    from typing import Optional, Union
+    from brkraw.api.pvobj.pvstudy import StudyChanges
 
 
 @dataclass
@@ -68,16 +74,28 @@ class Study(PvStudy, BaseAnalyzer):
 
     Attributes:
         header (Optional[dict]): Parsed study header information.
+        workers (int): The number of threads used to analyze the scans when building `info`.
+        _analyzers (dict): The cached ScanInfoAnalyzer and file signature of each (scan_id, reco_id) pair.
     """
     _info: StudyHeader
+    _address: Optional[int] = None
+    _analyzer_files: tuple = ('acqp', 'method', 'fid', 'rawdata.job0', 'visu_pars')
     
-    def __init__(self, path: Path) -> None:
+    def __init__(self, path: Path, index: Union[bool, str, Path] = False, workers: int = 1) -> None:
         """Initializes the Study object with a specified path.
 
         Args:
             path (Path): The file system path to the study data.
+            index (Union[bool, str, Path]): Enables the persistent metadata index of the dataset.
+                True stores the index next to the dataset, a path selects the index file. Defaults to False.
+            workers (int): The number of threads used to analyze the scans when building `info`.
+                Scans are analyzed sequentially if 1 or less. Defaults to 1.
         """
-        super().__init__(self._resolve(path))
+        super().__init__(self._resolve(path), index=index)
+        self.workers = workers
+        self._analyzers = {}
+        self._analyzers_lock = threading.Lock()
+        self._address = registry.register(self)
         self._parse_header()
         
     def get_scan(self,
@@ -97,9 +115,94 @@ class Study(PvStudy, BaseAnalyzer):
         pvscan = super().get_scan(scan_id)
         return Scan(pvobj=pvscan,
                     reco_id=reco_id,
-                    study_address=id(self),
+                    study_address=self._address,
                     debug=debug)
     
+    def get_scaninfo_analyzer(self,
+                              scan_id: int,
+                              reco_id: Optional[int] = None) -> 'ScanInfoAnalyzer':
+        """Retrieves the ScanInfoAnalyzer of a scan, analyzing each (scan_id, reco_id) pair only once.
+
+        The analyzer is cached in the study together with the identity of the files it was built from
+        (acqp, method, fid and visu_pars), and is rebuilt when any of them changes on disk.
+
+        Args:
+            scan_id (int): The unique identifier for the scan.
+            reco_id (Optional[int]): The reconstruction identifier, defaults to None.
+
+        Returns:
+            ScanInfoAnalyzer: The analyzer of the scan and reconstruction.
+        """
+        key = (scan_id, reco_id)
+        signature = self._get_analyzer_signature(scan_id, reco_id)
+        with self._analyzers_lock:
+            cached = self._analyzers.get(key)
+        if cached is not None and signature is not None and cached[0] == signature:
+            return cached[1]
+        analyzer = ScanInfoAnalyzer(pvobj=self._scans[scan_id], reco_id=reco_id)
+        with self._analyzers_lock:
+            self._analyzers[key] = (signature, analyzer)
+        return analyzer
+
+    def _get_analyzer_signature(self, scan_id: int, reco_id: Optional[int] = None) -> Optional[tuple]:
+        """Computes the identity of the files read by the ScanInfoAnalyzer of a scan.
+
+        Args:
+            scan_id (int): The unique identifier for the scan.
+            reco_id (Optional[int]): The reconstruction identifier. If None, the files of all reconstructions
+                are included, as the analyzer may fall back to any of them.
+
+        Returns:
+            tuple or None: The identities of the files, or None if any of them can no longer be accessed.
+        """
+        try:
+            pvscan = self._scans[scan_id]
+            pvobjs = [pvscan] + [pvscan.get_reco(rid) for rid in ([reco_id] if reco_id else pvscan.avail)]
+            return tuple(pvobj._get_file_identity(f) for pvobj in pvobjs
+                         for f in self._analyzer_files if f in pvobj.contents['files'])
+        except (KeyError, OSError):
+            return None
+
+    def clear_param_cache(self, key: Optional[str] = None) -> None:
+        """Invalidates the parsed parameters and the scan analyzers cached in the study.
+
+        Args:
+            key (Optional[str]): The name of the file to invalidate. If None, the entire cache is cleared.
+                The scan analyzers are always cleared.
+        """
+        super().clear_param_cache(key)
+        with self._analyzers_lock:
+            self._analyzers.clear()
+
+    def refresh(self) -> 'StudyChanges':
+        """Updates the study with the scans and reconstructions written since it was loaded.
+
+        Scan analyzers are kept and revalidated on access; the compiled `info` is rebuilt on next access
+        if anything changed.
+
+        Returns:
+            StudyChanges: The scans, reconstructions and directories that changed.
+        """
+        changes = super().refresh()
+        if changes:
+            for attr in ('_info', '_streamed_info'):
+                self.__dict__.pop(attr, None)
+            with self._analyzers_lock:
+                for key in [key for key in self._analyzers if key[0] in changes.removed_scans]:
+                    del self._analyzers[key]
+            self._parse_header()
+        return changes
+
+    def close(self) -> None:
+        """Closes the study and removes it from the registry.
+
+        Scans retrieved from the study keep their own pvobj, but no longer resolve the study afterwards.
+        """
+        registry.unregister(self._address)
+        with self._analyzers_lock:
+            self._analyzers.clear()
+        super().close()
+
     def _parse_header(self) -> None:
         """Parses the header information from the study metadata.
 
@@ -146,15 +249,21 @@ class Study(PvStudy, BaseAnalyzer):
         stream['scans'] = scans
         return stream
     
-    def _process_header(self):
+    def _process_header(self, workers: Optional[int] = None):
         """Compiles comprehensive information about the study, including header details and scans.
 
         Uses external YAML configuration to drive the synthesis of structured information about the study,
-        integrating data from various scans and their respective reconstructions.
+        integrating data from various scans and their respective reconstructions. Scans are I/O bound to
+        analyze, so they can be analyzed by a pool of threads; the headers are assembled in scan order
+        either way, and the result is identical to the sequential one.
+
+        Args:
+            workers (Optional[int]): The number of threads used to analyze the scans. Defaults to `self.workers`.
 
         Returns:
             dict: A dictionary containing structured information about the study, its scans, and reconstructions.
         """
+        workers = self.workers if workers is None else workers
         spec_path = os.path.join(os.path.dirname(__file__), 'study.yaml')  # TODO:asdasd 
         with open(spec_path, 'r') as f:
             spec = yaml.safe_load(f)
@@ -162,21 +271,37 @@ class Study(PvStudy, BaseAnalyzer):
                                  scans=[])
         with warnings.catch_warnings():
             warnings.simplefilter("ignore")
-            for scan_id in self.avail:
-                scanobj = self.get_scan(scan_id)
-                scan_spec = copy(spec)['scan']
-                scaninfo_targets = [scanobj.info, 
-                                    scanobj.get_scaninfo(get_analyzer=True)]
-                scan_header = ScanHeader(scan_id=scan_id, 
-                                         header=RecipeParser(scaninfo_targets, scan_spec).get(), 
-                                         recos=[])
-                for reco_id in scanobj.avail:
-                    recoinfo_targets = [scanobj.get_scaninfo(reco_id=reco_id),
-                                        scanobj.get_scaninfo(reco_id=reco_id, get_analyzer=True)]
-                    reco_spec = copy(spec)['reco']
-                    reco_header = RecipeParser(recoinfo_targets, reco_spec).get()
-                    reco_header = RecoHeader(reco_id=reco_id, 
-                                             header=reco_header) if reco_header else None
-                    if reco_header:
-                        scan_header.recos.append(reco_header)
-                self._info.scans.append(scan_header)
+            process = partial(self._process_scan_header, spec=spec)
+            if workers > 1 and len(self.avail) > 1:
+                with ThreadPoolExecutor(max_workers=min(workers, len(self.avail))) as executor:
+                    self._info.scans.extend(executor.map(process, self.avail))
+            else:
+                self._info.scans.extend(map(process, self.avail))
+
+    def _process_scan_header(self, scan_id: int, spec: dict) -> 'ScanHeader':
+        """Compiles the header of a scan and its reconstructions.
+
+        Args:
+            scan_id (int): The unique identifier for the scan.
+            spec (dict): The loaded study specification, with 'scan' and 'reco' recipes.
+
+        Returns:
+            ScanHeader: The header of the scan, with the headers of its reconstructions in reco order.
+        """
+        scanobj = self.get_scan(scan_id)
+        scan_spec = copy(spec)['scan']
+        scaninfo_targets = [scanobj.info, 
+                            scanobj.get_scaninfo(get_analyzer=True)]
+        scan_header = ScanHeader(scan_id=scan_id, 
+                                 header=RecipeParser(scaninfo_targets, scan_spec).get(), 
+                                 recos=[])
+        for reco_id in scanobj.avail:
+            recoinfo_targets = [scanobj.get_scaninfo(reco_id=reco_id),
+                                scanobj.get_scaninfo(reco_id=reco_id, get_analyzer=True)]
+            reco_spec = copy(spec)['reco']
+            reco_header = RecipeParser(recoinfo_targets, reco_spec).get()
+            reco_header = RecoHeader(reco_id=reco_id, 
+                                     header=reco_header) if reco_header else None
+            if reco_header:
+                scan_header.recos.append(reco_header)
+        return scan_header
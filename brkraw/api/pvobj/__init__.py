@@ -6,18 +6,23 @@ data at various levels—from individual scans to comprehensive experimental ses
 
 Classes Exposed:
     PvStudy: Manages data for an entire session, encapsulating all scans and reconstructions.
+    StudyChanges: The scans, reconstructions and directories changed on disk since the last refresh of a study.
     PvScan: Handles data related to individual scans, including raw FIDs, acquisition, and method parameters.
     PvReco: Manages data related to image reconstructions within a single scan.
     PvFiles: Provides a flexible container for raw files that may not be systematically organized,
              allowing users to add any files and utilize full module functionalities if all required files are present.
     Parameter: Represents parameter metadata for various components within a scan.
     Parser: Facilitates the parsing of raw dataset information into structured formats.
+    Tokenizer: A single-pass alternative to Parser that produces identical parameter values.
+    MetadataIndex: An opt-in sidecar cache of the contents tree and parsed parameters of a dataset.
 """
 
-from .pvstudy import PvStudy
+from .pvstudy import PvStudy, StudyChanges
 from .pvscan import PvScan
 from .pvreco import PvReco
 from .pvfiles import PvFiles
 from .parameters import Parameter, Parser
+from .tokenizer import Tokenizer
+from .index import MetadataIndex
 
-__all__ = ['PvStudy', 'PvScan', 'PvReco', 'PvFiles', 'Parameter', 'Parser']
\ No newline at end of file
+__all__ = ['PvStudy', 'StudyChanges', 'PvScan', 'PvReco', 'PvFiles', 'Parameter', 'Parser', 'Tokenizer', 'MetadataIndex']
\ No newline at end of file
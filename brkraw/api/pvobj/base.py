@@ -6,21 +6,28 @@ directory structures, and more, all while using an object-oriented approach to m
 
 Classes:
     BaseBufferHandler: Manages file buffer operations, ensuring proper opening, closing, and context management of file streams.
+    SharedZipFile: A reference-counted ZipFile handle shared by the objects of a compressed dataset.
+    LazyFileSizes: A read-only sequence of file sizes that stats the files of a directory on first access.
     BaseMethods: Extends BaseBufferHandler to include various file and directory handling methods necessary 
     for accessing and managing dataset contents.
 """
 
 from __future__ import annotations
 import os
+import threading
+from fnmatch import fnmatchcase
 from zipfile import ZipFile
-from collections import OrderedDict, defaultdict
+from collections import OrderedDict
+from collections.abc import Sequence
 from pathlib import Path
 from .parameters import Parameter
+from .seekable import SeekIndex, SeekableZipMember
 from xnippet.formatter import PathFormatter
 from typing import TYPE_CHECKING
 if TYPE_CHECKING:
-    from typing import Optional, List
+    from typing import Optional, List, Union
     from .types import PvFileBuffer
+    from .index import MetadataIndex
 
 
 class BaseBufferHandler(PathFormatter):
@@ -50,6 +57,134 @@ class BaseBufferHandler(PathFormatter):
         return False
 
 
+class SharedZipFile:
+    """A reference-counted ZipFile handle shared by the objects of a compressed dataset.
+
+    The archive is opened once, on first access, and its central directory is kept in memory so that members
+    are opened directly from their ZipInfo. Each object holding the handle acquires a reference, and the
+    archive is closed when the last reference is released. Members that are still open remain readable
+    until they are closed themselves.
+
+    Members opened with `seekable=True` are read through a `SeekIndex` kept for the lifetime of the archive,
+    so that every object of the dataset jumps to arbitrary offsets of a compressed member in roughly
+    constant time once the member has been decompressed.
+
+    Args:
+        path (Path): The path to the zip archive.
+
+    Methods:
+        acquire(): Adds a reference to the handle and returns it.
+        release(): Removes a reference and closes the archive when none remain.
+        open(index, seekable): Opens the member at the given index of the archive's infolist.
+
+    Attributes:
+        zipfile (ZipFile): The open archive, opened on first access.
+        seek_span (int): The minimum distance between two checkpoints of a seek index, in uncompressed bytes.
+            It is widened for large members to bound the number of checkpoints.
+    """
+    seek_span: int = 1 << 20
+
+    def __init__(self, path: Path):
+        self._path = path
+        self._zipfile = None
+        self._infolist = None
+        self._seek_indexes = {}
+        self._refcount = 0
+        self._lock = threading.Lock()
+
+    @property
+    def closed(self):
+        """bool: True if the archive is not currently open."""
+        return self._zipfile is None
+
+    def acquire(self):
+        """Adds a reference to the handle.
+
+        Returns:
+            SharedZipFile: The handle itself.
+        """
+        with self._lock:
+            self._refcount += 1
+        return self
+
+    def release(self):
+        """Removes a reference to the handle, closing the archive when no references remain."""
+        with self._lock:
+            self._refcount = max(self._refcount - 1, 0)
+            if not self._refcount and self._zipfile is not None:
+                self._zipfile.close()
+                self._zipfile = None
+                self._infolist = None
+                self._seek_indexes.clear()
+
+    def open(self, index: int, seekable: bool = False):
+        """Opens a member of the archive.
+
+        Args:
+            index (int): The index of the member in the archive's infolist, as stored in 'file_indexes'.
+            seekable (bool): If True, stored and deflated members are opened with random access through the
+                seek index of the member. Other members are opened as usual.
+
+        Returns:
+            ZipExtFile or SeekableZipMember: The opened member.
+        """
+        with self._lock:
+            zipfile = self._get_zipfile()
+            zinfo = self._infolist[index]
+            if seekable and SeekableZipMember.is_supported(zinfo):
+                if (seek_index := self._seek_indexes.get(index)) is None:
+                    seek_index = self._seek_indexes[index] = SeekIndex(self.seek_span, zinfo.file_size)
+                return SeekableZipMember(self._path, zinfo, seek_index)
+            return zipfile.open(zinfo)
+
+    @property
+    def zipfile(self):
+        """ZipFile: The open archive, opened on first access."""
+        with self._lock:
+            return self._get_zipfile()
+
+    def _get_zipfile(self):
+        if self._zipfile is None:
+            self._zipfile = ZipFile(self._path)
+            self._infolist = self._zipfile.infolist()
+        return self._zipfile
+
+
+class LazyFileSizes(Sequence):
+    """A read-only sequence of the sizes of the files of a directory, stat'ed on first access.
+
+    Pickles and compares as a plain list of sizes.
+
+    Args:
+        dirpath (str): The path to the directory.
+        filenames (List[str]): The names of the files, in the order of the sizes.
+    """
+    def __init__(self, dirpath: str, filenames: List[str]):
+        self._dirpath = dirpath
+        self._filenames = filenames
+        self._sizes = None
+
+    def _get_sizes(self):
+        if self._sizes is None:
+            self._sizes = [os.stat(os.path.join(self._dirpath, f)).st_size for f in self._filenames]
+        return self._sizes
+
+    def __getitem__(self, index):
+        return self._get_sizes()[index]
+
+    def __len__(self):
+        return len(self._filenames)
+
+    def __eq__(self, other):
+        return list(self) == list(other)
+
+    def __reduce__(self):
+        return (list, (self._get_sizes(),))
+
+    def __repr__(self):
+        return repr(self._get_sizes()) if self._sizes is not None else f"{self.__class__.__name__}({self._dirpath!r})"
+
+
 class BaseMethods(BaseBufferHandler):
     """Provides utility methods for handling files and directories within PvObjects.
 
@@ -63,12 +198,32 @@ class BaseMethods(BaseBufferHandler):
         _path (Optional[Path]): The base path for file operations.
         _rootpath (Optional[Path]): The root path of the dataset, used for resolving relative paths.
         _contents (Optional[dict]): A structured dictionary containing directory and file details.
+        _index (Optional[MetadataIndex]): The persistent metadata index of the dataset, if enabled.
+        _zipfile (Optional[SharedZipFile]): The shared handle of the archive, for compressed datasets.
+        _param_cache_lock (threading.Lock): Guards the parameter caches, which the threads of `Study` share.
+            The lock is shared by all objects; it is only held for dictionary operations, never while parsing.
+        default_prune (bool): Whether `_fetch_dir` skips directories that cannot hold a scan or a reconstruction.
+        default_lazy_sizes (bool): Whether `_fetch_dir` stats the files of a directory on first access of its sizes.
+        default_seekable (bool): Whether the binary files of archives are opened with random access, see
+            `SharedZipFile.open`.
+        binary_files (tuple): The name patterns of the files known to be binary, returned as file objects.
+        parameter_files (tuple): The name patterns of the files known to be JCAMP-DX parameter files.
     """
     _scan_id: int = None
     _reco_id: int = None
     _path: 'Path' = None
     _rootpath: 'Path' = None
     _contents: 'Path' = None
+    _param_cache: 'OrderedDict' = None
+    _param_cache_size: int = 16
+    _param_cache_lock: threading.Lock = threading.Lock()
+    _index: 'MetadataIndex' = None
+    _zipfile: SharedZipFile = None
+    default_prune: bool = False
+    default_lazy_sizes: bool = False
+    default_seekable: bool = False
+    binary_files: tuple = ('2dseq', 'fid', 'rawdata.job*', 'traj')
+    parameter_files: tuple = ('acqp', 'method', 'visu_pars', 'reco', 'subject')
     
     def isinstance(self, name: str):
         """Check if the class name matches the provided string.
@@ -83,12 +238,20 @@ class BaseMethods(BaseBufferHandler):
         """
         return self.__class__.__name__ == name
     
-    @staticmethod
-    def _fetch_dir(path: 'Path'):
+    @classmethod
+    def _fetch_dir(cls, path: 'Path', prune: Optional[bool] = None, lazy_sizes: Optional[bool] = None):
         """Searches for directories and files in a given directory and returns the directory structure.
 
+        The tree is walked top-down with `os.scandir`, so the type of each entry comes from the directory
+        listing and each file is stat'ed at most once.
+
         Args:
             path: The path to the directory.
+            prune: If True, only directories that can hold a scan or a reconstruction (numeric names and
+                'pdata') are walked; other directories are listed in 'dirs' but not entered.
+                Defaults to the class attribute `default_prune`.
+            lazy_sizes: If True, 'file_sizes' is a `LazyFileSizes` that stats the files of a directory on
+                first access. Defaults to the class attribute `default_lazy_sizes`.
 
         Returns:
             dict: A dictionary representing the directory structure.
@@ -96,23 +259,69 @@ class BaseMethods(BaseBufferHandler):
                 - 'dirs': A list of directory names.
                 - 'files': A list of file names.
                 - 'file_indexes': An empty list.
+                - 'file_sizes': A list of file sizes.
         """
+        prune = cls.default_prune if prune is None else prune
+        lazy_sizes = cls.default_lazy_sizes if lazy_sizes is None else lazy_sizes
         contents = OrderedDict()
-        abspath = path.absolute()
-        for dirpath, dirnames, filenames in os.walk(abspath):
-            normalized_dirpath = os.path.normpath(dirpath)
-            relative_path = os.path.relpath(normalized_dirpath, abspath)
-            file_sizes = [os.path.getsize(os.path.join(dirpath, f)) for f in filenames]
-            contents[relative_path] = {'dirs': dirnames, 'files': filenames, 
-                                       'file_indexes': [], 'file_sizes': file_sizes}
+        stack = [(os.path.normpath(path.absolute()), os.curdir)]
+        while stack:
+            dirpath, relative_path = stack.pop()
+            try:
+                contents[relative_path], subdirs = cls._list_dir(dirpath, lazy_sizes)
+            except OSError:
+                continue
+            for dirname in reversed(subdirs):
+                if not prune or cls._is_childobj_dir(dirname):
+                    stack.append((os.path.join(dirpath, dirname),
+                                  dirname if relative_path == os.curdir else os.path.join(relative_path, dirname)))
         return contents
+
+    @staticmethod
+    def _list_dir(dirpath: str, lazy_sizes: bool = False):
+        """Lists a single directory in the format of `_fetch_dir`.
+
+        Args:
+            dirpath: The absolute path to the directory.
+            lazy_sizes: If True, the file sizes are stat'ed on first access.
+
+        Returns:
+            tuple: The contents of the directory, and the names of its subdirectories that can be walked
+                (symbolic links to directories are listed but not walked, as with `os.walk`).
+        """
+        dirs, files, sizes, subdirs = [], [], [], []
+        with os.scandir(dirpath) as entries:
+            for entry in entries:
+                try:
+                    is_dir = entry.is_dir()
+                except OSError:
+                    is_dir = False
+                if is_dir:
+                    dirs.append(entry.name)
+                    if not entry.is_symlink():
+                        subdirs.append(entry.name)
+                else:
+                    files.append(entry.name)
+                    if not lazy_sizes:
+                        sizes.append(entry.stat().st_size)
+        if lazy_sizes:
+            sizes = LazyFileSizes(dirpath, files)
+        return {'dirs': dirs, 'files': files, 'file_indexes': [], 'file_sizes': sizes}, subdirs
+
+    @staticmethod
+    def _is_childobj_dir(dirname: str):
+        """Returns True if a directory can hold a scan or a reconstruction, based on its name."""
+        return dirname.isdigit() or dirname == 'pdata'
     
     @staticmethod
-    def _fetch_zip(path: 'Path'):
+    def _fetch_zip(path: Union['Path', ZipFile]):
         """Searches for files in a zip file and returns the directory structure and file information.
 
+        The central directory is enumerated once. The parent folders of a directory are only walked the
+        first time the directory is seen, so the cost is linear in the number of members.
+
         Args:
-            path: The path to the zip file.
+            path: The path to the zip file, or an open ZipFile.
 
         Returns:
             dict: A dictionary representing the directory structure and file information.
@@ -120,19 +329,35 @@ class BaseMethods(BaseBufferHandler):
                 - 'dirs': A set of directory names.
                 - 'files': A list of file names.
                 - 'file_indexes': A list of file indexes.
+                - 'file_sizes': A list of uncompressed file sizes.
+                - 'file_crcs': A list of CRC-32 checksums of the files.
         """
-        with ZipFile(path) as zip_file:
-            contents = defaultdict(lambda: {'dirs': set(), 'files': [], 'file_indexes': [], 'file_sizes': []})
-            for i, item in enumerate(zip_file.infolist()):
-                if not item.is_dir():
-                    dirpath, filename = os.path.split(item.filename)
-                    contents[dirpath]['files'].append(filename)
-                    contents[dirpath]['file_indexes'].append(i)
-                    contents[dirpath]['file_sizes'].append(item.file_size)
-                    while dirpath:
-                        dirpath, dirname = os.path.split(dirpath)
-                        if dirname:
-                            contents[dirpath]['dirs'].add(dirname)
+        if not isinstance(path, ZipFile):
+            with ZipFile(path) as zip_file:
+                return BaseMethods._fetch_zip(zip_file)
+        contents = {}
+        for i, item in enumerate(path.infolist()):
+            if item.filename.endswith('/'):
+                continue
+            dirpath, _, filename = item.filename.rpartition('/')
+            if (entry := contents.get(dirpath)) is None:
+                entry = contents[dirpath] = {'dirs': set(), 'files': [], 'file_indexes': [],
+                                             'file_sizes': [], 'file_crcs': []}
+                child = dirpath
+                while child:
+                    parent, _, dirname = child.rpartition('/')
+                    known = parent in contents
+                    if not known:
+                        contents[parent] = {'dirs': set(), 'files': [], 'file_indexes': [],
+                                            'file_sizes': [], 'file_crcs': []}
+                    contents[parent]['dirs'].add(dirname)
+                    if known:
+                        break
+                    child = parent
+            entry['files'].append(filename)
+            entry['file_indexes'].append(i)
+            entry['file_sizes'].append(item.file_size)
+            entry['file_crcs'].append(item.CRC)
         return contents
     
     def _open_as_fileobject(self, key: str):
@@ -151,23 +376,154 @@ class BaseMethods(BaseBufferHandler):
         if not self.contents:
             raise KeyError(f'Failed to load contents list from "{rootpath}".')
         files = self.contents.get('files')
-        path_list = [*([str(self._scan_id)] if self._scan_id else []), *(['pdata', str(self._reco_id)] if self._reco_id else []), key]
 
-        if key not in files:
+        if (pos := self._get_file_position(key)) is None:
             if file_indexes := self.contents.get('file_indexes'):
                 rel_path = self._path
             else:
-                rel_path = os.path.join(*path_list)
+                rel_path = os.path.join(*self._get_path_list(key))
             raise KeyError(f'Failed to load filename "{key}" from folder "{rel_path}".\n [{", ".join(files)}]')
 
         if file_indexes := self.contents.get('file_indexes'):
+            idx = file_indexes[pos]
+            if self._zipfile is not None:
+                return self._zipfile.open(idx, seekable=self.default_seekable and bool(self._get_file_type(key)))
             with ZipFile(rootpath) as zf:
-                idx = file_indexes[files.index(key)]
-                return zf.open(zf.namelist()[idx])
+                return zf.open(zf.infolist()[idx])
         else:
-            path_list.insert(0, rootpath)
-            path = os.path.join(*path_list)
-            return open(path, 'rb')
+            return open(os.path.join(rootpath, *self._get_path_list(key)), 'rb')
+
+    def _get_file_position(self, key: str, alias: bool = False):
+        """Returns the position of a file in the lists of the contents with a single hash lookup.
+
+        The lookup table maps each file name, and each name with '.' replaced by '_', to the position of the
+        file. It is built from 'files' on the first lookup and kept in the contents under 'file_lookup';
+        exact names take precedence over aliases.
+
+        Args:
+            key: The name of the file.
+            alias: If True, the name may also be an alias, e.g. 'rawdata_job0' for 'rawdata.job0'.
+
+        Returns:
+            int or None: The position of the file, or None if it is not in the contents.
+        """
+        contents = self.contents
+        if (lookup := contents.get('file_lookup')) is None:
+            files = contents.get('files') or []
+            lookup = {f.replace('.', '_'): i for i, f in enumerate(files)}
+            lookup.update((f, i) for i, f in enumerate(files))
+            contents['file_lookup'] = lookup
+        if (pos := lookup.get(key)) is not None and (alias or contents['files'][pos] == key):
+            return pos
+        return None
+
+    def _share_resources(self, childobj: BaseMethods):
+        """Shares the metadata index and the archive handle of this object with a child object.
+
+        Args:
+            childobj (BaseMethods): The scan or reconstruction object created by this object.
+
+        Returns:
+            BaseMethods: The child object.
+        """
+        childobj._index = self._index
+        if self._zipfile is not None:
+            childobj._zipfile = self._zipfile.acquire()
+        return childobj
+
+    def close(self):
+        """Closes all open file buffers and releases the archive handle held by this object."""
+        super().close()
+        if self._zipfile is not None:
+            self._zipfile.release()
+            self._zipfile = None
+
+    def _get_path_list(self, key: str):
+        """Builds the path components of the given file relative to the root path.
+
+        Args:
+            key: The name of the file.
+
+        Returns:
+            list: The path components, including scan and reco folders if available.
+        """
+        return [*([str(self._scan_id)] if self._scan_id else []), 
+                *(['pdata', str(self._reco_id)] if self._reco_id else []), key]
+
+    def _get_file_identity(self, key: str):
+        """Returns a tuple identifying the current state of the given file.
+
+        For compressed datasets, the identity is composed of the archive path, the member index and its CRC-32.
+        For uncompressed datasets, the identity is composed of the file path, its size and its modification time.
+
+        Args:
+            key: The name of the file.
+
+        Returns:
+            tuple: The identity of the file, which changes when the file is modified.
+
+        Raises:
+            KeyError: If the file is not in the contents of a compressed dataset.
+            FileNotFoundError: If the file does not exist in an uncompressed dataset.
+        """
+        rootpath = self._rootpath or self._path
+        if file_indexes := self.contents.get('file_indexes'):
+            if (idx := self._get_file_position(key)) is None:
+                raise KeyError(key)
+            file_crcs = self.contents.get('file_crcs')
+            return (str(rootpath), file_indexes[idx], file_crcs[idx] if file_crcs else None)
+        path = os.path.join(rootpath, *self._get_path_list(key))
+        stat = os.stat(path)
+        return (path, stat.st_size, stat.st_mtime_ns)
+
+    def _get_cached_param(self, key: str, identity: tuple):
+        """Returns the cached Parameter object of the given file if its identity has not changed.
+
+        Args:
+            key: The name of the file.
+            identity: The current identity of the file.
+
+        Returns:
+            Parameter or None: The cached Parameter object, or None if not cached or outdated.
+        """
+        with self._param_cache_lock:
+            if self._param_cache and key in self._param_cache:
+                cached_identity, par = self._param_cache[key]
+                if cached_identity == identity:
+                    self._param_cache.move_to_end(key)
+                    return par
+                del self._param_cache[key]
+        return None
+
+    def _set_cached_param(self, key: str, identity: tuple, par: Parameter):
+        """Stores a parsed Parameter object in the cache, evicting the least recently used entry if full.
+
+        Args:
+            key: The name of the file.
+            identity: The identity of the file at the time of parsing.
+            par: The parsed Parameter object.
+        """
+        with self._param_cache_lock:
+            if self._param_cache is None:
+                self._param_cache = OrderedDict()
+            self._param_cache[key] = (identity, par)
+            self._param_cache.move_to_end(key)
+            while len(self._param_cache) > self._param_cache_size:
+                self._param_cache.popitem(last=False)
+
+    def clear_param_cache(self, key: Optional[str] = None):
+        """Invalidates the parsed parameters cached in this object.
+
+        Args:
+            key (Optional[str]): The name of the file to invalidate. If None, the entire cache is cleared.
+        """
+        with self._param_cache_lock:
+            if not self._param_cache:
+                return
+            if key is None:
+                self._param_cache.clear()
+            else:
+                self._param_cache.pop(key, None)
 
     def _open_as_string(self, key: str):
         """Opens a file as binary, decodes it as UTF-8, and splits it into lines.
@@ -212,15 +568,29 @@ class BaseMethods(BaseBufferHandler):
         """
         key = key[1:] if key.startswith('_') else key 
         
-        if file := [f for f in self.contents['files'] if (f == key or f.replace('.', '_') == key)]:
-            fileobj = self._open_as_fileobject(file.pop())
-            if self._is_binary(fileobj):
+        if (pos := self._get_file_position(key, alias=True)) is not None:
+            filename = self.contents['files'][pos]
+            if self._get_file_type(filename):
+                return self._open_as_fileobject(filename)
+            identity = self._get_file_identity(filename)
+            if (par := self._get_cached_param(filename, identity)) is not None:
+                return par
+            if self._index is not None and (par := self._index.get_param(identity)) is not None:
+                self._set_cached_param(filename, identity, par)
+                return par
+            fileobj = self._open_as_fileobject(filename)
+            if self._get_file_type(filename, fileobj):
                 return fileobj
             string_list = fileobj.read().decode('UTF-8').split('\n')
             fileobj.close()
             par = Parameter(string_list, 
                             name=key, scan_id=self._scan_id, reco_id=self._reco_id)
-            return par if par.is_parameter() else string_list
+            if par.is_parameter():
+                self._set_cached_param(filename, identity, par)
+                if self._index is not None:
+                    self._index.set_param(identity, par)
+                return par
+            return string_list
         raise AttributeError(f"'{self.__class__.__name__}' object has no attribute '{key}'")
 
     @property
@@ -300,10 +670,41 @@ class BaseMethods(BaseBufferHandler):
             raise FileNotFoundError("The required file '2dseq' does not exist. "
                                     "Please check the dataset and ensure the file is in the expected location.")
         
+    def _get_file_type(self, filename: str, fileobj: Optional[PvFileBuffer] = None):
+        """Determines whether a file is binary from its name, sniffing its content only for unknown names.
+
+        Names matching `binary_files` are binary and names matching `parameter_files` are not. Other files
+        are checked with `_is_binary` when a file object is given. The result is kept in the contents under
+        'file_binary', so each file is checked at most once.
+
+        Args:
+            filename (str): The name of the file.
+            fileobj (Optional[PvFileBuffer]): The opened file, used to check files of unknown type.
+
+        Returns:
+            bool or None: True if the file is binary, False if it is not, or None if its type is unknown
+                and no file object was given.
+        """
+        cache = self.contents.setdefault('file_binary', {})
+        if (binary := cache.get(filename)) is None:
+            if any(fnmatchcase(filename, pattern) for pattern in self.binary_files):
+                binary = True
+            elif any(fnmatchcase(filename, pattern) for pattern in self.parameter_files):
+                binary = False
+            elif fileobj is not None:
+                binary = self._is_binary(fileobj)
+            else:
+                return None
+            cache[filename] = binary
+        return binary
+
     @staticmethod
     def _is_binary(fileobj: PvFileBuffer, bytes: int = 512):
         """Determine if a file is binary by reading a block of data.
 
+        The block is peeked from the buffer of the file object when possible, so that compressed members
+        do not have to be decompressed again by seeking back.
+
         Args:
             fileobj (BufferedReader): The file object to check.
             bytes (int): Number of bytes to read for the check.
@@ -311,6 +712,9 @@ class BaseMethods(BaseBufferHandler):
         Returns:
             bool: True if the file contains binary data, otherwise False.
         """
-        block = fileobj.read(bytes)
-        fileobj.seek(0)
+        if hasattr(fileobj, 'peek'):
+            block = fileobj.peek(bytes)[:bytes]
+        else:
+            block = fileobj.read(bytes)
+            fileobj.seek(0)
         return b'\x00' in block
\ No newline at end of file
@@ -0,0 +1,304 @@
+"""Provides a persistent on-disk index of the metadata of Paravision datasets.
+
+This module includes the `MetadataIndex` class, an opt-in sidecar cache stored as a SQLite database next to
+a dataset. It keeps the contents tree produced by `_fetch_dir`/`_fetch_zip` and the parsed `Parameter`
+objects of the dataset, so that a previously seen study can be reopened without walking the whole tree or
+parsing its parameter files again. Every entry is validated before use: the contents tree against the
+modification times of the indexed directories (or the size and modification time of the archive), and
+each parameter file against its size and modification time (or its CRC-32 within the archive). The file
+sizes of folders are not indexed, as overwriting a file in place does not change the modification time of
+its directory; they are stat'ed again on first access.
+
+Classes:
+    MetadataIndex: A SQLite-backed sidecar cache of the contents tree and parsed parameters of a dataset.
+
+Notes:
+    Entries are serialized as JSON, with numpy arrays stored as their raw bytes, so that loading an index
+    file never executes code, whoever wrote it. A tampered index can only yield wrong metadata.
+"""
+
+from __future__ import annotations
+import os
+import json
+import base64
+import sqlite3
+import warnings
+import threading
+import numpy as np
+from pathlib import Path
+from collections import OrderedDict
+from .base import LazyFileSizes
+from typing import TYPE_CHECKING
+from .parameters import Parameter
+if TYPE_CHECKING:
+    from typing import Optional, Union
+
+
+class MetadataIndex:
+    """A SQLite-backed sidecar cache of the contents tree and parsed parameters of a dataset.
+
+    Args:
+        dataset_path (Path): The path to the dataset folder or archive.
+        path (Optional[Path]): The path to the index file. Defaults to `default_path(dataset_path)`.
+
+    Attributes:
+        version (int): The format version of the index; an index of any other version is rebuilt.
+        suffix (str): The suffix appended to the dataset path to name the default index file.
+
+    Methods:
+        get_contents(): Returns the indexed contents tree if the dataset has not changed.
+        set_contents(contents): Stores the contents tree of the dataset.
+        get_param(identity): Returns the indexed Parameter object of a file if it has not changed.
+        set_param(identity, par): Stores the Parameter object parsed from a file, unless it holds values that
+            cannot be indexed.
+        clear(): Removes all entries from the index.
+        close(): Closes the connection to the index file.
+    """
+    version: int = 2
+    suffix: str = '.brkidx'
+
+    def __init__(self, dataset_path: Path, path: Optional[Path] = None):
+        self._dataset_path = Path(dataset_path).absolute()
+        self._is_compressed = self._dataset_path.is_file()
+        self.path = Path(path) if path else self.default_path(self._dataset_path)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute('PRAGMA synchronous=OFF')
+        self._conn.execute('CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value BLOB)')
+        self._conn.execute('CREATE TABLE IF NOT EXISTS params (name TEXT PRIMARY KEY, identity TEXT, value BLOB)')
+        if self._get_meta('version') != self.version:
+            self.clear()
+            self._set_meta('version', self.version)
+
+    @classmethod
+    def default_path(cls, dataset_path: Path):
+        """Returns the default location of the index file, next to the dataset.
+
+        Args:
+            dataset_path (Path): The path to the dataset folder or archive.
+
+        Returns:
+            Path: The path of the dataset with the `suffix` appended.
+        """
+        dataset_path = Path(dataset_path).absolute()
+        return dataset_path.with_name(dataset_path.name + cls.suffix)
+
+    @classmethod
+    def open(cls, dataset_path: Path, index: Union[bool, str, Path]):
+        """Opens the index of a dataset as requested by the `index` argument of `PvStudy`.
+
+        Args:
+            dataset_path (Path): The path to the dataset folder or archive.
+            index (Union[bool, str, Path]): True to use the default index location, or the path to the index file.
+
+        Returns:
+            MetadataIndex or None: The opened index, or None if the index is disabled or cannot be opened.
+        """
+        if not index:
+            return None
+        try:
+            return cls(dataset_path, None if index is True else index)
+        except (sqlite3.Error, OSError) as e:
+            warnings.warn(f"Failed to open the metadata index of '{dataset_path}', continuing without it: {e}")
+            return None
+
+    @property
+    def closed(self):
+        """bool: True if the connection to the index file has been closed."""
+        return self._conn is None
+
+    @staticmethod
+    def _encode(value):
+        """Converts a value into a JSON-serializable structure, tagging the types JSON cannot represent.
+
+        Args:
+            value: A value made of dicts with string keys, lists, tuples, sets, numpy arrays and scalars.
+
+        Returns:
+            object: The JSON-serializable structure.
+
+        Raises:
+            TypeError: If the value holds an object that cannot be indexed, e.g. an array of objects.
+        """
+        if isinstance(value, dict):
+            return {key: MetadataIndex._encode(item) for key, item in value.items()}
+        if isinstance(value, list):
+            return [MetadataIndex._encode(item) for item in value]
+        if isinstance(value, tuple):
+            return {'__type__': 'tuple', 'items': [MetadataIndex._encode(item) for item in value]}
+        if isinstance(value, (set, frozenset)):
+            return {'__type__': 'set', 'items': [MetadataIndex._encode(item) for item in sorted(value)]}
+        if isinstance(value, np.ndarray):
+            if value.dtype.hasobject:
+                raise TypeError('Arrays of objects cannot be indexed.')
+            return {'__type__': 'ndarray', 'dtype': value.dtype.str, 'shape': list(value.shape),
+                    'data': base64.b64encode(np.ascontiguousarray(value).tobytes()).decode('ascii')}
+        if value is None or isinstance(value, (bool, int, float, str)):
+            return value
+        raise TypeError(f"Values of type '{type(value).__name__}' cannot be indexed.")
+
+    @staticmethod
+    def _decode(value):
+        """Restores a value converted by `_encode`."""
+        if isinstance(value, list):
+            return [MetadataIndex._decode(item) for item in value]
+        if not isinstance(value, dict):
+            return value
+        tag = value.get('__type__')
+        if tag == 'tuple':
+            return tuple(MetadataIndex._decode(item) for item in value['items'])
+        if tag == 'set':
+            return set(MetadataIndex._decode(item) for item in value['items'])
+        if tag == 'ndarray':
+            data = base64.b64decode(value['data'])
+            return np.frombuffer(data, dtype=np.dtype(value['dtype'])).reshape(value['shape']).copy()
+        return {key: MetadataIndex._decode(item) for key, item in value.items()}
+
+    @classmethod
+    def _loads(cls, blob):
+        """Decodes a stored entry, returning None if it is not a valid entry of this format."""
+        try:
+            return cls._decode(json.loads(blob))
+        except (ValueError, TypeError, KeyError):
+            return None
+
+    @classmethod
+    def _dumps(cls, value):
+        return json.dumps(cls._encode(value), separators=(',', ':'))
+
+    def _get_meta(self, key: str):
+        with self._lock:
+            row = self._conn.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return self._loads(row[0]) if row else None
+
+    def _set_meta(self, key: str, value):
+        blob = self._dumps(value)
+        with self._lock:
+            self._conn.execute('INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)', (key, blob))
+            self._conn.commit()
+
+    def _get_signature(self, contents: dict):
+        """Computes the signature that invalidates the contents tree when the dataset changes.
+
+        For archives, the signature is the size and modification time of the archive. For folders, it is the
+        modification time of every indexed directory, which changes when an entry is added, removed or renamed.
+
+        Args:
+            contents (dict): The contents tree of the dataset.
+
+        Returns:
+            tuple or None: The signature, or None if an indexed directory no longer exists.
+        """
+        try:
+            if self._is_compressed:
+                stat = os.stat(self._dataset_path)
+                return (stat.st_size, stat.st_mtime_ns)
+            return tuple((dirpath, os.stat(os.path.join(self._dataset_path, dirpath)).st_mtime_ns)
+                         for dirpath in contents)
+        except OSError:
+            return None
+
+    def _get_name(self, identity: tuple):
+        """Converts a file identity from `_get_file_identity` into a name and a validation key.
+
+        Args:
+            identity (tuple): The identity of a file, whose first element is its path or the archive path.
+
+        Returns:
+            tuple: The name of the file relative to the dataset and the remaining identity as a string.
+        """
+        path, *state = identity
+        if self._is_compressed:
+            name = str(state.pop(0))
+        else:
+            name = os.path.relpath(path, self._dataset_path)
+        return name, repr(tuple(state))
+
+    def get_contents(self):
+        """Returns the indexed contents tree if the dataset has not changed.
+
+        Returns:
+            dict or None: The contents tree, or None if it is missing or outdated.
+        """
+        if (contents := self._get_meta('contents')) is None:
+            return None
+        if self._get_signature(contents) != self._get_meta('signature'):
+            return None
+        if not self._is_compressed:
+            for dirpath, item in contents.items():
+                item['file_sizes'] = LazyFileSizes(os.path.join(self._dataset_path, dirpath), item['files'])
+        return OrderedDict(contents)
+
+    def set_contents(self, contents: dict):
+        """Stores the contents tree of the dataset, discarding the indexed parameters if the tree changed.
+
+        Args:
+            contents (dict): The contents tree from `_fetch_dir` or `_fetch_zip`.
+        """
+        contents = {path: {key: value for key, value in item.items()
+                           if self._is_compressed or key != 'file_sizes'}
+                    for path, item in contents.items()}
+        if self._is_compressed and self._get_meta('contents') != contents:
+            with self._lock:
+                self._conn.execute('DELETE FROM params')
+        self._set_meta('contents', contents)
+        self._set_meta('signature', self._get_signature(contents))
+
+    def get_param(self, identity: tuple):
+        """Returns the indexed Parameter object of a file if it has not changed.
+
+        Args:
+            identity (tuple): The current identity of the file.
+
+        Returns:
+            Parameter or None: The Parameter object, or None if it is missing or outdated.
+        """
+        if self.closed:
+            return None
+        name, state = self._get_name(identity)
+        with self._lock:
+            row = self._conn.execute('SELECT identity, value FROM params WHERE name = ?', (name,)).fetchone()
+        if row and row[0] == state and (entry := self._loads(row[1])) is not None:
+            par = Parameter.__new__(Parameter)
+            par.__setstate__({'_name': entry['_name'],
+                              '_repr_items': entry['_repr_items'],
+                              '_header': OrderedDict(entry['_header']),
+                              '_parameters': OrderedDict(entry['_parameters'])})
+            return par
+        return None
+
+    def set_param(self, identity: tuple, par: Parameter):
+        """Stores the Parameter object parsed from a file.
+
+        Args:
+            identity (tuple): The identity of the file at the time of parsing.
+            par (Parameter): The parsed Parameter object.
+        """
+        if self.closed:
+            return
+        name, state = self._get_name(identity)
+        try:
+            blob = self._dumps(par.__getstate__())
+        except TypeError:
+            return
+        with self._lock:
+            self._conn.execute('INSERT OR REPLACE INTO params (name, identity, value) VALUES (?, ?, ?)',
+                               (name, state, blob))
+            self._conn.commit()
+
+    def clear(self):
+        """Removes all entries from the index."""
+        with self._lock:
+            self._conn.execute('DELETE FROM meta')
+            self._conn.execute('DELETE FROM params')
+            self._conn.commit()
+
+    def close(self):
+        """Closes the connection to the index file. Parameters are no longer looked up or stored afterwards."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(path='{self.path}')"
@@ -8,6 +8,8 @@ These capabilities are critical for accessing and manipulating the underlying da
 Classes:
     Parameter: A class designed to parse and manage parameter dictionaries, providing access to parameters and headers, 
                processing content data, and setting parameter values based on input data.
+    LazyParameters: A read-only ordered mapping that keeps the raw records of a parameter file and decodes
+                    each value on first access.
 
 Dependencies:
     re: Regular expression operations for parsing and processing text.
@@ -21,14 +23,53 @@ from __future__ import annotations
 import re
 import numpy as np
 from collections import OrderedDict
+from collections.abc import Mapping
 from .parser import Parser, ptrn_comment, PARAMETER, HEADER
+from .tokenizer import Tokenizer
 from typing import TYPE_CHECKING
 if TYPE_CHECKING:
-    from typing import Optional
-    from typing import List
+    from typing import Optional, Literal
+    from typing import List, Callable
     from numpy.typing import NDArray
 
 
+class LazyParameters(Mapping):
+    """A read-only ordered mapping that decodes parameter values on first access.
+
+    The mapping holds the raw record of each key, as indexed when the file was loaded, and converts it with
+    the decoder of the parser engine only when the key is looked up. Decoded values are memoized, so each
+    record is converted at most once. Iterating keys, `len` and membership tests never decode.
+
+    Args:
+        records (OrderedDict): The raw record of each key, in the order of the file.
+        decoder (Callable): Converts the unpacked raw record of a key into its value.
+    """
+    def __init__(self, records: OrderedDict, decoder: Callable):
+        self._records = records
+        self._decoder = decoder
+        self._decoded = {}
+
+    def __getitem__(self, key):
+        try:
+            return self._decoded[key]
+        except KeyError:
+            value = self._decoder(*self._records[key])
+            self._decoded[key] = value
+            return value
+
+    def __iter__(self):
+        return iter(self._records)
+
+    def __len__(self):
+        return len(self._records)
+
+    def __contains__(self, key):
+        return key in self._records
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({list(self._records)})"
+
+
 class Parameter:
     """Handles the parsing and management of parameter data for Paravision experiments.
 
@@ -40,18 +81,29 @@ class Parameter:
         name (str): The name identifying the parser object.
         scan_id (Optional[int]): The scan ID associated with the parameter data.
         reco_id (Optional[int]): The reconstruction ID associated with the parameter data.
+        engine (Optional[str]): The parser engine, either 'regex' (Parser) or 'tokenizer' (Tokenizer).
+            Defaults to the class attribute `default_engine`.
+        lazy (Optional[bool]): If True, only the position of each key is indexed on load and values are
+            decoded on first access. Defaults to the class attribute `default_lazy`.
 
     Attributes:
-        _parameters (OrderedDict): Stores parameter values.
+        default_engine (str): The parser engine used when none is specified.
+        default_lazy (bool): Whether parameter values are decoded on first access when not specified.
+        _parameters (OrderedDict or LazyParameters): Stores parameter values.
         _header (OrderedDict): Stores header information.
         _name (str): Name of the parser object.
         _repr_items (List[str]): List of string representations for object description.
     """
+    default_engine: Literal['regex', 'tokenizer'] = 'tokenizer'
+    default_lazy: bool = False
+
     def __init__(self, 
                  stringlist: List[str], 
                  name: str, 
                  scan_id: Optional[int] = None, 
-                 reco_id: Optional[int] = None):
+                 reco_id: Optional[int] = None,
+                 engine: Optional[Literal['regex', 'tokenizer']] = None,
+                 lazy: Optional[bool] = None):
         """
         Initialize the Parameter object with the given stringlist, name, scan_id, and reco_id.
 
@@ -60,6 +112,11 @@ class Parameter:
             name: The name of the Parser object.
             scan_id: The scan ID associated with the Parser object.
             reco_id: The reco ID associated with the Parser object.
+            engine: The parser engine to use, either 'regex' or 'tokenizer'.
+            lazy: Whether to defer decoding parameter values until they are accessed.
+
+        Raises:
+            ValueError: If an unknown parser engine is given.
 
         Examples:
             >>> stringlist = ["param1", "param2"]
@@ -74,7 +131,21 @@ class Parameter:
             self._repr_items.append(f'scan_id={scan_id}')
         if reco_id:
             self._repr_items.append(f'reco_id={reco_id}')
-        self._set_param(*Parser.load_param(stringlist))
+        engine = engine or self.default_engine
+        lazy = self.default_lazy if lazy is None else lazy
+        if engine == 'tokenizer':
+            self._contents = stringlist
+            if lazy:
+                self._set_lazy_records(Tokenizer.load_records(stringlist))
+            else:
+                self._header, self._parameters = Tokenizer.parse(stringlist)
+        elif engine == 'regex':
+            if lazy:
+                self._set_lazy_param(*Parser.load_param(stringlist))
+            else:
+                self._set_param(*Parser.load_param(stringlist))
+        else:
+            raise ValueError(f"Unknown parser engine '{engine}', expected 'regex' or 'tokenizer'.")
 
     @property
     def name(self):
@@ -92,7 +163,7 @@ class Parameter:
         """Retrieve the parameters processed by the parser.
 
         Returns:
-            OrderedDict: A dictionary containing the parameters of the data.
+            OrderedDict or LazyParameters: A dictionary containing the parameters of the data.
         """
         return self._parameters
 
@@ -158,6 +229,66 @@ class Parameter:
             else:
                 raise ValueError("Invalid dtype encountered in '_set_param'")
 
+    def _set_lazy_param(self, 
+                        params: List[tuple], 
+                        param_addr: List[int], 
+                        contents: List[str]):
+        """Initialize headers from parsed data and index the parameters for decoding on first access.
+
+        Only the address of each parameter in the contents is recorded; the values are converted by
+        `_decode_param` when they are looked up.
+
+        Args:
+            params (List[tuple]): List containing parameter tuples (dtype, key, value).
+            param_addr (List[int]): List of addresses where parameters are located in the content.
+            contents (List[str]): The contents as a list of strings from which to extract data.
+
+        Raises:
+            ValueError: If an invalid data type (dtype) is encountered.
+        """
+        self._addr_diff = np.diff(param_addr)
+        self._params_key_struct = params
+        self._contents = contents
+        self._header = OrderedDict()
+        records = OrderedDict()
+        for index, addr in enumerate(param_addr[:-1]):
+            dtype, key, value = params[addr]
+            if dtype is PARAMETER:
+                records[key] = (addr, index, value)
+            elif dtype is HEADER:
+                self._header[key] = self._process_contents(contents, addr, self._addr_diff, index, value)[0]
+            else:
+                raise ValueError("Invalid dtype encountered in '_set_lazy_param'")
+        self._parameters = LazyParameters(records, self._decode_param)
+
+    def _decode_param(self, addr: int, index: int, value: str):
+        """Decode a parameter indexed by `_set_lazy_param`.
+
+        Args:
+            addr (int): The parameter's address in contents.
+            index (int): The index of the parameter.
+            value (str): The initial value of the parameter.
+
+        Returns:
+            object: The converted value of the parameter.
+        """
+        return Parser.convert_data_to(*self._process_contents(self._contents, addr, self._addr_diff, index, value))
+
+    def _set_lazy_records(self, records: List[tuple]):
+        """Initialize headers from the records collected by the Tokenizer and keep the parameters for decoding on first access.
+
+        Args:
+            records (List[tuple]): List containing record tuples (dtype, key, value, data).
+        """
+        self._header = OrderedDict()
+        parameters = OrderedDict()
+        for dtype, key, value, data in records:
+            if dtype is PARAMETER:
+                parameters[key] = (value, data)
+            else:
+                self._header[key] = Tokenizer.decode(value, data, dtype)
+        self._parameters = LazyParameters(parameters, Tokenizer.decode)
+
     def __getitem__(self, key):
         """Allows dictionary-like access to parameters.
 
@@ -180,6 +311,27 @@ class Parameter:
         """
         return self.parameters[key]
     
+    def __getstate__(self):
+        """Return the decoded state of the Parameter object for pickling.
+
+        Lazy parameters are decoded, and the raw contents of the file are not included.
+
+        Returns:
+            dict: The name, representation items, header and parameters of the object.
+        """
+        return {'_name': self._name,
+                '_repr_items': self._repr_items,
+                '_header': self._header,
+                '_parameters': OrderedDict(self._parameters.items())}
+
+    def __setstate__(self, state: dict):
+        """Restore the Parameter object from the state returned by `__getstate__`.
+
+        Args:
+            state (dict): The pickled state of the object.
+        """
+        self.__dict__.update(state)
+
     def __repr__(self):
         """Provide a string representation of the Parameter object for debugging and logging.
 
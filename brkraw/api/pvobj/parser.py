@@ -11,6 +11,7 @@ Classes:
 """
 
 import re
+import warnings
 import numpy as np
 from collections import OrderedDict, defaultdict
 from copy import copy
@@ -30,6 +31,16 @@ ptrn_bisstring      = r'\<(?P<string>\$Bis[^>]*)\#\>'
 ptrn_braces         = r'\((?P<contents>[^()]*)\)'
 # Paravision 360 related. @[number of repititions]([number]) ex) @5(0)
 ptrn_at_array       = r'@(\d*)\*\(([-]?\d*[.]?\d*[eE]?[-]?\d*?)\)'
+# Space separated block of numbers and run-length elements, decoded in bulk by convert_numeric_array
+ptrn_numeric        = r'(?:-?[0-9]+\.[0-9]+|-?[0-9.]+e-?[0-9.]+|-?[0-9]+|@[0-9]+\*\(-?[0-9]*\.?[0-9]*[eE]?-?[0-9]*?\))'
+ptrn_numeric_array  = rf'{ptrn_numeric}(?: {ptrn_numeric})*'
+ptrn_int_element    = r'(?:^| )-?[0-9]+(?= |$)'
+
+re_numeric_array    = re.compile(ptrn_numeric_array)
+re_int_element      = re.compile(ptrn_int_element)
+re_at_array         = re.compile(ptrn_at_array)
+re_array            = re.compile(ptrn_array)
+re_bisstring        = re.compile(ptrn_bisstring)
 
 # Conditional enum
 HEADER = 0
@@ -40,6 +51,7 @@ class Parser:
     """A utility class for parsing and converting parameter data from string representations.
 
     The Parser class uses regular expressions to identify and convert data types found in parameter files. It handles typical data formats including integers, floats, strings, and complex arrays, making them amenable for further processing and analysis.
+    The conversion steps call each other through `cls`, so that a subclass such as `Tokenizer` can override a single step.
 
     Methods:
         load_param(stringlist): Parses parameters from a list of strings, identifying headers and parameters.
@@ -48,6 +60,7 @@ class Parser:
         process_complexarray(data): Converts complex nested array strings into structured dictionary formats.
         parse_shape(shape): Interprets textual shape descriptions into tuple or list formats.
         parse_data(data): Converts string data into lists or single values depending on the structure.
+        convert_numeric_array(data, shape): Decodes a block of numbers in bulk, bypassing per-element conversion.
         convert_data_to(data, shape): Transforms data into the specified shape or data type.
     """
     @staticmethod
@@ -128,8 +141,8 @@ class Parser:
             data = data.replace(str_replace_old, str_replace_new)
         return data
 
-    @staticmethod
-    def process_bisarray(elements, shape):
+    @classmethod
+    def process_bisarray(cls, elements, shape):
         """Determines the case of an array with BIS prefix by converting each element to a specific data type.
 
         Args:
@@ -138,14 +151,14 @@ class Parser:
         Returns:
             float, int, or list: The converted elements of the bisarray. If there is only one element, it is returned as is, otherwise a list of converted elements is returned.
         """
-        elements = [Parser.convert_string_to(c) for c in elements]
+        elements = [cls.convert_string_to(c) for c in elements]
         elements = elements.pop() if len(elements) == 1 else elements
         if isinstance(shape, list) and shape[0] == len(elements):
             elements = [e.split(',') for e in elements]
         return elements
 
-    @staticmethod
-    def process_complexarray(data):
+    @classmethod
+    def process_complexarray(cls, data):
         """Processes a string representation of a complex nested array and converts it into a structured dictionary format.
 
         Args:
@@ -159,14 +172,14 @@ class Parser:
         level = 1
         while re.search(ptrn_braces, data_holder):
             for parsed in re.finditer(ptrn_braces, data_holder):
-                cont_parser = [Parser.convert_data_to(cont.strip(), -1) for cont in parsed.group('contents').split(',') if Parser.convert_data_to(cont.strip(), -1) is not None]
+                cont_parser = [cont for cont in (cls.convert_data_to(cont.strip(), -1) for cont in parsed.group('contents').split(',')) if cont is not None]
                 parser[f'level_{level}'].append(cont_parser)
             data_holder = re.sub(ptrn_braces, '', data_holder)
             level += 1
         return dict(parser)
     
-    @staticmethod
-    def process_string(data, shape):
+    @classmethod
+    def process_string(cls, data, shape):
         """Process a string and return the parsed data based on its shape.
 
         Args:
@@ -176,22 +189,22 @@ class Parser:
         Returns:
             tuple: A tuple containing the parsed data and an empty string, or the processed string.
         """
-        shape = Parser.parse_shape(shape)
-        if elements := re.findall(ptrn_bisstring, data):
-            data = Parser.process_bisarray(elements, shape)
+        shape = cls.parse_shape(shape)
+        if '<$Bis' in data and (elements := re_bisstring.findall(data)):
+            data = cls.process_bisarray(elements, shape)
             return data, -1
-        else:
-            data = Parser.clean_up_elements_in_array(data)
+        elif '@' in data:
+            data = cls.clean_up_elements_in_array(data)
         if re.match(ptrn_complex_array, data):
-            data = Parser.process_complexarray(data)
+            data = cls.process_complexarray(data)
         elif re.match(ptrn_string, data):
             data = re.sub(ptrn_string, r'\g<string>', data)
         else:
-            data = Parser.parse_data(data)
+            data = cls.parse_data(data)
         return data, shape
 
-    @staticmethod
-    def parse_shape(shape):
+    @classmethod
+    def parse_shape(cls, shape):
         """Parse the shape of the data.
 
         Args:
@@ -206,11 +219,11 @@ class Parser:
         if shape != -1:
             shape = re.sub(ptrn_array, r'\g<array>', shape)
             if ',' in shape:
-                return [Parser.convert_string_to(c) for c in shape.split(',')]
+                return [cls.convert_string_to(c) for c in shape.split(',')]
         return shape
 
-    @staticmethod
-    def parse_data(data):
+    @classmethod
+    def parse_data(cls, data):
         """Parse the data based on its format.
 
         Args:
@@ -219,16 +232,16 @@ class Parser:
         Returns:
             list or str: The parsed data.
         """
-        if matched := re.findall(ptrn_array, data):
-            return Parser.parse_array_data(matched)
+        if '(' in data and (matched := re_array.findall(data)):
+            return cls.parse_array_data(matched)
         elif ',' in data:
-            return [Parser.convert_string_to(c) for c in data.split(',')]
+            return [cls.convert_string_to(c) for c in data.split(',')]
         elif ' ' in data:
-            return [Parser.convert_string_to(c) for c in data.split(' ')]
+            return [cls.convert_string_to(c) for c in data.split(' ')]
         return data
 
-    @staticmethod
-    def parse_array_data(matched):
+    @classmethod
+    def parse_array_data(cls, matched):
         """Parse the array data.
 
         Args:
@@ -238,11 +251,85 @@ class Parser:
             list: The parsed array data.
         """
         if any(',' in cell for cell in matched):
-            return [[Parser.convert_string_to(c) for c in cell.split(',')] for cell in matched]
-        return [Parser.convert_string_to(c) for c in matched]
+            return [[cls.convert_string_to(c) for c in cell.split(',')] for cell in matched]
+        return [cls.convert_string_to(c) for c in matched]
+
+    @classmethod
+    def convert_numeric_array(cls, data, shape):
+        """Decode a space separated block of numbers straight into an array.
+
+        This is a fast path for the large numeric arrays in parameter files. Numbers are converted in bulk by numpy
+        and `@N*(x)` run-length elements are expanded as repeated values without building intermediate strings.
+        The result is the same as the one of the regular conversion: an ndarray reshaped to the declared shape for
+        multi-dimensional arrays, and a list otherwise. Data that would be converted differently by the regular
+        conversion (e.g. a single element, or a list mixing integer and float elements) is left to it.
+
+        Args:
+            data (str): The data to be converted.
+            shape: The shape of the data.
+
+        Returns:
+            numpy.ndarray, list or None: The decoded array, or None if the data is not handled by this fast path.
+        """
+        if (' ' not in data and '@' not in data) or not re_numeric_array.fullmatch(data):
+            return None
+        with warnings.catch_warnings():
+            # elements such as '1.2.3e5' stop the bulk conversion early, which is either
+            # reported as an error or detected by the size check, depending on the numpy version
+            warnings.simplefilter('ignore', DeprecationWarning)
+            try:
+                array, is_int = cls._fromstring_numeric_array(data)
+            except ValueError:
+                return None
+        if array is None or array.size < 2:
+            return None
+        shape = cls.parse_shape(shape)
+        if isinstance(shape, list):
+            if not all(isinstance(c, int) for c in shape) or np.prod(shape) != array.size:
+                return None
+            return array.reshape(shape)
+        if not is_int and re_int_element.search(data):
+            return None
+        return array.tolist()
 
     @staticmethod
-    def convert_data_to(data, shape):
+    def _fromstring_numeric_array(data):
+        """Convert a validated block of numbers and run-length elements into a flat array.
+
+        Args:
+            data (str): The block of numbers matching `ptrn_numeric_array`.
+
+        Returns:
+            tuple: The flat array (or None if an element could not be converted) and whether it holds integers.
+        """
+        if '@' in data:
+            arrays = []
+            items = re_at_array.split(data)
+            for i, item in enumerate(items):
+                if i % 3 == 0:
+                    if item := item.strip():
+                        array = np.fromstring(item, dtype=float, sep=' ')
+                        if array.size != item.count(' ') + 1:
+                            return None, False
+                        arrays.append(array)
+                elif i % 3 == 1:
+                    num_cnt = int(item)
+                    num_repeat = str(float(items[i + 1]))
+                    if not num_cnt or not (re.match(ptrn_float, num_repeat) or re.match(ptrn_engnotation, num_repeat)):
+                        return None, False
+                    arrays.append(np.full(num_cnt, float(num_repeat)))
+            return np.concatenate(arrays), False
+        is_int = '.' not in data and 'e' not in data
+        array = np.fromstring(data, dtype=int if is_int else float, sep=' ')
+        if array.size != data.count(' ') + 1:
+            return None, is_int
+        if is_int and (array.max() == np.iinfo(array.dtype).max or array.min() == np.iinfo(array.dtype).min):
+            # out of range integers are saturated by the bulk conversion
+            return None, is_int
+        return array, is_int
+
+    @classmethod
+    def convert_data_to(cls, data, shape):
         """Convert the given data to the specified shape.
 
         Args:
@@ -253,7 +340,9 @@ class Parser:
             object: The converted data.
         """
         if isinstance(data, str):
-            data, shape = Parser.process_string(data, shape)
+            if (array := cls.convert_numeric_array(data, shape)) is not None:
+                return array
+            data, shape = cls.process_string(data, shape)
         if isinstance(data, list):
             if (
                 isinstance(shape, list)
@@ -262,5 +351,5 @@ class Parser:
             ):
                 data = np.asarray(data).reshape(shape)
         elif isinstance(data, str):
-            data = Parser.convert_string_to(data)
+            data = cls.convert_string_to(data)
         return data
@@ -7,6 +7,7 @@ Classes:
 """
 
 from __future__ import annotations
+import os
 from .base import BaseMethods
 from typing import TYPE_CHECKING
 if TYPE_CHECKING:
@@ -76,6 +77,23 @@ class PvFiles(BaseMethods):
         else:
             return False
         
+    def _get_file_identity(self, key: str):
+        """Returns a tuple identifying the current state of the given file.
+
+        Args:
+            key (str): The name of the file.
+
+        Returns:
+            tuple: The path, size and modification time of the file.
+
+        Raises:
+            KeyError: If the file corresponding to the key does not exist in the managed files.
+        """
+        if file_path := self._search_file_path(key):
+            stat = os.stat(file_path)
+            return (str(file_path), stat.st_size, stat.st_mtime_ns)
+        raise KeyError(f'Failed to find filename "{key}" from input files.\n [{self.contents.get("files")}]')
+
     def get_visu_pars(self, _:None=None):
         """A mock function to mimic getting 'visu_pars', typically used for testing or compatibility.
 
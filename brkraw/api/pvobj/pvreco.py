@@ -62,6 +62,15 @@ class PvReco(BaseMethods):
         self._path = self._resolve(pathes[1])
         self._contents = contents
         self.is_compressed = True if contents.get('file_indexes') else False
+
+    def update(self, contents: Dict):
+        """Updates the contents of the reconstruction's dataset, keeping its cached parameters.
+
+        Args:
+            contents (dict): The new contents of the reconstruction.
+        """
+        self._contents = contents
+        self.is_compressed = True if contents.get('file_indexes') else False
             
     @property
     def path(self):
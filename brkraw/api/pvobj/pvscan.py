@@ -34,6 +34,9 @@ class PvScan(BaseMethods):
         update(contents): Updates the contents of the scan with new data.
         set_reco(path, reco_id, contents): Initializes a PvReco object for a specific reconstruction.
         get_reco(reco_id): Retrieves a PvReco object for a given reconstruction ID.
+        remove_reco(reco_id): Closes and removes the PvReco object of a reconstruction.
+        clear_param_cache(key): Invalidates the cached parameters of the scan and its reconstructions.
+        close(): Closes the open file buffers and archive handles of the scan and its reconstructions.
     """
     def __init__(self, 
                  scan_id: Optional[int], 
@@ -74,6 +77,8 @@ class PvScan(BaseMethods):
     def set_reco(self, path: Path, reco_id: int, contents: Dict):
         """Initializes and stores a PvReco object for a specific reconstruction within the scan.
 
+        If the reconstruction already exists, only its contents are updated.
+
         Args:
             path (Path): The path to the reconstruction data.
             reco_id (int): The unique identifier for the reconstruction.
@@ -82,7 +87,11 @@ class PvScan(BaseMethods):
         Returns:
             None
         """
-        self._recos[reco_id] = PvReco(self._scan_id, reco_id, (self._rootpath, path), contents)
+        if reco_id in self._recos:
+            self._recos[reco_id].update(contents)
+            return
+        self._recos[reco_id] = self._share_resources(
+            PvReco(self._scan_id, reco_id, (self._rootpath, path), contents))
     
     def get_reco(self, reco_id: int):
         """Retrieves the PvReco object associated with the specified reconstruction ID.
@@ -98,6 +107,31 @@ class PvScan(BaseMethods):
         """
         return self._recos[reco_id]
 
+    def remove_reco(self, reco_id: int):
+        """Closes and removes the PvReco object of a reconstruction that no longer exists.
+
+        Args:
+            reco_id (int): The ID of the reconstruction to remove.
+        """
+        if (recoobj := self._recos.pop(reco_id, None)) is not None:
+            recoobj.close()
+
+    def clear_param_cache(self, key: Optional[str] = None):
+        """Invalidates the parsed parameters cached in the scan and all of its reconstructions.
+
+        Args:
+            key (Optional[str]): The name of the file to invalidate. If None, the entire cache is cleared.
+        """
+        super().clear_param_cache(key)
+        for recoobj in self._recos.values():
+            recoobj.clear_param_cache(key)
+
+    def close(self):
+        """Closes the open file buffers and archive handles of the scan and all of its reconstructions."""
+        super().close()
+        for recoobj in self._recos.values():
+            recoobj.close()
+
     def get_visu_pars(self, reco_id: Optional[int] = None):
         """Retrieves visualization parameters ('visu_pars') for the scan or a specific reconstruction.
 
@@ -7,19 +7,51 @@ imaging data.
 
 Classes:
     PvStudy: Manages an entire study's dataset, organizing scans and handling specific data retrieval efficiently.
+    StudyChanges: The scans, reconstructions and directories changed on disk since the last refresh of a study.
 """
 
 from __future__ import annotations
+import os
 import re
 import zipfile
 from collections import OrderedDict
-from .base import BaseMethods
+from dataclasses import dataclass, field
+from .base import BaseMethods, SharedZipFile
 from .pvscan import PvScan
+from .index import MetadataIndex
 from typing import TYPE_CHECKING
 if TYPE_CHECKING:
+    from typing import Optional, Union, Callable, List, Tuple
     from pathlib import Path
 
 
+ptrn_childobj = re.compile(r'(?:.*?/)??(?:(\d+)/(\D+)/(\d+)|(\d+))$')
+
+
+@dataclass
+class StudyChanges:
+    """The changes detected on disk by `PvStudy.refresh`.
+
+    Attributes:
+        added_scans (List[int]): The IDs of the new scans.
+        added_recos (List[Tuple[int, int]]): The (scan_id, reco_id) pairs of the new reconstructions,
+            including those of the new scans.
+        removed_scans (List[int]): The IDs of the scans that no longer exist.
+        removed_recos (List[Tuple[int, int]]): The (scan_id, reco_id) pairs of the reconstructions that no
+            longer exist, including those of the removed scans.
+        updated (List[str]): The known directories, relative to the study, whose entries changed.
+    """
+    added_scans: List[int] = field(default_factory=list)
+    added_recos: List[Tuple[int, int]] = field(default_factory=list)
+    removed_scans: List[int] = field(default_factory=list)
+    removed_recos: List[Tuple[int, int]] = field(default_factory=list)
+    updated: List[str] = field(default_factory=list)
+
+    def __bool__(self):
+        return bool(self.added_scans or self.added_recos or self.removed_scans
+                    or self.removed_recos or self.updated)
+
+
 class PvStudy(BaseMethods):
     """Represents and manages an entire Paravision study dataset.
 
@@ -31,16 +63,24 @@ class PvStudy(BaseMethods):
         path (str): The file system path to the study dataset.
         avail (list): A list of IDs representing the available scans within the dataset.
         contents (dict): A structured dictionary representing the organized contents of the dataset.
+        index (Optional[MetadataIndex]): The persistent metadata index of the dataset, if enabled.
 
     Methods:
         get_scan(scan_id): Retrieves a PvScan object for a given scan ID, facilitating detailed access to specific scans.
+        refresh(): Adds the scans and reconstructions written since the dataset was loaded.
+        clear_param_cache(key): Invalidates the cached parameters of the study and all of its scans.
+        close(): Closes the open file buffers, the archive handle and the metadata index of the study.
     """
-    def __init__(self, path: Path, debug: bool=False):
+    def __init__(self, path: Path, debug: bool=False, index: Union[bool, str, Path] = False):
         """Initializes a PvStudy object with the specified path and debug settings.
 
         Args:
             path (Path): The filesystem path to the dataset.
             debug (bool, optional): If set to True, enables debug mode which may affect logging and error reporting.
+            index (Union[bool, str, Path], optional): Enables the persistent metadata index of the dataset, which
+                stores the contents tree and parsed parameters so that the dataset can be reopened without
+                parsing its parameter files again. True stores the index next to the dataset, a path selects
+                the index file. Defaults to False.
 
         Raises:
             FileNotFoundError: If the path does not exist or is invalid.
@@ -48,7 +88,15 @@ class PvStudy(BaseMethods):
         """
         if not debug:    
             self._check_dataset_validity(self._resolve(path))
-            self._construct()
+            self._index = MetadataIndex.open(self._path, index)
+            try:
+                self._construct()
+            except Exception:
+                if self._index is not None:
+                    self._index.close()
+                    self._index = None
+                super().close()
+                raise
     
     # internal method
     def _check_dataset_validity(self, path: Path):
@@ -65,52 +113,94 @@ class PvStudy(BaseMethods):
         if not self._path.exists():
             raise FileNotFoundError(f"The path '{self._path}' does not exist.")
         if self._path.is_dir():
-            self._contents = self._fetch_dir(self._path)
             self.is_compressed = False
         elif self._path.is_file() and zipfile.is_zipfile(self._path):
-            self._contents = self._fetch_zip(self._path)
+            self._zipfile = SharedZipFile(self._path).acquire()
             self.is_compressed = True
         else:
             raise ValueError(f"The path '{self._path}' does not meet the required criteria.")
     
+    def _fetch_contents(self, fetch: Callable):
+        """Fetches the contents tree of the dataset, using the metadata index when it is up to date.
+
+        The archive is read through the shared handle, so that its central directory is parsed only once.
+
+        Args:
+            fetch (Callable): The method that walks the dataset, either `_fetch_dir` or `_fetch_zip`.
+
+        Returns:
+            dict: The contents tree of the dataset.
+        """
+        if self._index is not None and (contents := self._index.get_contents()) is not None:
+            return contents
+        contents = fetch(self._zipfile.zipfile if self._zipfile is not None else self._path)
+        if self._index is not None:
+            self._index.set_contents(contents)
+        return contents
+
     def _construct(self):
         """Organizes the dataset contents by parsing directories and files, structuring them for easy access.
 
         Processes directories to segregate scans and their respective data, handling both uncompressed and compressed datasets.
+        The contents tree is fetched first, from the metadata index when it is up to date. Every directory is classified in a single pass; the contents that are not part of a scan or a
+        reconstruction are kept.
         """
+        if self.is_compressed:
+            self._contents = self._fetch_contents(self._fetch_zip)
+        else:
+            self._contents = self._fetch_contents(self._fetch_dir)
+            self._dir_mtimes = {dirpath: os.stat(self._path / dirpath).st_mtime_ns for dirpath in self._contents}
         self._scans = OrderedDict()
         self._backup = OrderedDict()
 
-        to_remove = []
+        remaining = OrderedDict()
         for path, contents in self._contents.items():
             if not path:
                 self._root = contents
-                to_remove.append(path)
             elif not contents['files']:
-                to_remove.append(path)
-            elif matched := re.match(r'(?:.*/)?(\d+)/(\D+)/(\d+)$', path) or re.match(r'(?:.*/)?(\d+)$', path):
-                to_remove.append(self._process_childobj(matched, (path, contents)))
-        self._clear_contents(to_remove)
+                continue
+            elif matched := self._match_childobj(path):
+                self._process_childobj(matched, (path, contents))
+            else:
+                remaining[path] = contents
+        self._contents = remaining
+
+    @staticmethod
+    def _match_childobj(path: str):
+        """Matches the path of a scan or reconstruction folder.
+
+        Args:
+            path (str): The path of the folder, relative to the dataset.
+
+        Returns:
+            tuple or None: The scan ID, and for reconstructions the name of the parent folder of the
+                reconstruction (normally 'pdata') and the reconstruction ID, or None for both for scans.
+                None if the path is neither.
+        """
+        if not (matched := ptrn_childobj.match(path)):
+            return None
+        if matched.group(4) is not None:
+            return int(matched.group(4)), None, None
+        return int(matched.group(1)), matched.group(2), int(matched.group(3))
 
     def _process_childobj(self, matched, item):
         """The `_process_childobj` method processes a child object based on the provided arguments and updates the internal state of the object.
 
         Args:
-            matched: A `re.Match` object representing the matched pattern.
+            matched: A tuple of the scan ID, folder name and reconstruction ID from `_match_childobj`.
             item: A tuple containing the path and contents of the child object.
-            **kwargs: Additional keyword arguments.
 
         Returns:
             str: The path of the processed child object.
         """
         path, contents = item
-        scan_id = int(matched.group(1))
+        scan_id, folder, reco_id = matched
         if scan_id not in self._scans:
-            self._scans[scan_id] = PvScan(scan_id, (self.path, path))
-        if len(matched.groups()) == 1 and 'pdata' in contents['dirs']:
+            self._scans[scan_id] = self._share_resources(PvScan(scan_id, (self.path, path)))
+        if reco_id is None and 'pdata' in contents['dirs']:
             self._scans[scan_id].update(contents)
-        elif len(matched.groups()) == 3 and matched.group(2) == 'pdata':
-            reco_id = int(matched.group(3))
+            self._backup.pop(path, None)
+        elif folder == 'pdata':
             self._scans[scan_id].set_reco(path, reco_id, contents)
         else:
             self._backup[path] = contents
@@ -130,27 +220,119 @@ class PvStudy(BaseMethods):
             if 'subject' in contents['files']:
                 return contents
 
-    def _clear_contents(self, to_be_removed):
-        """Clears specified contents from the dataset's memory structure.
+    def refresh(self):
+        """Updates the study with the scans and reconstructions written since the dataset was loaded.
 
-        This method attempts to remove paths listed in `to_be_removed` from the dataset's content dictionary.
-        If a path cannot be found (i.e., it's already been removed or never existed), it logs the path to `_dummy`
-        for further debugging or inspection.
+        Only directories whose modification time changed are listed again, and only new directories are
+        walked, so the cost of a refresh scales with the new data rather than with the size of the study.
+        Existing scan and reconstruction objects are kept along with their cached parameters; the entries
+        of changed directories are updated in place, and objects whose directory was removed are closed.
 
-        Args:
-            to_be_removed (list): A list of paths to be removed from the dataset's contents.
+        Note:
+            The modification time of a directory changes when entries are added, removed or renamed, not
+            when a file is appended to. Parameter files are revalidated against their own size and
+            modification time when they are accessed. Archives are not refreshed.
 
         Returns:
-            None
-        
-        Notes:
-            The `_dummy` list can be used to track removal errors or inconsistencies in the dataset's path management.
+            StudyChanges: The scans, reconstructions and directories that changed.
         """
-        for path in to_be_removed:
+        changes = StudyChanges()
+        if self.is_compressed:
+            return changes
+        scans_before = set(self._scans)
+        recos_before = {(scan_id, reco_id) for scan_id, scanobj in self._scans.items() for reco_id in scanobj.avail}
+
+        pending = []
+        for dirpath, mtime in list(self._dir_mtimes.items()):
+            try:
+                if os.stat(self._path / dirpath).st_mtime_ns != mtime:
+                    pending.append(dirpath)
+            except FileNotFoundError:
+                del self._dir_mtimes[dirpath]
+                self._remove_childobj(dirpath)
+        known = set(self._dir_mtimes)
+        fetched = OrderedDict()
+        while pending:
+            dirpath = pending.pop(0)
             try:
-                del self._contents[path]
-            except KeyError:
-                self._dummy.append(path)
+                self._dir_mtimes[dirpath], fetched[dirpath], subdirs = self._fetch_dir_entries(dirpath)
+            except FileNotFoundError:
+                self._dir_mtimes.pop(dirpath, None)
+                continue
+            for dirname in subdirs:
+                if self.default_prune and not self._is_childobj_dir(dirname):
+                    continue
+                if (subpath := os.path.normpath(os.path.join(dirpath, dirname))) not in self._dir_mtimes:
+                    self._dir_mtimes[subpath] = None
+                    pending.append(subpath)
+        for dirpath, contents in fetched.items():
+            if not contents['files']:
+                continue
+            elif matched := self._match_childobj(dirpath):
+                self._process_childobj(matched, (dirpath, contents))
+            else:
+                self._contents[dirpath] = contents
+
+        recos_after = {(scan_id, reco_id) for scan_id, scanobj in self._scans.items() for reco_id in scanobj.avail}
+        changes.added_scans = sorted(set(self._scans) - scans_before)
+        changes.removed_scans = sorted(scans_before - set(self._scans))
+        changes.added_recos = sorted(recos_after - recos_before)
+        changes.removed_recos = sorted(recos_before - recos_after)
+        changes.updated = [dirpath for dirpath in fetched if dirpath in known]
+        return changes
+
+    def _fetch_dir_entries(self, dirpath: str):
+        """Lists a single directory of the dataset.
+
+        The modification time is read before the listing, so that an entry added during the listing is
+        detected by the next refresh.
+
+        Args:
+            dirpath (str): The path of the directory, relative to the dataset.
+
+        Returns:
+            tuple: The modification time of the directory, its contents in the format of `_fetch_dir`,
+                and the names of its subdirectories that can be walked.
+        """
+        abspath = os.path.join(self._path, dirpath)
+        mtime = os.stat(abspath).st_mtime_ns
+        return (mtime, *self._list_dir(abspath, self.default_lazy_sizes))
+
+    def _remove_childobj(self, dirpath: str):
+        """Closes and removes the scan or reconstruction object of a directory that no longer exists.
+
+        Args:
+            dirpath (str): The path of the removed directory, relative to the dataset.
+        """
+        self._contents.pop(dirpath, None)
+        self._backup.pop(dirpath, None)
+        if not (matched := self._match_childobj(dirpath)):
+            return
+        scan_id, folder, reco_id = matched
+        if scan_id not in self._scans:
+            return
+        if reco_id is None:
+            self._scans.pop(scan_id).close()
+        elif folder == 'pdata':
+            self._scans[scan_id].remove_reco(reco_id)
+
+    @property
+    def index(self):
+        """Returns the persistent metadata index of the dataset.
+
+        Returns:
+            MetadataIndex or None: The index, or None if it is not enabled.
+        """
+        return self._index
+
+    def close(self):
+        """Closes all open file buffers, the archive handle and the metadata index of the dataset."""
+        super().close()
+        for scanobj in self._scans.values():
+            scanobj.close()
+        if self._index is not None:
+            self._index.close()
+            self._index = None
 
     @property
     def path(self):
@@ -184,10 +366,20 @@ class PvStudy(BaseMethods):
         """
         return self._scans[scan_id]
     
+    def clear_param_cache(self, key: Optional[str] = None):
+        """Invalidates the parsed parameters cached in the study and all of its scans.
+
+        Args:
+            key (Optional[str]): The name of the file to invalidate. If None, the entire cache is cleared.
+        """
+        super().clear_param_cache(key)
+        for scanobj in self._scans.values():
+            scanobj.clear_param_cache(key)
+
     def __dir__(self):
         """Customizes the directory listing to include specific attributes and methods.
 
         Returns:
             list: A list of attribute names and methods available in this object.
         """
-        return super().__dir__() + ['path', 'avail', 'get_scan']
+        return super().__dir__() + ['path', 'avail', 'index', 'get_scan', 'refresh', 'clear_param_cache']
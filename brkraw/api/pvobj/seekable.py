@@ -0,0 +1,219 @@
+"""Provides random access to the compressed members of zip archives.
+
+Seeking backwards in a `ZipExtFile` restarts the decompression from the start of the member, so reading a
+frame near the end of a compressed '2dseq' costs as much as reading the whole file. This module keeps
+checkpoints of the decompressor every `span` bytes of uncompressed data, recorded the first time the data
+is decompressed. A read at any offset then resumes from the nearest checkpoint before it, decompressing at
+most `span` bytes that are discarded.
+
+Classes:
+    SeekIndex: The checkpoints of a compressed member, shared by the readers of the member.
+    SeekableZipMember: A read-only file object of a member that seeks through its SeekIndex.
+
+Notes:
+    The checkpoints are copies of the zlib decompressor, which the standard library cannot serialize, so
+    the index lives as long as the `SharedZipFile` of the dataset. Each checkpoint holds the 32 KiB window
+    of the decompressor, so the span of an index grows with the size of its member to keep at most
+    `SeekIndex.max_points` checkpoints, about 5 MiB, per member. The CRC-32 of a member is not verified when it is read through the index.
+"""
+
+from __future__ import annotations
+import io
+import zlib
+import struct
+import threading
+from zipfile import ZIP_STORED, ZIP_DEFLATED
+from typing import TYPE_CHECKING
+if TYPE_CHECKING:
+    from typing import Optional
+    from pathlib import Path
+    from zipfile import ZipInfo
+
+_local_file_header = struct.Struct('<4s2B4HL2L2H')
+_local_file_signature = b'PK\x03\x04'
+
+
+class SeekIndex:
+    """The checkpoints of the decompressor of a member, at every multiple of `span` uncompressed bytes.
+
+    Args:
+        span (int): The minimum distance between two checkpoints, in uncompressed bytes.
+        size (Optional[int]): The uncompressed size of the member. If given, the span is widened so that
+            the member is covered by at most `max_points` checkpoints.
+
+    Attributes:
+        span (int): The distance between two checkpoints, in uncompressed bytes.
+        max_points (int): The maximum number of checkpoints kept by the index.
+
+    Methods:
+        add(offset, compressed_offset, decompressor): Records a checkpoint.
+        find(offset): Returns the last checkpoint at or before an offset.
+    """
+    max_points: int = 128
+
+    def __init__(self, span: int, size: Optional[int] = None):
+        if size is not None:
+            span = max(span, -(-size // self.max_points))
+        self.span = span
+        self._points = [(0, 0, None)]
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._points)
+
+    def add(self, offset: int, compressed_offset: int, decompressor):
+        """Records a checkpoint, unless it is already known or the index is full.
+
+        Args:
+            offset (int): The uncompressed offset of the checkpoint, a multiple of `span`.
+            compressed_offset (int): The number of compressed bytes consumed at the checkpoint.
+            decompressor: A copy of the decompressor at the checkpoint, which is not modified afterwards.
+        """
+        with self._lock:
+            if offset == len(self._points) * self.span and len(self._points) < self.max_points:
+                self._points.append((offset, compressed_offset, decompressor))
+
+    def find(self, offset: int):
+        """Returns the last checkpoint at or before an offset.
+
+        Args:
+            offset (int): The uncompressed offset to read from.
+
+        Returns:
+            tuple: The uncompressed offset and compressed offset of the checkpoint, and a new decompressor
+                resuming from it.
+        """
+        with self._lock:
+            point, compressed_point, decompressor = self._points[min(offset // self.span, len(self._points) - 1)]
+        return point, compressed_point, decompressor.copy() if decompressor else zlib.decompressobj(-zlib.MAX_WBITS)
+
+
+class SeekableZipMember(io.RawIOBase):
+    """A read-only file object of a stored or deflated zip member, with random access.
+
+    Stored members are read directly at their offset in the archive. Deflated members resume from the
+    checkpoint of `index` nearest to the requested offset, recording new checkpoints as they go.
+
+    Args:
+        path (Path): The path to the zip archive.
+        zinfo (ZipInfo): The member to read. It must be stored or deflated, and not encrypted.
+        index (Optional[SeekIndex]): The checkpoints of the member, shared between readers. Required for
+            deflated members.
+
+    Attributes:
+        name (str): The name of the member in the archive.
+        chunk_size (int): The number of compressed bytes read from the archive at once.
+    """
+    chunk_size: int = 1 << 16
+
+    def __init__(self, path: Path, zinfo: ZipInfo, index: Optional[SeekIndex] = None):
+        super().__init__()
+        if not self.is_supported(zinfo):
+            raise ValueError(f"The member '{zinfo.filename}' is neither stored nor deflated, or is encrypted.")
+        self.name = zinfo.filename
+        self._fp = open(path, 'rb')
+        self._fp.seek(zinfo.header_offset)
+        header = _local_file_header.unpack(self._fp.read(_local_file_header.size))
+        if header[0] != _local_file_signature:
+            self._fp.close()
+            raise ValueError(f"Bad local file header for the member '{zinfo.filename}'.")
+        self._data_offset = zinfo.header_offset + _local_file_header.size + header[10] + header[11]
+        self._size = zinfo.file_size
+        self._compress_size = zinfo.compress_size
+        self._stored = zinfo.compress_type == ZIP_STORED
+        self._index = index
+        self._pos = 0
+        self._out = 0
+        self._in = 0
+        self._tail = b''
+        self._decompressor = None
+
+    @staticmethod
+    def is_supported(zinfo: ZipInfo):
+        """Returns True if the member is stored or deflated, and not encrypted."""
+        return zinfo.compress_type in (ZIP_STORED, ZIP_DEFLATED) and not zinfo.flag_bits & 0x1
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._pos
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self._pos
+        elif whence == io.SEEK_END:
+            offset += self._size
+        elif whence != io.SEEK_SET:
+            raise ValueError(f'Invalid whence ({whence}).')
+        if offset < 0:
+            raise ValueError(f'Negative seek position {offset}.')
+        self._pos = offset
+        return offset
+
+    def readinto(self, buffer):
+        data = self.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+    def readall(self):
+        return self.read(-1)
+
+    def read(self, size: int = -1):
+        """Reads up to `size` bytes from the current position, or until the end of the member if negative."""
+        if self.closed:
+            raise ValueError('I/O operation on closed file.')
+        remaining = max(self._size - self._pos, 0)
+        size = remaining if size is None or size < 0 else min(size, remaining)
+        if not size:
+            return b''
+        if self._stored:
+            self._fp.seek(self._data_offset + self._pos)
+            data = self._fp.read(size)
+        else:
+            self._move_to(self._pos)
+            chunks = []
+            while size:
+                chunk = self._inflate(size)
+                chunks.append(chunk)
+                size -= len(chunk)
+            data = b''.join(chunks)
+        self._pos += len(data)
+        return data
+
+    def _move_to(self, offset: int):
+        """Positions the decompressor at an uncompressed offset, from the nearest checkpoint if it is behind."""
+        if self._decompressor is None or offset < self._out or offset - self._out > self._index.span:
+            self._out, self._in, self._decompressor = self._index.find(offset)
+            self._tail = b''
+        while self._out < offset:
+            self._inflate(offset - self._out)
+
+    def _inflate(self, size: int):
+        """Decompresses up to `size` bytes, stopping at the next checkpoint so that it can be recorded."""
+        boundary = (self._out // self._index.span + 1) * self._index.span
+        size = min(size, boundary - self._out)
+        while True:
+            if not self._tail and self._in < self._compress_size:
+                self._fp.seek(self._data_offset + self._in)
+                self._tail = self._fp.read(min(self.chunk_size, self._compress_size - self._in))
+            data = self._decompressor.decompress(self._tail, size)
+            self._in += len(self._tail) - len(self._decompressor.unconsumed_tail)
+            self._tail = self._decompressor.unconsumed_tail
+            if data:
+                break
+            if self._decompressor.eof or (not self._tail and self._in >= self._compress_size):
+                raise EOFError(f"The compressed data of '{self.name}' ended before the end of the member.")
+        self._out += len(data)
+        if self._out == boundary:
+            self._index.add(self._out, self._in, self._decompressor.copy())
+        return data
+
+    def close(self):
+        if not self.closed:
+            self._fp.close()
+            self._decompressor = None
+        super().close()
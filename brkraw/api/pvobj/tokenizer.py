@@ -0,0 +1,127 @@
+"""Provides a single-pass parser engine for JCAMP-DX parameter files.
+
+This module includes the `Tokenizer` class, an alternative engine to `Parser` that reads the lines of a
+parameter file in one linear pass, collecting each `##KEY=` record together with its continuation lines,
+and decodes the collected records straight into typed values. The decoding itself is inherited from
+`Parser`, so both engines produce identical `Parameter` contents; the Tokenizer only replaces the
+conversion of scalar tokens, the hot path of the decoding, by a memoized version checking cheap string
+properties before any regular expression, as scalar tokens repeat heavily in large parameter arrays.
+
+Classes:
+    Tokenizer: A Parser that collects the records of a JCAMP-DX file in a single pass.
+"""
+
+from __future__ import annotations
+import re
+from functools import lru_cache
+from collections import OrderedDict
+from .parser import Parser, PARAMETER, HEADER
+from typing import TYPE_CHECKING
+if TYPE_CHECKING:
+    from typing import List, Tuple
+
+# Compiled REGEX patterns
+re_float        = re.compile(r'-?\d+\.\d+')
+re_engnotation  = re.compile(r'-?[0-9.]+e-?[0-9.]+')
+re_integer      = re.compile(r'[-]*\d+')
+
+
+class Tokenizer(Parser):
+    """A single-pass parser engine for JCAMP-DX parameter files.
+
+    The Tokenizer collects the records of a file in one pass over its lines instead of locating them with
+    `Parser.load_param`, and decodes each record with the conversion rules inherited from `Parser`, so that
+    it can be used interchangeably behind the `Parameter` interface.
+
+    Methods:
+        load_records(stringlist): Collects the records of a JCAMP-DX file in a single pass over its lines.
+        parse(stringlist): Parses a JCAMP-DX file into header and parameter dictionaries.
+        decode(value, data, dtype): Decodes a single record into its typed value.
+        convert_string_to(string): Converts a scalar token to an integer, float, string or None.
+    """
+    @staticmethod
+    def load_records(stringlist: List[str]) -> List[Tuple[int, str, str, str]]:
+        """Collects the records of a JCAMP-DX file in a single pass over its lines.
+
+        Each record is returned with the data joined from its continuation lines, skipping `$$` comments.
+        As with `Parser`, the last record of the file (the `##END=` marker) is not part of the result.
+
+        Args:
+            stringlist (list[str]): A list of strings, each containing a line from a JCAMP DX file.
+
+        Returns:
+            list[tuple]: A list of (dtype, key, value, data) tuples in the order of the file.
+        """
+        records = []
+        key = None
+        for line in stringlist:
+            if line.startswith('##') and '=' in line:
+                if key is not None:
+                    records.append((dtype, key, value, ' '.join(lines)))
+                key, _, value = line[2:].rpartition('=')
+                if key.startswith('$'):
+                    dtype, key = PARAMETER, key[1:]
+                else:
+                    dtype = HEADER
+                lines = []
+            elif key is not None and not line.startswith('$$'):
+                lines.append(line.strip())
+        return records
+
+    @classmethod
+    def parse(cls, stringlist: List[str]) -> Tuple[OrderedDict, OrderedDict]:
+        """Parses a JCAMP-DX file into header and parameter dictionaries.
+
+        Args:
+            stringlist (list[str]): A list of strings, each containing a line from a JCAMP DX file.
+
+        Returns:
+            tuple: A tuple containing the OrderedDict of headers and the OrderedDict of parameters.
+        """
+        header = OrderedDict()
+        parameters = OrderedDict()
+        for dtype, key, value, data in cls.load_records(stringlist):
+            if dtype is PARAMETER:
+                parameters[key] = cls.decode(value, data, dtype)
+            else:
+                header[key] = cls.decode(value, data, dtype)
+        return header, parameters
+
+    @classmethod
+    def decode(cls, value: str, data: str, dtype: int = PARAMETER):
+        """Decodes a single record into its typed value.
+
+        Args:
+            value (str): The value on the `##KEY=` line, which holds the shape when data follows.
+            data (str): The data joined from the continuation lines of the record.
+            dtype (int): Either PARAMETER or HEADER. Header data is returned without conversion.
+
+        Returns:
+            object: The decoded value of the record.
+        """
+        if not data:
+            data = cls.convert_string_to(value)
+            return data if dtype is HEADER else cls.convert_data_to(data, -1)
+        return data if dtype is HEADER else cls.convert_data_to(data, value)
+
+    @staticmethod
+    @lru_cache(maxsize=4096)
+    def convert_string_to(string: str):
+        """Converts a string to an integer, float, or string based on its content.
+
+        Args:
+            string (str): The string to be converted.
+
+        Returns:
+            int, float, str, or None: The converted value of the string, or None if the string is empty.
+        """
+        string = string.strip()
+        if string[:1] == '<' and string[-1:] == '>' and '>' not in string[1:-1]:
+            string = string[1:-1]
+        if not string:
+            return None
+        if re_float.fullmatch(string) or ('e' in string and re_engnotation.fullmatch(string)):
+            return float(string)
+        elif re_integer.fullmatch(string):
+            return int(string)
+        return string
@@ -7,9 +7,10 @@ from .pvstudy import PvStudy
 from .pvreco import PvReco
 from .pvfiles import PvFiles
 from .parameters import Parameter
+from .seekable import SeekableZipMember
 
 
-PvFileBuffer = Type[Union[BufferedReader, ZipExtFile]]
+PvFileBuffer = Type[Union[BufferedReader, ZipExtFile, SeekableZipMember]]
 
 PvStudyType = Type[PvStudy]
 
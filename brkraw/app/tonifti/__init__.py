@@ -6,11 +6,13 @@ from brkraw import __version__, config
 from xnippet.module import ModuleCommander
 from brkraw.app.tonifti.plugin import ToNiftiPlugin, PvScan, PvReco, PvFiles
 from brkraw.app.tonifti.study import StudyToNifti, ScanToNifti
+from brkraw.app.tonifti.batch import convert_study, ConversionResult
 
 tonifti_config = config.config['app']['tonifti']
 # tonifti_presets = config.get_fetcher('preset')
 
-__all__ = ['ToNiftiPlugin', 'StudyToNifti', 'ScanToNifti', 'PvScan', 'PvReco', 'PvFiles']
+__all__ = ['ToNiftiPlugin', 'StudyToNifti', 'ScanToNifti', 'PvScan', 'PvReco', 'PvFiles',
+           'convert_study', 'ConversionResult']
 
 # def main():
 #     """main script allows convert brkraw
@@ -1,4 +1,6 @@
 from __future__ import annotations
+import os
+import gzip
 import warnings
 import numpy as np
 from brkraw import config
@@ -11,12 +13,15 @@ from typing import TYPE_CHECKING
 if TYPE_CHECKING:
     from typing import Optional, Union, Literal
     from typing import List
+    from pathlib import Path
     from numpy.typing import NDArray
+    from nibabel.nifti1 import Nifti1Header
     from xnippet.types import XnippetManagerType
 
 
 class BaseMethods(BaseBufferHandler):
     config: XnippetManagerType = config
+    chunk_size: int = 64 * 1024 ** 2
     
     def set_scale_mode(self, 
                        scale_mode: Optional[Literal['header', 'apply']] = None):
@@ -47,10 +52,11 @@ class BaseMethods(BaseBufferHandler):
     
     @staticmethod
     def get_data_dict(scanobj: 'Scan', 
-                      reco_id: Optional[int] = None):
+                      reco_id: Optional[int] = None,
+                      mmap: bool = False):
         datarray_analyzer = scanobj.get_datarray_analyzer(reco_id)
         axis_labels = datarray_analyzer.shape_desc
-        dataarray = datarray_analyzer.get_dataarray()
+        dataarray = datarray_analyzer.get_dataarray(mmap=mmap)
         slice_axis = axis_labels.index('slice') if 'slice' in axis_labels else 2
         if slice_axis != 2:
             dataarray = np.swapaxes(dataarray, slice_axis, 2)
@@ -114,6 +120,96 @@ class BaseMethods(BaseBufferHandler):
                                             subj_position=subj_position)
         return BaseMethods._assemble_nifti1image(dataobj, affine)
         
+    @staticmethod
+    def save_nifti1image(scanobj: 'Scan',
+                         path: Union[str, 'Path'],
+                         reco_id: Optional[int] = None,
+                         scale_mode: Optional[Literal['header', 'apply']] = None,
+                         subj_type: Optional[str] = None,
+                         subj_position: Optional[str] = None,
+                         compress: Optional[bool] = None,
+                         chunk_size: Optional[int] = None) -> List[str]:
+        """Write the scan to NIfTI-1 file(s) slab by slab, without loading the whole data array.
+
+        The header is written first and the data array, memory-mapped when possible, is then streamed in
+        slabs along its last axis, with the axis reordering and the optional scaling applied to each slab.
+        Scans with multiple slice packs are written to one file per slice pack, suffixed with '-<n>'.
+
+        Args:
+            scanobj (Scan): The scan to convert.
+            path (Union[str, Path]): The output filename, ending with '.nii' or '.nii.gz'.
+            reco_id (Optional[int]): The reconstruction ID.
+            scale_mode (Optional[Literal['header', 'apply']]): Store the slope and offset in the header,
+                or apply them to the data. Defaults to 'header'.
+            subj_type (Optional[str]): Overrides the subject type.
+            subj_position (Optional[str]): Overrides the subject position.
+            compress (Optional[bool]): Gzip the output. Defaults to True if the path ends with '.gz'.
+            chunk_size (Optional[int]): The approximate size of each slab in bytes. Defaults to `chunk_size`.
+
+        Returns:
+            List[str]: The paths of the written files.
+        """
+        scale_mode = scale_mode or 'header'
+        data_dict = BaseMethods.get_data_dict(scanobj, reco_id, mmap=True)
+        affine_dict = BaseMethods.get_affine_dict(scanobj, reco_id, subj_type, subj_position)
+        dataobj = data_dict['data_array']
+        slope, offset = (data_dict['data_slope'], data_dict['data_offset']) if scale_mode == 'apply' else (None, None)
+        out_dtype = np.result_type(dataobj.dtype, np.asarray(slope), np.asarray(offset)) if slope is not None else dataobj.dtype
+        path = str(path)
+        compress = path.endswith('.gz') if compress is None else compress
+        if isinstance(affine_dict['affine'], list):
+            stem, ext = (path[:-7], path[-7:]) if path.endswith('.nii.gz') else os.path.splitext(path)
+            outputs = [(f'{stem}-{i + 1}{ext}', dataobj[:, :, i, ...], affine)
+                       for i, affine in enumerate(affine_dict['affine'])]
+        else:
+            outputs = [(path, dataobj, affine_dict['affine'])]
+        for filename, data, affine in outputs:
+            placeholder = np.broadcast_to(np.zeros((), dtype=out_dtype), data.shape)
+            nii = Nifti1Image(dataobj=placeholder, affine=affine)
+            header = BaseMethods.update_nifti1header(scanobj=scanobj, nifti1image=nii,
+                                                     reco_id=reco_id, scale_mode=scale_mode).header
+            BaseMethods._write_nifti1(filename, header, data, slope, offset,
+                                      compress=compress, chunk_size=chunk_size or BaseMethods.chunk_size)
+        return [filename for filename, _, _ in outputs]
+
+    @staticmethod
+    def _write_nifti1(path: str,
+                      header: 'Nifti1Header',
+                      dataobj: NDArray,
+                      slope = None,
+                      offset = None,
+                      compress: bool = False,
+                      chunk_size: int = 64 * 1024 ** 2):
+        """Write a single-file NIfTI-1 image, streaming the data array in slabs along its last axis.
+
+        Slabs along the last axis, each in Fortran order, make up the Fortran-ordered data block of the file.
+        """
+        header.set_data_offset(0)
+        out_dtype = header.get_data_dtype()
+        shape = dataobj.shape
+        frame_bytes = int(np.prod(shape[:-1], dtype=int)) * max(out_dtype.itemsize, dataobj.dtype.itemsize)
+        step = max(1, chunk_size // max(frame_bytes, 1))
+        if slope is not None:
+            try:
+                slope = np.broadcast_to(slope, shape)
+                offset = np.broadcast_to(offset, shape)
+            except ValueError:
+                warnings.warn(
+                    "Scale correction not applied. The 'slope' and 'offset' provided are not in a tested condition. "
+                    "For further assistance, contact the developer via issue at: https://github.com/brkraw/brkraw.git",
+                    UserWarning)
+                slope = None
+        opener = gzip.open(path, 'wb', compresslevel=1) if compress else open(path, 'wb')
+        with opener as f:
+            header.write_to(f)
+            f.write(b'\x00' * (header.get_data_offset() - f.tell()))
+            for start in range(0, shape[-1], step):
+                index = (..., slice(start, start + step))
+                slab = np.asarray(dataobj[index])
+                if slope is not None:
+                    slab = slab * slope[index] + offset[index]
+                f.write(slab.astype(out_dtype, copy=False).tobytes(order='F'))
+
     @staticmethod
     def _bypass_method_via_plugin(scanobj: 'Scan', 
                                   subj_type: Optional[str] = None, 
@@ -0,0 +1,248 @@
+"""Batch conversion of studies to NIfTI-1 on a pool of worker processes.
+
+Each conversion task covers one (scan, reco) pair. Workers reopen the dataset from its path instead of
+receiving a pickled study, write through `AtomicOutput` so that an interrupted or failed task never leaves
+a partial file under the final name, and report failures as `ConversionResult` entries instead of
+raising, so that one broken scan does not stop the rest of the batch. A task that kills its worker process
+is reported the same way, and the other tasks run on a new pool.
+"""
+
+from __future__ import annotations
+import os
+import traceback
+from collections import deque
+from dataclasses import dataclass, field
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import TYPE_CHECKING
+if TYPE_CHECKING:
+    from typing import Any, Callable, Iterable, List, Optional, Literal
+    from pathlib import Path
+    from .study import StudyToNifti
+
+
+@dataclass
+class ConversionTask:
+    """A single (scan, reco) pair to convert, picklable so that it can be sent to a worker process.
+
+    Args:
+        path (str): The absolute path to the study folder or archive, reopened by the worker.
+        scan_id (int): The scan ID.
+        reco_id (int): The reconstruction ID.
+        output (str): The output path, without extension. Files are written as `output + '.nii.gz'`, or
+            `output + '-<n>.nii.gz'` for scans with multiple slice packs.
+        scale_mode (Optional[Literal['header', 'apply']]): Store the slope and offset in the header,
+            or apply them to the data.
+        subj_type (Optional[str]): Overrides the subject type.
+        subj_position (Optional[str]): Overrides the subject position.
+        compress (bool): Gzip the outputs.
+    """
+    path: str
+    scan_id: int
+    reco_id: int
+    output: str
+    scale_mode: Optional[Literal['header', 'apply']] = None
+    subj_type: Optional[str] = None
+    subj_position: Optional[str] = None
+    compress: bool = True
+
+
+@dataclass
+class ConversionResult:
+    """The outcome of a conversion task.
+
+    Args:
+        task (Any): The task that was run.
+        outputs (List[str]): The paths of the written files, empty if the task failed.
+        error (Optional[str]): The formatted traceback of the exception raised by the task, or None if it
+            succeeded.
+
+    Attributes:
+        ok (bool): True if the task succeeded, i.e. `error` is None.
+    """
+    task: Any
+    outputs: List[str] = field(default_factory=list)
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class AtomicOutput:
+    """Redirects the files of a conversion to a temporary prefix and renames them once it succeeds.
+
+    Files written under `path` (e.g. `path + '.nii.gz'`, `path + '-1.nii.gz'` or `path + '.bval'`) are renamed
+    to the same names under `output` when the context exits without error, and removed otherwise.
+
+    Args:
+        output (str): The final output path, without extension.
+
+    Attributes:
+        path (str): The temporary path prefix, next to the final output.
+        outputs (List[str]): The final paths of the renamed files, set on successful exit.
+    """
+    def __init__(self, output: str):
+        self._dirname, self._basename = os.path.split(str(output))
+        self._prefix = f'.{self._basename}.{os.getpid()}.tmp'
+        self.path = os.path.join(self._dirname, self._prefix)
+        self.outputs = []
+
+    def _list_temporary(self):
+        return sorted(f for f in os.listdir(self._dirname or os.curdir) if f.startswith(self._prefix))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        for filename in self._list_temporary():
+            temporary = os.path.join(self._dirname, filename)
+            if exc_type is None:
+                output = os.path.join(self._dirname, self._basename + filename[len(self._prefix):])
+                os.replace(temporary, output)
+                self.outputs.append(output)
+            else:
+                os.remove(temporary)
+        return False
+
+
+def _run_task(func: Callable, task: Any) -> ConversionResult:
+    try:
+        return ConversionResult(task=task, outputs=func(task))
+    except Exception:
+        return ConversionResult(task=task, error=traceback.format_exc())
+
+
+def run_tasks(func: Callable, tasks: Iterable, jobs: int = 1) -> List[ConversionResult]:
+    """Runs conversion tasks, in parallel worker processes if `jobs` is larger than 1.
+
+    Args:
+        func (Callable): A picklable function that converts one task and returns the list of written files.
+        tasks (Iterable): The tasks to run.
+        jobs (int): The number of worker processes. Tasks run in the current process if 1 or less.
+
+    Returns:
+        List[ConversionResult]: The result of each task, in the order of the tasks. Failed tasks carry the
+            formatted traceback in `error`.
+    """
+    tasks = list(tasks)
+    if jobs <= 1 or len(tasks) <= 1:
+        return [_run_task(func, task) for task in tasks]
+    results = [None] * len(tasks)
+    pending = list(range(len(tasks)))
+    while pending:
+        lost, pending = _run_pool(func, tasks, pending, results, jobs)
+        # rerun the tasks lost with a broken pool one at a time, so that only the task that broke it fails
+        for index in lost:
+            _run_pool(func, tasks, [index], results, 1)
+    return results
+
+
+def _run_pool(func: Callable, tasks: List, indexes: List[int], results: List, jobs: int):
+    """Runs tasks on a new pool of worker processes, submitting at most `jobs` tasks at a time.
+
+    The result of each task is stored in `results` at its index. If a worker process dies, the pool is
+    broken: the tasks that were running get an error result and no further tasks are submitted.
+
+    Returns:
+        Tuple[List[int], List[int]]: The indexes of the tasks lost with a broken pool, and of the tasks
+            that were not submitted.
+    """
+    queue = deque(indexes)
+    running = {}
+    lost = []
+    with ProcessPoolExecutor(max_workers=min(jobs, len(indexes))) as executor:
+        while running or (queue and not lost):
+            while queue and not lost and len(running) < jobs:
+                index = queue.popleft()
+                try:
+                    running[executor.submit(_run_task, func, tasks[index])] = index
+                except BrokenProcessPool:
+                    results[index] = ConversionResult(task=tasks[index], error=traceback.format_exc())
+                    lost.append(index)
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                index = running.pop(future)
+                try:
+                    results[index] = future.result()
+                except Exception as e:
+                    results[index] = ConversionResult(task=tasks[index], error=traceback.format_exc())
+                    if isinstance(e, BrokenProcessPool):
+                        lost.append(index)
+    return lost, list(queue)
+
+
+_study_cache = {}
+
+
+def _get_study(path: str) -> 'StudyToNifti':
+    """Opens the study in the worker process, reusing it for consecutive tasks of the same study.
+
+    A reused study is refreshed, so that scans written since it was opened can be converted.
+    """
+    from .study import StudyToNifti
+    if path not in _study_cache:
+        for study in _study_cache.values():
+            study.close()
+        _study_cache.clear()
+        _study_cache[path] = StudyToNifti(path)
+    else:
+        _study_cache[path].refresh()
+    return _study_cache[path]
+
+
+def convert_task(task: ConversionTask) -> List[str]:
+    """Converts a single (scan, reco) pair with the streaming writer, writing the output atomically.
+
+    Args:
+        task (ConversionTask): The task to convert.
+
+    Returns:
+        List[str]: The paths of the written files.
+    """
+    study = _get_study(task.path)
+    with AtomicOutput(task.output) as output:
+        study.save_nifti1image(task.scan_id,
+                               output.path + ('.nii.gz' if task.compress else '.nii'),
+                               reco_id=task.reco_id,
+                               scale_mode=task.scale_mode,
+                               subj_type=task.subj_type,
+                               subj_position=task.subj_position,
+                               compress=task.compress)
+    return output.outputs
+
+
+def convert_study(path: Path,
+                  output_dir: Path,
+                  jobs: int = 1,
+                  scale_mode: Optional[Literal['header', 'apply']] = None,
+                  subj_type: Optional[str] = None,
+                  subj_position: Optional[str] = None,
+                  compress: bool = True) -> List[ConversionResult]:
+    """Converts every reconstruction of a study to NIfTI-1, one task per (scan, reco) pair.
+
+    Outputs are named 'scan-<scan_id>_reco-<reco_id>.nii.gz' in `output_dir`.
+
+    Args:
+        path (Path): The path to the study folder or archive.
+        output_dir (Path): The folder to write the NIfTI-1 files to. Created if it does not exist.
+        jobs (int): The number of worker processes.
+        scale_mode (Optional[Literal['header', 'apply']]): Store the slope and offset in the header,
+            or apply them to the data.
+        subj_type (Optional[str]): Overrides the subject type.
+        subj_position (Optional[str]): Overrides the subject position.
+        compress (bool): Gzip the outputs.
+
+    Returns:
+        List[ConversionResult]: The result of each task, in scan and reco order.
+    """
+    from .study import StudyToNifti
+    path = os.path.abspath(path)
+    os.makedirs(output_dir, exist_ok=True)
+    with StudyToNifti(path) as study:
+        pairs = [(scan_id, reco_id) for scan_id in study.avail for reco_id in study.get_scan(scan_id).avail]
+    tasks = [ConversionTask(path=path, scan_id=scan_id, reco_id=reco_id,
+                            output=os.path.join(output_dir, f'scan-{scan_id:02d}_reco-{reco_id:02d}'),
+                            scale_mode=scale_mode, subj_type=subj_type, subj_position=subj_position,
+                            compress=compress) for scan_id, reco_id in pairs]
+    return run_tasks(convert_task, tasks, jobs=jobs)
@@ -7,6 +7,7 @@ from .base import BaseMethods
 from typing import TYPE_CHECKING
 if TYPE_CHECKING:
     from typing import Union, Optional, Literal
+    from pathlib import Path
     from brkraw.api import PlugInSnippet
     from nibabel.nifti1 import Nifti1Image
     
@@ -132,4 +133,24 @@ class ScanToNifti(Scan, BaseMethods):
                                        subj_type, 
                                        subj_position, 
                                        plugin, 
-                                       plugin_kws)
\ No newline at end of file
+                                       plugin_kws)
+
+    def save_nifti1image(self,
+                         path: Union[str, 'Path'],
+                         reco_id: Optional[int] = None,
+                         scale_mode: Optional[Literal['header', 'apply']] = None,
+                         subj_type: Optional[str] = None,
+                         subj_position: Optional[str] = None,
+                         compress: Optional[bool] = None,
+                         chunk_size: Optional[int] = None):
+        scale_mode = scale_mode or self.scale_mode
+        if reco_id:
+            self.set_scaninfo(reco_id)
+        return super().save_nifti1image(scanobj=self,
+                                        path=path,
+                                        reco_id=reco_id,
+                                        scale_mode=scale_mode,
+                                        subj_type=subj_type,
+                                        subj_position=subj_position,
+                                        compress=compress,
+                                        chunk_size=chunk_size)
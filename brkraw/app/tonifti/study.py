@@ -25,9 +25,15 @@ class StudyToNifti(Study, BaseMethods):
             pvscan = super().get_scan(scan_id).retrieve_pvobj()
             self._cache[scan_id] = ScanToNifti(pvobj=pvscan, 
                                                reco_id=reco_id, 
-                                               study_address=id(self))
+                                               study_address=self._address)
         return self._cache[scan_id]
     
+    def refresh(self):
+        changes = super().refresh()
+        if changes:
+            self._cache.clear()
+        return changes
+
     def get_scan_pvobj(self, scan_id: int, 
                        reco_id: Optional[int] = None):
         return super().get_scan(scan_id=scan_id, 
@@ -107,6 +113,45 @@ class StudyToNifti(Study, BaseMethods):
                                        subj_position=subj_position, 
                                        plugin=plugin, 
                                        plugin_kws=plugin_kws)
+
+
+    def save_nifti1image(self,
+                         scan_id: int,
+                         path: Union[str, 'Path'],
+                         reco_id: Optional[int] = None,
+                         scale_mode: Optional[Literal['header', 'apply']] = None,
+                         subj_type: Optional[str] = None,
+                         subj_position: Optional[str] = None,
+                         compress: Optional[bool] = None,
+                         chunk_size: Optional[int] = None):
+        scale_mode = scale_mode or self.scale_mode
+        scanobj = self.get_scan(scan_id=scan_id,
+                                reco_id=reco_id)
+        return super().save_nifti1image(scanobj=scanobj,
+                                        path=path,
+                                        reco_id=reco_id,
+                                        scale_mode=scale_mode,
+                                        subj_type=subj_type,
+                                        subj_position=subj_position,
+                                        compress=compress,
+                                        chunk_size=chunk_size)
+
+
+    def convert(self,
+                output_dir: Union[str, 'Path'],
+                jobs: int = 1,
+                scale_mode: Optional[Literal['header', 'apply']] = None,
+                subj_type: Optional[str] = None,
+                subj_position: Optional[str] = None,
+                compress: bool = True):
+        from .batch import convert_study
+        return convert_study(path=self.path,
+                             output_dir=output_dir,
+                             jobs=jobs,
+                             scale_mode=scale_mode or self.scale_mode,
+                             subj_type=subj_type,
+                             subj_position=subj_position,
+                             compress=compress)
         
     @property
     def info(self):
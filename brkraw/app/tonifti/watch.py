@@ -0,0 +1,375 @@
+"""Watches a folder for studies being acquired and converts their reconstructions to NIfTI-1 as they complete.
+
+The watcher polls the studies found in a root folder with `PvStudy.refresh`, so each cycle only lists the
+directories that changed. A reconstruction is considered complete once both its '2dseq' and 'visu_pars'
+files are present and the size and modification time of '2dseq' have been stable for a settling period.
+Complete reconstructions are put on a bounded queue and converted on a separate thread through
+`convert_task`, which writes the outputs atomically.
+
+The watcher keeps no state of its own on disk: a reconstruction whose output already exists is skipped,
+so the watcher can be restarted at any time without converting anything twice. On Linux, inotify is used
+to wake the watcher up as soon as files are created, closed after writing, moved or deleted; elsewhere, or
+if inotify is unavailable, it polls. Writes to a file that is still open do not wake the watcher up, so a
+'2dseq' or 'fid' streamed by the scanner does not make it poll continuously.
+
+Classes:
+    Watcher: Watches a root folder and converts complete reconstructions.
+"""
+
+from __future__ import annotations
+import os
+import re
+import glob
+import time
+import queue
+import select
+import ctypes
+import ctypes.util
+import warnings
+import threading
+from brkraw.api.pvobj import PvStudy
+from .batch import ConversionTask, ConversionResult, run_tasks, convert_task
+from typing import TYPE_CHECKING
+if TYPE_CHECKING:
+    from typing import Callable, Dict, List, Optional, Literal, Tuple
+    from pathlib import Path
+
+
+class Inotify:
+    """A minimal binding of inotify(7) through the C library, used to wake the watcher up on file events.
+
+    Raises:
+        OSError: If inotify is not available on this platform or the instance cannot be created.
+    """
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    mask: int = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+    def __init__(self):
+        libc_name = ctypes.util.find_library('c')
+        try:
+            self._libc = ctypes.CDLL(libc_name, use_errno=True)
+            init = self._libc.inotify_init1
+        except (OSError, AttributeError, TypeError) as e:
+            raise OSError('inotify is not available on this platform.') from e
+        self._fd = init(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+        self._watched = set()
+
+    def add(self, path: str):
+        """Watches a directory for created, moved and deleted entries, and files closed after writing.
+
+        Args:
+            path (str): The directory to watch. Directories already watched are ignored.
+
+        Raises:
+            OSError: If the watch cannot be added, e.g. when the limit of watches is reached.
+        """
+        if path in self._watched:
+            return
+        if self._libc.inotify_add_watch(self._fd, os.fsencode(path), self.mask) < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno), path)
+        self._watched.add(path)
+
+    def wait(self, timeout: float):
+        """Waits for events and discards them.
+
+        Args:
+            timeout (float): The maximum time to wait, in seconds.
+
+        Returns:
+            bool: True if any event was received before the timeout.
+        """
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return False
+        while True:
+            try:
+                if not os.read(self._fd, 65536):
+                    break
+            except BlockingIOError:
+                break
+        return True
+
+    def close(self):
+        """Closes the inotify instance."""
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+
+class Watcher:
+    """Watches a root folder for studies being acquired and converts their reconstructions as they complete.
+
+    Each study folder found in `root` (or `root` itself if it is a study folder) is converted into a folder
+    of the same name in `output_dir`, with outputs named 'scan-<scan_id>_reco-<reco_id>.nii.gz' as in
+    `convert_study`. Compressed studies are not watched.
+
+    Args:
+        root (Path): The folder the studies are written to.
+        output_dir (Path): The folder to write the NIfTI-1 files to.
+        interval (float): The maximum time between two polls, in seconds.
+        settle (float): The time the size of a '2dseq' file must be stable before it is converted, in seconds.
+        maxsize (int): The maximum number of reconstructions waiting for conversion. Complete reconstructions
+            are held back until the queue has room.
+        scale_mode (Optional[Literal['header', 'apply']]): Store the slope and offset in the header,
+            or apply them to the data.
+        subj_type (Optional[str]): Overrides the subject type.
+        subj_position (Optional[str]): Overrides the subject position.
+        compress (bool): Gzip the outputs.
+        use_inotify (bool): Use inotify to wake up on file events when available. Polls otherwise.
+        callback (Optional[Callable]): Called with the ConversionResult of each conversion, on the
+            conversion thread.
+
+    Attributes:
+        results (List[ConversionResult]): The results of the conversions run so far.
+        stale_age (float): Where the liveness of a process cannot be probed safely (i.e. not on POSIX), the
+            time after which the temporary files of another process are considered abandoned, in seconds.
+    """
+    stale_age: float = 24 * 3600.0
+
+    def __init__(self,
+                 root: Path,
+                 output_dir: Path,
+                 interval: float = 2.0,
+                 settle: float = 5.0,
+                 maxsize: int = 16,
+                 scale_mode: Optional[Literal['header', 'apply']] = None,
+                 subj_type: Optional[str] = None,
+                 subj_position: Optional[str] = None,
+                 compress: bool = True,
+                 use_inotify: bool = True,
+                 callback: Optional[Callable] = None):
+        self.root = os.path.abspath(root)
+        self.output_dir = os.path.abspath(output_dir)
+        self.interval = interval
+        self.settle = settle
+        self.options = dict(scale_mode=scale_mode, subj_type=subj_type,
+                            subj_position=subj_position, compress=compress)
+        self.callback = callback
+        self.results: List[ConversionResult] = []
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._studies: Dict[str, PvStudy] = {}
+        self._pending: Dict[Tuple, Tuple] = {}
+        self._enqueued = set()
+        self._done = set()
+        self._failed: Dict[Tuple, Tuple] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._inotify = None
+        if use_inotify:
+            try:
+                self._inotify = Inotify()
+                self._inotify.add(self.root)
+            except OSError as e:
+                warnings.warn(f"inotify is not available, polling every {interval}s instead: {e}")
+                self._close_inotify()
+
+    @property
+    def queued(self):
+        """int: The number of reconstructions waiting for conversion."""
+        return self._queue.qsize()
+
+    def _close_inotify(self):
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
+
+    def _watch(self, path: str):
+        if self._inotify is None:
+            return
+        try:
+            self._inotify.add(path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            warnings.warn(f"Failed to watch '{path}', polling every {self.interval}s instead: {e}")
+            self._close_inotify()
+
+    def _discover(self):
+        """Opens the study folders that appeared in the root folder and refreshes the known ones."""
+        candidates = [self.root] if os.path.isfile(os.path.join(self.root, 'subject')) else \
+            [entry.path for entry in os.scandir(self.root)
+             if entry.is_dir() and os.path.isfile(os.path.join(entry.path, 'subject'))]
+        for path in candidates:
+            if path not in self._studies:
+                try:
+                    self._studies[path] = PvStudy(path)
+                except (OSError, ValueError) as e:
+                    warnings.warn(f"Failed to open the study '{path}', retrying on the next poll: {e}")
+                    continue
+                self._clean_temporary(self._get_output_dir(path))
+            else:
+                self._studies[path].refresh()
+        for path in set(self._studies) - set(candidates):
+            self._studies.pop(path).close()
+
+    def _get_output_dir(self, study_path: str):
+        return os.path.join(self.output_dir, os.path.basename(study_path))
+
+    @classmethod
+    def _clean_temporary(cls, dirname: str):
+        """Removes the temporary files left by the conversions of a process that no longer runs."""
+        if not os.path.isdir(dirname):
+            return
+        for filename in os.listdir(dirname):
+            if (matched := re.match(r'^\..+\.(\d+)\.tmp', filename)) and int(matched.group(1)) != os.getpid():
+                path = os.path.join(dirname, filename)
+                if cls._is_abandoned(path, int(matched.group(1))):
+                    try:
+                        os.remove(path)
+                    except FileNotFoundError:
+                        pass
+
+    @classmethod
+    def _is_abandoned(cls, path: str, pid: int):
+        """Returns True if the temporary file of another process can be removed.
+
+        On POSIX, the file is abandoned if no process `pid` runs. Elsewhere `os.kill` would terminate the
+        process instead of probing it, so the file is abandoned once it has not been written for `stale_age`.
+        """
+        if os.name == 'posix':
+            try:
+                os.kill(pid, 0)
+            except ProcessLookupError:
+                return True
+            except OSError:
+                pass
+            return False
+        try:
+            return time.time() - os.stat(path).st_mtime > cls.stale_age
+        except FileNotFoundError:
+            return False
+
+    @staticmethod
+    def _is_converted(output: str):
+        """Returns True if the outputs of a task exist, including the per slice pack outputs."""
+        return bool(glob.glob(glob.escape(output) + '.nii*') or glob.glob(glob.escape(output) + '-[0-9]*.nii*'))
+
+    def _get_state(self, study_path: str, scan_id: int, reco_id: int):
+        """Returns the size and modification time of the '2dseq' of a complete-looking reconstruction.
+
+        Returns:
+            tuple or None: The state of '2dseq', or None if '2dseq' or 'visu_pars' is missing or empty.
+        """
+        recoobj = self._studies[study_path].get_scan(scan_id).get_reco(reco_id)
+        files = recoobj.contents['files'] if recoobj.contents else []
+        if '2dseq' not in files or 'visu_pars' not in files:
+            return None
+        try:
+            stat = os.stat(os.path.join(study_path, str(scan_id), 'pdata', str(reco_id), '2dseq'))
+        except FileNotFoundError:
+            return None
+        return (stat.st_size, stat.st_mtime_ns) if stat.st_size else None
+
+    def poll(self):
+        """Runs one watch cycle: refreshes the studies and enqueues the reconstructions that completed.
+
+        Returns:
+            int: The number of reconstructions enqueued.
+        """
+        self._discover()
+        now = time.monotonic()
+        enqueued = 0
+        for study_path, study in self._studies.items():
+            self._watch(study_path)
+            for scan_id in study.avail:
+                scan_path = os.path.join(study_path, str(scan_id))
+                self._watch(scan_path)
+                if os.path.isdir(pdata_path := os.path.join(scan_path, 'pdata')):
+                    self._watch(pdata_path)
+                for reco_id in study.get_scan(scan_id).avail:
+                    key = (study_path, scan_id, reco_id)
+                    with self._lock:
+                        if key in self._done or key in self._enqueued:
+                            continue
+                    self._watch(os.path.join(pdata_path, str(reco_id)))
+                    output = os.path.join(self._get_output_dir(study_path), f'scan-{scan_id:02d}_reco-{reco_id:02d}')
+                    if self._is_converted(output):
+                        with self._lock:
+                            self._done.add(key)
+                        continue
+                    if (state := self._get_state(study_path, scan_id, reco_id)) is None:
+                        continue
+                    if self._failed.get(key) == state:
+                        continue
+                    if (pending := self._pending.get(key)) is None or pending[0] != state:
+                        self._pending[key] = (state, now)
+                        continue
+                    if now - pending[1] < self.settle:
+                        continue
+                    task = ConversionTask(path=study_path, scan_id=scan_id, reco_id=reco_id,
+                                          output=output, **self.options)
+                    os.makedirs(os.path.dirname(output), exist_ok=True)
+                    try:
+                        self._queue.put_nowait((key, state, task))
+                    except queue.Full:
+                        return enqueued
+                    with self._lock:
+                        self._enqueued.add(key)
+                    del self._pending[key]
+                    enqueued += 1
+        return enqueued
+
+    def _convert(self):
+        """Converts the queued reconstructions until the sentinel is received."""
+        while (item := self._queue.get()) is not None:
+            key, state, task = item
+            result = run_tasks(convert_task, [task])[0]
+            with self._lock:
+                self._enqueued.discard(key)
+                if result.ok:
+                    self._done.add(key)
+                else:
+                    self._failed[key] = state
+                self.results.append(result)
+            if self.callback is not None:
+                self.callback(result)
+            self._queue.task_done()
+        self._queue.task_done()
+
+    def start(self):
+        """Starts the conversion thread."""
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._convert, name='brkraw-watch', daemon=True)
+            self._thread.start()
+
+    def join(self):
+        """Blocks until every queued reconstruction has been converted."""
+        self._queue.join()
+
+    def wait(self):
+        """Waits for the next filesystem event, or for `interval` seconds when polling."""
+        if self._inotify is not None:
+            self._inotify.wait(self.interval)
+        else:
+            self._stop.wait(self.interval)
+
+    def run(self):
+        """Watches the root folder until `stop` is called or the process is interrupted."""
+        self.start()
+        try:
+            while not self._stop.is_set():
+                self.poll()
+                self.wait()
+        finally:
+            self.stop()
+
+    def stop(self):
+        """Stops watching, after the queued reconstructions have been converted, and closes the studies."""
+        self._stop.set()
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+        for study in self._studies.values():
+            study.close()
+        self._studies.clear()
+        self._close_inotify()
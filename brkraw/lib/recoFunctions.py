@@ -5,74 +5,143 @@
  in recon.py
 """
 
+import os
 import numpy as np
 import warnings
     
-def phase_rotate(frame, RECO_rotate, framenumber):
-    
+def phase_ramps(shape, RECO_rotate, framenumber):
+    """ Separable k-space phase ramps of the RECO_rotate shift of a frame
+
+    Returns
+    -------
+    ramps : list of np.array, one per shifted axis, shaped to broadcast over [kx,ky,kz]
+    """
     if RECO_rotate.shape[1] > framenumber:
-        RECO_rotate =  RECO_rotate[:, framenumber]
-        RECO_rotate -= 0.5
+        RECO_rotate =  RECO_rotate[:, framenumber] - 0.5
     else:
         RECO_rotate =  RECO_rotate[:,0]
-    
-    # calculate additional variables
-    dims = [frame.shape[0], frame.shape[1], frame.shape[2]]
 
-    # Create Shift matrix in KSPACE
-    phase_matrix = np.ones(shape=dims,dtype=complex)
+    ramps = []
     for index in range(len(RECO_rotate)):
-        f = np.arange(dims[index])
+        f = np.arange(shape[index])
         phase_vector = np.exp(1j*2*np.pi*(1-RECO_rotate[index])*f)
-        if index == 0:
-            phase_matrix *= np.tile(phase_vector[:,np.newaxis,np.newaxis], [1, dims[1], dims[2]])
-        elif index == 1:
-            phase_matrix *= np.tile(phase_vector[np.newaxis,:,np.newaxis], [dims[0], 1, dims[2]])
-        elif index == 2:
-            tmp = np.zeros((1,1,dims[2]), dtype=complex)
-            tmp[0,0,:] = phase_vector
-            phase_matrix *= np.tile(tmp, [dims[0], dims[1], 1])
-    
+        ramps.append(phase_vector.reshape([-1 if i == index else 1 for i in range(3)]))
+    return ramps
+
+def phase_rotate(frame, RECO_rotate, framenumber):
+    # Create Shift matrix in KSPACE [kx,ky,kz] of the frame by broadcasting the ramps of each axis
+    phase_matrix = np.ones(shape=frame.shape[:3], dtype=complex)
+    for ramp in phase_ramps(frame.shape[:3], RECO_rotate, framenumber):
+        phase_matrix = phase_matrix * ramp
     return phase_matrix
 
+def zero_filling_slices(shape, RECO_ft_size, signal_position=np.array([0.5,0.5,0.5])):
+    """ Position of a frame of the given shape in its zero filled frame
+
+    Returns
+    -------
+    slices : tuple of slice, indexing [kx,ky,kz] of the zero filled frame, or None if no zero filling is needed
+    """
+    # Check if Reco.RECO_ft_size is not equal to size(frame)
+    if not any([(i != j) for i,j in zip(shape,RECO_ft_size)]):
+        return None
+    if any(signal_position > 1) or any(signal_position < 0):
+        warnings.warn('Signal needs to be between 0 and 1\nDefaulting to 0.5')
+        signal_position=np.array([0.5,0.5,0.5])
+
+    pos_ges = [slice(None)] * 3
+    for i in range(len(RECO_ft_size)):
+        diff = RECO_ft_size[i] - shape[i] + 1
+        startpos = int(np.floor(diff * signal_position[i] + 1))
+        if startpos > RECO_ft_size[i]:
+            startpos = RECO_ft_size[i]
+        pos_ges[i] = slice(startpos - 1, startpos - 1 + shape[i])
+    return tuple(pos_ges)
+
 # Replace with zero padding
 def zero_filling(frame, RECO_ft_size, signal_position=np.array([0.5,0.5,0.5])):
-    # Check if Reco.RECO_ft_size is not equal to size(frame)
-    not_Equal = any([(i != j) for i,j in zip(frame.shape,RECO_ft_size)])
-    if not_Equal:
-        if any(signal_position > 1) or any(signal_position < 0):
-            warnings.warn('Signal needs to be between 0 and 1\nDefaulting to 0.5')
-            signal_position=np.array([0.5,0.5,0.5])
-
-        # calculate additional variables
-        dims = (frame.shape[0], frame.shape[1], frame.shape[2])
-
-        # start process
-        newframe = np.zeros(RECO_ft_size, dtype=complex)
-        startpos = np.zeros(len(RECO_ft_size), dtype=int)
-        pos_ges = [None] * 3
-
-        for i in range(len(RECO_ft_size)):
-            diff = RECO_ft_size[i] - frame.shape[i] + 1
-            startpos[i] = int(np.floor(diff * signal_position[i] + 1))
-            if startpos[i] > RECO_ft_size[i]:
-                startpos[i] = RECO_ft_size[i]
-            pos_ges[i] = slice(startpos[i] - 1, startpos[i] - 1 + dims[i])
-        
-        newframe[pos_ges[0], pos_ges[1], pos_ges[2]] = frame
-        del startpos, pos_ges
+    """ Zero fills the [kx,ky,kz] axes of a frame, or of all frames [kx,ky,kz,...] at once
 
-    else:
-        newframe = frame
+    Returns
+    -------
+    newframe : np.array [RECO_ft_size,...], or frame itself if it already has the size RECO_ft_size
+    """
+    pos_ges = zero_filling_slices(frame.shape[:3], RECO_ft_size, signal_position)
+    if pos_ges is None:
+        return frame
+    ft_size = list(frame.shape[:3])
+    ft_size[:len(RECO_ft_size)] = RECO_ft_size
+    newframe = np.zeros(ft_size + list(frame.shape[3:]), dtype=complex)
+    newframe[pos_ges] = frame
     return newframe
 
 
 def phase_corr(frame):
-    checkerboard = np.ones(shape=frame.shape[:3])
-    # Use NumPy broadcasting to alternate the signs
-    checkerboard[::2,::2,::2] = -1
-    checkerboard[1::2,1::2,::2] = -1
-    checkerboard[::2,1::2,1::2] = -1
-    checkerboard[1::2,::2,1::2] = -1
-    checkerboard *= -1
-    return checkerboard
\ No newline at end of file
+    # Checkerboard (-1)**(x+y+z) over [kx,ky,kz], built from the separable sign of each axis
+    signs = [1 - 2 * (np.arange(n) % 2) for n in frame.shape[:3]]
+    checkerboard = signs[0][:,np.newaxis,np.newaxis] * signs[1][np.newaxis,:,np.newaxis] * signs[2][np.newaxis,np.newaxis,:]
+    return checkerboard.astype(float)
+
+
+FFT_BACKENDS = ('numpy', 'scipy', 'pyfftw')
+
+def get_fft_backend(backend=None):
+    """ Checks that an FFT backend is installed
+
+    Parameters
+    ----------
+    backend : 'numpy', 'scipy' or 'pyfftw', defaults to 'numpy'
+
+    Returns
+    -------
+    backend : str
+    """
+    backend = backend or 'numpy'
+    if backend not in FFT_BACKENDS:
+        raise ValueError(f"Unknown FFT backend '{backend}', expected one of {', '.join(FFT_BACKENDS)}")
+    if backend == 'scipy':
+        try:
+            import scipy.fft
+        except ModuleNotFoundError:
+            raise ModuleNotFoundError("The FFT backend 'scipy' requires scipy>=1.4 (optional requirement).")
+    elif backend == 'pyfftw':
+        try:
+            import pyfftw
+        except ModuleNotFoundError:
+            raise ModuleNotFoundError("The FFT backend 'pyfftw' requires pyFFTW (optional requirement).")
+    return backend
+
+def available_fft_backends():
+    """ Names of the FFT backends that are installed """
+    available = []
+    for backend in FFT_BACKENDS:
+        try:
+            available.append(get_fft_backend(backend))
+        except ModuleNotFoundError:
+            pass
+    return available
+
+def ifftn(data, axes=(0,1,2), backend=None, workers=None, overwrite=False):
+    """ Inverse FFT over the given axes, normalized as np.fft.ifftn
+
+    Parameters
+    ----------
+    backend : 'numpy' (single-threaded), 'scipy' or 'pyfftw', defaults to 'numpy'
+    workers : number of threads of the scipy and pyfftw backends, -1 for all cores
+    overwrite : allow the scipy and pyfftw backends to reuse the memory of data for the output
+
+    Returns
+    -------
+    data : np.array, complex
+    """
+    backend = get_fft_backend(backend)
+    if backend == 'scipy':
+        import scipy.fft
+        return scipy.fft.ifftn(data, axes=axes, workers=workers, overwrite_x=overwrite)
+    elif backend == 'pyfftw':
+        import pyfftw
+        threads = os.cpu_count() if workers is not None and workers < 0 else (workers or 1)
+        plan = pyfftw.builders.ifftn(data, axes=axes, threads=threads, overwrite_input=overwrite,
+                                     planner_effort='FFTW_ESTIMATE')
+        return plan()
+    return np.fft.ifftn(data, axes=axes)
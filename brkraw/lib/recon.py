@@ -16,9 +16,11 @@ Created on Sat Jan  20 10:06:38 2024
 # NEED to test compress sense for RARE
 """
 
-from .recoFunctions import phase_rotate, phase_corr, zero_filling
+from .recoFunctions import phase_ramps, phase_corr, zero_filling, ifftn
 from ..api.data import Scan
+from io import BufferedReader
 import numpy as np
+import os
 import warnings
 
 SUPPORTED_PROTOCOLS = ['rare','localizer' ,'gre', 'msme',      
@@ -38,7 +40,24 @@ def reconstruction(scanobj,process='image', **kwargs):
         return recoObj.sort_fid()
     elif process == 'kspace':
         return recoObj.process_kspace()
-    return recoObj.reconstruct(rms=kwargs['rms'] if 'rms' in kwargs.keys() else True) 
+    return recoObj.reconstruct(rms=kwargs['rms'] if 'rms' in kwargs.keys() else True,
+                               fft_backend=kwargs.get('fft_backend'),
+                               fft_workers=kwargs.get('fft_workers'))
+
+def iter_reconstruction(scanobj, process='image', **kwargs):
+    """ Generator counterpart of reconstruction, yielding one repetition (NR) at a time,
+    see Reconstruction.iter_reconstruct
+    """
+    acqp = scanobj.pvobj.acqp
+    ACQ_dim_desc = [acqp.get('ACQ_dim_desc')] if isinstance(acqp.get('ACQ_dim_desc'), str) else acqp.get('ACQ_dim_desc')
+    if 'Spectroscopic' in ACQ_dim_desc:
+        warnings.warn('Scan is spectroscopic')
+        process = 'readout'
+    recoObj = Reconstruction(scanobj)
+    yield from recoObj.iter_reconstruct(process=process,
+                                        rms=kwargs.get('rms', True),
+                                        fft_backend=kwargs.get('fft_backend'),
+                                        fft_workers=kwargs.get('fft_workers'))
 
 class Reconstruction:
     def __init__(self, scanobj:'Scan', reco_id:'int'=1) -> None:
@@ -46,6 +65,7 @@ class Reconstruction:
         self.acqp       = pvscan.acqp
         self.method     = pvscan.method
         self.fid        = pvscan.get_fid()
+        self.fid_size   = self._get_fid_size(pvscan)
         self.CS         = True if self.method.get('PVM_EncCS')=='Yes' else False
         self.NI         = self.acqp['NI']
         self.NR         = self.acqp['NR']
@@ -55,14 +75,26 @@ class Reconstruction:
         self.protocol   = self.info.protocol
         self.reco       = pvscan.get_reco(self.reco_id).reco        
         self.supported_protocol = any([True for i in SUPPORTED_PROTOCOLS if i in self.protocol['protocol_name'].lower()])
+
+    @staticmethod
+    def _get_fid_size(pvscan):
+        # Size in bytes of the file returned by get_fid, from the contents of the scan
+        files, file_sizes = pvscan.contents['files'], pvscan.contents['file_sizes']
+        for fid in ['fid', 'rawdata.job0']:
+            if fid in files:
+                return file_sizes[files.index(fid)]
     
     # 1) Convert Buffer to a np array
-    def sort_fid(self):
-        """ Sorts FID into a 3D np matrix [num_readouts, channel, scan_size]
+    def _get_fid_layout(self):
+        """ Data type and line layout of the FID, sets the number of receivers NRecs
 
         Returns
         -------
-        X : np.array [num_lines, channel, scan_size]
+        DT_CODE : np.dtype of the interleaved real and imaginary values
+        blocksize : number of values of a line in the file, including the KBlock padding
+        linesize : number of values of a line [channel, scan_size] to keep
+        scanSize : number of values of a readout of a channel
+        num_lines : number of lines of the FID, a multiple of NR
         """
         # META DATA
         dt_code = 'int32'
@@ -79,14 +111,12 @@ class Reconstruction:
         elif BYTORDA == 'big':
             DT_CODE = DT_CODE.newbyteorder('>')
 
-        # Get FID FROM buffer
-        fid = np.frombuffer(self.fid.read(), DT_CODE)
-        # Check Version and Sort fid data
+        # Check Version and line layout
         if '360' in self.protocol['sw_version']:
             # METAdata for 360
             self.NRecs = self.acqp['ACQ_ReceiverSelectPerChan'].count('Yes')
             scanSize = self.acqp['ACQ_jobs'][0][0]
-            X = fid[::2] + 1j*fid[1::2]
+            blocksize = scanSize//2*2*self.NRecs
 
         else:
             # METAdata Versions Before 360        
@@ -99,30 +129,91 @@ class Reconstruction:
                 blocksize = int(ACQ_size[0]*self.NRecs)
 
             # CHECK SIZE
-            if fid.size != blocksize*np.prod(ACQ_size[1:])*self.NI*self.NR:
+            if self.fid_size // DT_CODE.itemsize != blocksize*np.prod(ACQ_size[1:])*self.NI*self.NR:
                 raise ValueError('Error FID size dont match')
 
-            # Convert to Complex
-            X = fid[::2] + 1j*fid[1::2] 
-            X = X.reshape([-1,blocksize//2])
-    
-            # Reshape Matrix [num_lines, channel, scan_size]
-            if blocksize != scanSize*self.NRecs:
-                X = X[:,:scanSize//2*self.NRecs]
+        # CHECK the FID holds whole lines, evenly split into the NR repetitions
+        num_lines = self.fid_size // (blocksize*DT_CODE.itemsize)
+        if self.fid_size != num_lines*blocksize*DT_CODE.itemsize or num_lines % self.NR:
+            raise ValueError(f'Error FID size dont match: {self.fid_size} bytes is not a whole number of '
+                             f'{blocksize*DT_CODE.itemsize} byte lines for each of the {self.NR} repetitions')
+
+        return DT_CODE, blocksize, scanSize//2*2*self.NRecs, scanSize, num_lines
+
+    def _read_fid_lines(self, start, count, DT_CODE, blocksize):
+        """ Reads lines of the FID, memory-mapped if the FID is a plain file
+
+        Returns
+        -------
+        lines : read-only np.array [count, blocksize]
+        """
+        offset = start*blocksize*DT_CODE.itemsize
+        if isinstance(self.fid, BufferedReader) and os.path.isfile(self.fid.name):
+            return np.memmap(self.fid.name, dtype=DT_CODE, mode='r', offset=offset, shape=(count, blocksize))
+        self.fid.seek(offset)
+        data = self.fid.read(count*blocksize*DT_CODE.itemsize)
+        return np.frombuffer(data, DT_CODE, count=count*blocksize).reshape(count, blocksize)
+
+    @staticmethod
+    def _to_complex(values, out=None, dtype=complex):
+        """ Converts interleaved real and imaginary values [..., 2*n] to complex [..., n]
+        without intermediate arrays, into out if given
+        """
+        if out is None:
+            out = np.empty(values.shape[:-1] + (values.shape[-1]//2,), dtype=dtype)
+        out.real = values[..., 0::2]
+        out.imag = values[..., 1::2]
+        return out
+
+    def iter_fid(self, dtype=complex):
+        """ Yields the FID one repetition (NR) at a time, reading only that repetition
+
+        Parameters
+        ----------
+        dtype : complex type of the output, complex64 halves the memory of the output
+
+        Yields
+        ------
+        X : np.array [num_lines/NR, channel, scan_size]
+        """
+        DT_CODE, blocksize, linesize, scanSize, num_lines = self._get_fid_layout()
+        lines_per_rep = num_lines // self.NR
+        for NR in range(self.NR):
+            lines = self._read_fid_lines(NR*lines_per_rep, lines_per_rep, DT_CODE, blocksize)
+            yield self._to_complex(lines[:, :linesize], dtype=dtype).reshape((-1, self.NRecs, scanSize//2))
+
+    def sort_fid(self, dtype=complex):
+        """ Sorts FID into a 3D np matrix [num_readouts, channel, scan_size]
+
+        The FID is read one repetition at a time into a single preallocated complex array,
+        stripping the KBlock padding of each line
+
+        Returns
+        -------
+        X : np.array [num_lines, channel, scan_size]
+        """
+        DT_CODE, blocksize, linesize, scanSize, num_lines = self._get_fid_layout()
+        lines_per_rep = num_lines // self.NR
+        X = np.empty((num_lines, linesize//2), dtype=dtype)
+        for NR in range(self.NR):
+            lines = self._read_fid_lines(NR*lines_per_rep, lines_per_rep, DT_CODE, blocksize)
+            self._to_complex(lines[:, :linesize], out=X[NR*lines_per_rep:(NR+1)*lines_per_rep])
         
         # [num_lines, channel, scan_size]
-        X = X.reshape((-1, self.NRecs, scanSize//2))  
-        
-        return X
+        return X.reshape((-1, self.NRecs, scanSize//2))
     
     # 2) Convert to KSPACE
-    def sort_kspace(self, fid = None):
+    def sort_kspace(self, fid = None, NR = None):
         """
         FID    = [num_lines, channel, scan_size]
         KSPACE = [kx,ky,kz,NRec,NI,NR]
+
+        NR is the number of repetitions in fid, all of them (self.NR) by default
         """
-        if fid == None:
+        if fid is None:
             fid = self.sort_fid()
+        if NR is None:
+            NR = self.NR
         if not self.supported_protocol:   
             warnings.warn("SEQUENCE PROTOCOL {} NOT SUPPORTED YET...\nreturning readout sorted".format(self.acqp.get('ACQ_scan_name' )))
             return fid
@@ -156,70 +247,123 @@ class Reconstruction:
             Nreadout = int(kSize[0])
         readStart = int(kSize[0]-Nreadout)
 
-        assert np.prod(fid.shape) == (Nreadout*NPE*self.NI*self.NRecs*self.NR), 'Method calculated size does not match size of fid'
+        assert np.prod(fid.shape) == (Nreadout*NPE*self.NI*self.NRecs*NR), 'Method calculated size does not match size of fid'
         
-        temp = np.zeros([int(kSize[0]), int(kSize[1]),int(kSize[2]) if dims == 3 else 1, self.NRecs, self.NI, self.NR], dtype=complex)
+        kspace = np.zeros([int(kSize[0]), int(kSize[1]),int(kSize[2]) if dims == 3 else 1, self.NRecs, self.NI, NR], dtype=complex)
+        # View of KSPACE as [kx,NI,ky,kz,NRec,NR], so that the lines are scattered to their object position
+        # [obj_order] and phase encoding steps with a single fancy-indexed assignment
+        target = np.moveaxis(kspace, 4, 1)
+        obj_index = np.asarray(obj_order, dtype=int)[:, np.newaxis]
         if self.CS:
             warnings.warn('Compressed Sensing has only been tested on undersampled GRE sequences')
-            phase_index1 = (self.method.get('PVM_EncGenSteps1') + center[1]).astype(int)
-            phase_index2 = (self.method.get('PVM_EncGenSteps2') + center[2]).astype(int)
-            fid = fid.reshape((self.NR,NPE,self.NI,self.NRecs,Nreadout)).transpose(4,1,3,2,0)
-            for index, (i,j) in enumerate(zip(phase_index1,phase_index2)):
-                temp[readStart:,i,j,:,:,:] = fid[:,index,:,:,:]
-            fid = np.zeros_like(temp)
-            fid[:,:,:,:,obj_order,:] = temp
+            phase_index1 = (np.asarray(self.method.get('PVM_EncGenSteps1')) + center[1]).astype(int)
+            phase_index2 = (np.asarray(self.method.get('PVM_EncGenSteps2')) + center[2]).astype(int)
+            # [Nreadout,NI,NPE,NRec,NR]
+            fid = fid.reshape((NR,NPE,self.NI,self.NRecs,Nreadout)).transpose(4,2,1,3,0)
+            # Steps acquired more than once keep their last acquisition
+            steps = np.ravel_multi_index((phase_index1, phase_index2), kspace.shape[1:3])
+            _, last = np.unique(steps[::-1], return_index=True)
+            last = len(steps) - 1 - last
+            target[readStart:, obj_index, phase_index1[last], phase_index2[last]] = fid[:, :, last]
         else:
-            fid = fid.reshape((self.NR,-1,self.NI,phase_factor,self.NRecs,Nreadout)).transpose(0,2,4,1,3,5)
-            fid = fid.reshape((self.NR,self.NI,self.NRecs,NPE,Nreadout)).transpose((4,3,2,1,0))
-            fid = fid.reshape(Nreadout, int(EncMatrix[1]), int(EncMatrix[2]) if dims == 3 else 1, self.NRecs, self.NI, self.NR, order = 'F')
-            temp[readStart:,phase_encode1,:,:,:,:] = fid[:,:,phase_encode2,:,:,:]
-            fid = np.zeros_like(temp)
-            fid[:,:,:,:,obj_order,:] = temp
+            fid = fid.reshape((NR,-1,self.NI,phase_factor,self.NRecs,Nreadout)).transpose(0,2,4,1,3,5)
+            fid = fid.reshape((NR,self.NI,self.NRecs,NPE,Nreadout)).transpose((4,3,2,1,0))
+            fid = fid.reshape(Nreadout, int(EncMatrix[1]), int(EncMatrix[2]) if dims == 3 else 1, self.NRecs, self.NI, NR, order = 'F')
+            # [Nreadout,NI,EncMatrix[1],kz,NRec,NR]
+            fid = np.moveaxis(fid[:,:,phase_encode2,:,:,:], 4, 1)
+            target[readStart:, obj_index, np.asarray(phase_encode1)[np.newaxis, :]] = fid
+        fid = kspace
 
         if self.method.get('EchoAcqMode') == 'allEchoes':
             fid[:,:,:,:,1::2,:] = fid[::-1,:,:,:,1::2,:]
         
         return fid
     
-    def process_kspace(self):
-        kspace = self.sort_kspace()  
+    def process_kspace(self, kspace=None, first_rep=0):
+        """ Phase rotation and zero filling of the KSPACE [kx,ky,kz,NRec,NI,NR]
+
+        Parameters
+        ----------
+        kspace : sorted KSPACE, processed in place, sort_kspace() by default
+        first_rep : repetition of the first NR of kspace, selecting the RECO_rotate frames
+        """
+        if kspace is None:
+            kspace = self.sort_kspace()
         if len(kspace.shape) != 6:
             return kspace
-        # Shift Object
-        map_index= np.reshape(np.arange(0,kspace.shape[4]*kspace.shape[5]), (kspace.shape[5], kspace.shape[4]) ).flatten()
-        for NR in range(self.NR):
-            for NI in range(self.NI):
-                kspace[:,:,:,:,NI,NR] *= np.tile(phase_rotate(kspace[:,:,:,:,NI,NR], 
-                                                              self.reco.get('RECO_rotate'),
-                                                              map_index[(NI+1)*(NR+1)-1])[:,:,:,np.newaxis],
-                                                 [1,1,1,self.NRecs])
-        
-        # Zeropad KSPACE 
-        RECO_ft_size = self.reco.get('RECO_ft_size')
-        newdata_dims=[1, 1, 1]
-        newdata_dims[0:len(RECO_ft_size)] = RECO_ft_size
-        newdata = np.zeros(shape=newdata_dims+[self.NRecs, self.NI, self.NR], dtype=complex)
-        for NR in range(self.NR):
-            for NI in range(self.NI):
-                for chan in range(self.NRecs):
-                    newdata[:,:,:,chan,NI,NR] = zero_filling(kspace[:,:,:,chan,NI,NR], RECO_ft_size).reshape(newdata[:,:,:,chan,NI,NR].shape)
+        # Shift Object, in place, by the separable phase ramps of each (NI, NR) frame, one axis at a time
+        for NR in range(kspace.shape[5]):
+            for NI in range(kspace.shape[4]):
+                frame = kspace[:,:,:,:,NI,NR]
+                for ramp in phase_ramps(kspace.shape[:3], self.reco.get('RECO_rotate'),
+                                        (NI+1)*(first_rep+NR+1)-1):
+                    frame *= ramp[:,:,:,np.newaxis]
 
-        return newdata 
+        # Zeropad KSPACE, all channels and frames at once
+        return zero_filling(kspace, self.reco.get('RECO_ft_size'))
      
     # 4) CONVERT TO IMAGE SPACE if FULLY SAMPLED CARTESIAN
-    def reconstruct(self, kspace=None, rms=True):
-        if kspace == None:
+    def reconstruct(self, kspace=None, rms=True, fft_backend=None, fft_workers=None):
+        """ Inverse FFT of the zero filled KSPACE [kx,ky,kz,NRec,NI,NR]
+
+        Parameters
+        ----------
+        fft_backend : 'numpy', 'scipy' or 'pyfftw', see recoFunctions.ifftn
+        fft_workers : number of FFT threads of the scipy and pyfftw backends, -1 for all cores
+        """
+        owned = kspace is None
+        if kspace is None:
             kspace = self.process_kspace()
         if len(kspace.shape) != 6:
             return kspace # sorted fid
         if self.CS:
             return kspace # zero padded kspace
         
-        # Always FT and correct Phase
-        image = np.fft.fftshift(np.fft.ifftn(kspace, axes=(0,1,2)), axes=(0,1,2))
-        image *= np.tile(phase_corr(image)[:,:,:,np.newaxis,np.newaxis,np.newaxis],
-                                          [1,1,1,self.NRecs,self.NI,self.NR])
+        # Always FT and correct Phase, the kspace computed here is overwritten by the FFT when possible
+        return self._to_image(kspace, rms, fft_backend, fft_workers, overwrite=owned)
+
+    @staticmethod
+    def _to_image(kspace, rms, fft_backend, fft_workers, overwrite):
+        image = np.fft.fftshift(ifftn(kspace, axes=(0,1,2), backend=fft_backend, workers=fft_workers,
+                                      overwrite=overwrite), axes=(0,1,2))
+        image *= phase_corr(image)[:,:,:,np.newaxis,np.newaxis,np.newaxis]
         if rms:
             image = np.sqrt(np.mean(np.square(np.abs(image)), axis=3))
         return image
-    
\ No newline at end of file
+
+    def iter_reconstruct(self, process='image', rms=True, fft_backend=None, fft_workers=None):
+        """ Yields the reconstruction one repetition (NR) at a time
+
+        Each repetition is read, sorted, phase rotated, zero filled and transformed on its own,
+        so the memory used does not grow with NR. The outputs keep a trailing NR axis of size 1,
+        concatenating them along the last axis gives the output of sort_kspace, process_kspace
+        or reconstruct, so that they can be written out as they come, e.g. as slabs of a NIfTI file.
+
+        Parameters
+        ----------
+        process : 'readout', 'kspace' or 'image', the last step applied to each repetition
+        rms, fft_backend, fft_workers : see reconstruct
+
+        Yields
+        ------
+        X : np.array [num_lines/NR, channel, scan_size] if 'readout' or the protocol is not supported,
+            zero filled KSPACE [kx,ky,kz,NRec,NI,1] if 'kspace' or compressed sensing,
+            image [x,y,z,NI,1], or [x,y,z,NRec,NI,1] without rms, otherwise
+        """
+        for NR, fid in enumerate(self.iter_fid()):
+            if process == 'readout':
+                yield fid
+                continue
+            with warnings.catch_warnings():
+                # warn once for the whole series, not once per repetition
+                if NR:
+                    warnings.simplefilter('ignore')
+                kspace = self.sort_kspace(fid, NR=1)
+            if len(kspace.shape) != 6:
+                yield kspace # sorted fid
+                continue
+            kspace = self.process_kspace(kspace, first_rep=NR)
+            if process == 'kspace' or self.CS:
+                yield kspace # zero padded kspace
+                continue
+            yield self._to_image(kspace, rms, fft_backend, fft_workers, overwrite=True)
@@ -6,6 +6,7 @@ from ..lib.utils import set_rescale, save_meta_files, mkdir
 import argparse
 import os, re
 import sys
+from collections import namedtuple
 
 _supporting_bids_ver = '1.2.2'
 
@@ -39,6 +40,8 @@ def main():
                                                             "for guiding BIDS data converting.")
     bids_convert = subparsers.add_parser("bids_convert", help="Convert ALL raw Bruker data located "
                                                               "in the input directory based on the BIDS datasheet")
+    watch = subparsers.add_parser("watch", help="Watch a directory where raw Bruker data are being acquired "
+                                                "and convert each scan into NifTi file(s) as soon as it completes")
 
     # Adding arguments for each parser
     # gui
@@ -79,6 +82,25 @@ def main():
     niiall.add_argument("--ignore-offset", help='remove offset value from header', action='store_true')
     niiall.add_argument("--ignore-rescale", help='remove slope and offset values from header', action='store_true')
     niiall.add_argument("--ignore-localizer", help='ignore the scan if it is localizer', action='store_true')
+    niiall.add_argument("-j", "--jobs", help="number of worker processes converting scans in parallel (default: 1)",
+                        type=int, default=1)
+
+    # watch
+    watch.add_argument("input", help="input directory where raw Bruker data are written (or a single raw data)", type=str)
+    watch.add_argument("output", help=output_dir_str, type=str)
+    watch.add_argument("-i", "--interval", help="maximum time between two checks of the input directory in seconds (default: 2)",
+                       type=float, default=2.0)
+    watch.add_argument("-s", "--settle", help="time the size of a 2dseq file must be stable "
+                                              "before it is converted in seconds (default: 5)",
+                       type=float, default=5.0)
+    watch.add_argument("-q", "--queue-size", help="maximum number of scans waiting for conversion (default: 16)",
+                       type=int, default=16)
+    watch.add_argument("--polling", help="poll the input directory instead of using inotify", action='store_true')
+    watch.add_argument("-t", "--subjecttype", help="override subject type in case the original setting was not properly set." + \
+                     "available options are (Biped, Quadruped, Phantom, Other, OtherAnimal)", type=str, default=None)
+    watch.add_argument("-p", "--position", help="override position information in case the original setting was not properly input." + \
+                     "the position variable can be defiend as <BodyPart>_<Side>, " + \
+                     "available BodyParts are (Head, Foot, Tail) and sides are (Supine, Prone, Left, Right). (e.g. Head_Supine)", type=str, default=None)
 
     # bids_helper
     bids_helper.add_argument("input", help=input_dir_str, type=str)
@@ -220,10 +242,14 @@ def main():
             print(invalid_error_message, wrong_target)
             raise InvalidApproach(invalid_error_message)
 
+        from ..app.tonifti.batch import run_tasks
+
         base_path = args.output
         if not base_path:
             base_path = 'Data'
         mkdir(base_path)
+        tasks = []
+        converted = []
         for raw in list_of_raw:
             sub_path = os.path.join(path, raw)
             study = BrukerLoader(sub_path)
@@ -253,17 +279,25 @@ def main():
                             for reco_id in recos:
                                 output_fname = os.path.join(output_path, '{}_reco-{}'.format(filename,
                                                                                             str(reco_id).zfill(2)))
-                                try:
-                                    study.save_as(scan_id, reco_id, output_fname, slope=slope, offset=offset)
-                                    save_meta_files(study, args, scan_id, reco_id, output_fname)
-                                except:
-                                    print('Conversion failed: ScanID:{}, RecoID:{}'.format(str(scan_id), str(reco_id)))
-                    print('{} is converted...'.format(raw))
+                                tasks.append(ToniiTask(sub_path, scan_id, reco_id, output_fname,
+                                                       args.subjecttype, args.position, slope, offset, args.bids))
+                    converted.append(raw)
                 else:
                     print('{} does not contains any scan data to convert...'.format(raw))
             else:
                 print('{} is not PvDataset.'.format(raw))
 
+        failed = [r for r in run_tasks(convert_tonii_task, tasks, jobs=args.jobs) if not r.ok]
+        for result in failed:
+            print('Conversion failed: {}, ScanID:{}, RecoID:{}\n{}'.format(result.task.path, result.task.scan_id,
+                                                                          result.task.reco_id, result.error))
+        failed_raws = set(os.path.basename(r.task.path) for r in failed)
+        for raw in converted:
+            if raw not in failed_raws:
+                print('{} is converted...'.format(raw))
+        if failed:
+            print('[Error] {} of {} conversion(s) failed.'.format(len(failed), len(tasks)))
+
     elif args.function == 'bids_helper':
         import pandas as pd
         path = os.path.abspath(args.input)
@@ -490,10 +524,54 @@ def main():
                         print('...Done.')
             except FileNotValidError:
                 pass
+    elif args.function == 'watch':
+        from ..app.tonifti.watch import Watcher
+
+        def report(result):
+            task = result.task
+            if result.ok:
+                for output in result.outputs:
+                    print('NifTi file is generated... [{}]'.format(output))
+            else:
+                print('Conversion failed: {}, ScanID:{}, RecoID:{}\n{}'.format(task.path, task.scan_id,
+                                                                              task.reco_id, result.error))
+
+        watcher = Watcher(args.input, args.output, interval=args.interval, settle=args.settle,
+                          maxsize=args.queue_size, subj_type=args.subjecttype, subj_position=args.position,
+                          use_inotify=not args.polling, callback=report)
+        print('Watching {} ... (press Ctrl+C to stop)'.format(args.input))
+        try:
+            watcher.run()
+        except KeyboardInterrupt:
+            print('Stopped.')
     else:
         parser.print_help()
 
 
+ToniiTask = namedtuple('ToniiTask', ['path', 'scan_id', 'reco_id', 'output', 'subjecttype', 'position',
+                                     'slope', 'offset', 'bids'])
+
+_loader_cache = {}
+
+
+def convert_tonii_task(task):
+    """Converts a single (scan, reco) pair of tonii_all, writing the NifTi and meta files atomically.
+
+    Runs in a worker process, which reopens the dataset from its path and keeps the last one open for the
+    following tasks of the same dataset.
+    """
+    from ..app.tonifti.batch import AtomicOutput
+    if task.path not in _loader_cache:
+        _loader_cache.clear()
+        study = BrukerLoader(task.path)
+        _loader_cache[task.path] = override_header(study, task.subjecttype, task.position)
+    study = _loader_cache[task.path]
+    with AtomicOutput(task.output) as output:
+        study.save_as(task.scan_id, task.reco_id, output.path, slope=task.slope, offset=task.offset)
+        save_meta_files(study, argparse.Namespace(bids=task.bids), task.scan_id, task.reco_id, output.path)
+    return output.outputs
+
+
 def cleanSubjectID(subj_id):
     """To replace the underscore in subject id.
     Args:
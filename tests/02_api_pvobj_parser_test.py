@@ -0,0 +1,134 @@
+import time
+import numpy as np
+from brkraw.api.pvobj import Parameter, Parser
+from .conftest import assert_same_value, build_jcamp, build_acqp, build_method, build_visu_pars, build_reco, build_subject
+
+
+def assert_same_parameter(stringlist):
+    regex = Parameter(stringlist, name='test', engine='regex')
+    tokenizer = Parameter(stringlist, name='test', engine='tokenizer')
+    assert list(regex.header.keys()) == list(tokenizer.header.keys())
+    assert list(regex.keys()) == list(tokenizer.keys())
+    assert_same_value(dict(regex.header), dict(tokenizer.header))
+    assert_same_value(dict(regex.parameters), dict(tokenizer.parameters))
+
+
+def get_corpus(scale=1):
+    edge_cases = build_jcamp('edge', [
+        ('Scalar', '12'),
+        ('Negative', '-3.25'),
+        ('EngNotation', '1.5e-05'),
+        ('UpperEng', '1E5'),
+        ('Enum', 'Yes'),
+        ('EmptyString', '( 64 )\n<>'),
+        ('SpacedString', '( 64 )\n<Bruker FLASH sequence>'),
+        ('StringArray', '( 3, 20 )\n<a> <b c> <>'),
+        ('DoubleSpace', '( 3 )\n1  2 3'),
+        ('MixedRuns', '( 6 )\n@2*(-1.5) 3 @3*(0)'),
+        ('CommaList', '( 3 )\n1, 2, abc'),
+        ('Tuple', '(3, <x>, 4.5)'),
+        ('TupleArray', '( 2 )\n(1, 2) (3, 4)'),
+        ('Nested', '( 1 )\n((1, (2, 3)), <s>)'),
+        ('BisBlock', '( 2 )\n<$Bis 1,2#> <$Bis 3,4#>'),
+        ('Multiline', '( 2, 3 )\n1 2 3\n$$ comment\n4 5 6'),
+        ('BlankContinuation', '\n'),
+        ('Equals', 'a=b'),
+        ])
+    corpus = [edge_cases, build_subject(), build_reco(5 * scale, 8)]
+    for scan_id in range(1, 4):
+        corpus.append(build_acqp(scan_id, 5 * scale, 2, 64, 64))
+        corpus.append(build_method(5 * scale, 64, 64 * scale))
+        corpus.append(build_visu_pars(5 * scale, 10 * scale, 64))
+    return [c.split('\n') for c in corpus]
+
+
+def test_tokenizer_identical_to_regex():
+    for stringlist in get_corpus() + [get_numeric_corpus()]:
+        assert_same_parameter(stringlist)
+
+
+def test_tokenizer_benchmark():
+    corpus = get_corpus(scale=10)
+    timings = {}
+    for engine in ['regex', 'tokenizer']:
+        start = time.perf_counter()
+        for stringlist in corpus:
+            Parameter(stringlist, name='test', engine=engine)
+        timings[engine] = time.perf_counter() - start
+    print(f"\nJCAMP parsing: regex {timings['regex']:.3f}s, tokenizer {timings['tokenizer']:.3f}s "
+          f"({timings['regex'] / timings['tokenizer']:.1f}x)")
+    for stringlist in corpus:
+        assert_same_parameter(stringlist)
+
+
+def get_numeric_corpus(num_dirs=512):
+    rng = np.random.default_rng(0)
+    gradvec = ' '.join(f'{v:.6f}' for v in rng.standard_normal(num_dirs * 3))
+    encsteps = ' '.join(str(v) for v in range(-num_dirs // 2, num_dirs // 2))
+    return build_jcamp('numeric', [
+        ('PVM_DwGradVec', f'( {num_dirs}, 3 )\n{gradvec}'),
+        ('PVM_EncSteps1', f'( {num_dirs} )\n{encsteps}'),
+        ('IntMatrix', '( 2, 3 )\n1 2 3\n4 5 6'),
+        ('MixedMatrix', '( 2, 2 )\n0 1000.5 1000.5 2'),
+        ('MixedList', '( 3 )\n0 1000.5 1000.5'),
+        ('FloatList', '( 3 )\n-0.5 1e-05 2.25'),
+        ('RunMatrix', '( 2, 3 )\n@3*(0) 1 2 3'),
+        ('RunList', '( 4 )\n@3*(0.5) 1.5'),
+        ('RunMixedList', '( 4 )\n@3*(0) 1'),
+        ('SingleRun', '( 1 )\n@1*(1)'),
+        ('EmptyRun', '( 3 )\n@0*(1) 2 3'),
+        ('LargeRun', '( 4 )\n@3*(1e20) 1.5'),
+        ('LargeInt', '( 2 )\n99999999999999999999 1'),
+        ('UpperEng', '( 2 )\n1E5 2'),
+        ]).split('\n')
+
+
+def test_numeric_array_identical_to_elementwise(monkeypatch):
+    stringlist = get_numeric_corpus()
+    fast = Parameter(stringlist, name='test')
+    monkeypatch.setattr(Parser, 'convert_numeric_array', staticmethod(lambda data, shape: None))
+    elementwise = Parameter(stringlist, name='test')
+    assert_same_value(dict(fast.parameters), dict(elementwise.parameters))
+    assert isinstance(fast['PVM_DwGradVec'], np.ndarray) and fast['PVM_DwGradVec'].shape == (512, 3)
+
+
+def test_numeric_array_benchmark(monkeypatch):
+    stringlist = get_numeric_corpus(num_dirs=20000)
+    start = time.perf_counter()
+    Parameter(stringlist, name='test')
+    fast = time.perf_counter() - start
+    monkeypatch.setattr(Parser, 'convert_numeric_array', staticmethod(lambda data, shape: None))
+    start = time.perf_counter()
+    Parameter(stringlist, name='test')
+    elementwise = time.perf_counter() - start
+    print(f"\nNumeric arrays: elementwise {elementwise:.3f}s, bulk {fast:.3f}s ({elementwise / fast:.1f}x)")
+
+
+def test_lazy_identical_to_eager():
+    for stringlist in get_corpus() + [get_numeric_corpus()]:
+        for engine in ['regex', 'tokenizer']:
+            eager = Parameter(stringlist, name='test', engine=engine)
+            lazy = Parameter(stringlist, name='test', engine=engine, lazy=True)
+            assert list(lazy.keys()) == list(eager.keys())
+            assert not lazy.parameters._decoded
+            assert_same_value(dict(lazy.header), dict(eager.header))
+            for key in list(eager.keys())[::2]:
+                assert_same_value(lazy[key], eager[key])
+                assert lazy.get(key) is lazy[key]
+            assert lazy.get('NotAParameter') is None
+            assert_same_value(dict(lazy.items()), dict(eager.items()))
+            assert lazy.is_parameter()
+
+
+def test_lazy_benchmark():
+    corpus = get_corpus(scale=10)
+    keys = ['ACQ_scan_name', 'ACQ_method', 'NR', 'NI', 'PVM_Matrix', 'PVM_SpatResol', 'VisuCoreSize', 'VisuCoreDim']
+    timings = {}
+    for lazy in [False, True]:
+        start = time.perf_counter()
+        for stringlist in corpus:
+            param = Parameter(stringlist, name='test', engine='tokenizer', lazy=lazy)
+            [param.get(key) for key in keys]
+        timings[lazy] = time.perf_counter() - start
+    print(f"\nLoading with {len(keys)} lookups: eager {timings[False]:.3f}s, lazy {timings[True]:.3f}s "
+          f"({timings[False] / timings[True]:.1f}x)")
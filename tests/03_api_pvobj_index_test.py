@@ -0,0 +1,136 @@
+import os
+import time
+import pytest
+from brkraw.api.pvobj import PvStudy, Parser, Tokenizer, MetadataIndex
+from .conftest import assert_same_value, build_study, build_study_zip
+
+
+def get_parameters(study):
+    """Reads every parameter file of the study, as Study.info does."""
+    params = {'subject': study.subject}
+    for scan_id in study.avail:
+        scan = study.get_scan(scan_id)
+        params[f'{scan_id}/acqp'] = scan.acqp
+        params[f'{scan_id}/method'] = scan.method
+        for reco_id in scan.avail:
+            reco = scan.get_reco(reco_id)
+            params[f'{scan_id}/{reco_id}/visu_pars'] = reco.visu_pars
+            params[f'{scan_id}/{reco_id}/reco'] = reco.reco
+    return params
+
+
+def assert_same_parameters(a, b):
+    assert list(a) == list(b)
+    for key in a:
+        assert repr(a[key]) == repr(b[key])
+        assert_same_value(dict(a[key].header), dict(b[key].header))
+        assert_same_value(dict(a[key].parameters), dict(b[key].parameters))
+
+
+@pytest.mark.parametrize('compressed', [False, True])
+def test_index_warm_open_skips_parsing(tmp_path, monkeypatch, compressed):
+    path = build_study(tmp_path / 'study')
+    if compressed:
+        path = build_study_zip(path, tmp_path / 'study.zip')
+    with PvStudy(path) as study:
+        expected = get_parameters(study)
+    with PvStudy(path, index=True) as study:
+        assert study.index.path == MetadataIndex.default_path(path)
+        assert_same_parameters(get_parameters(study), expected)
+    assert os.path.exists(MetadataIndex.default_path(path))
+
+    with monkeypatch.context() as m:
+        m.setattr(Parser, 'load_param', pytest.fail)
+        m.setattr(Tokenizer, 'load_records', pytest.fail)
+        m.setattr(PvStudy, '_fetch_dir', pytest.fail)
+        m.setattr(PvStudy, '_fetch_zip', pytest.fail)
+        with PvStudy(path, index=True) as study:
+            assert study.avail == [1, 2, 3]
+            assert_same_parameters(get_parameters(study), expected)
+
+
+def test_index_invalidated_on_change(tmp_path):
+    path = build_study(tmp_path / 'study')
+    index_path = tmp_path / 'cache' / 'study.brkidx'
+    index_path.parent.mkdir()
+    with PvStudy(path, index=index_path) as study:
+        assert study.get_scan(1).acqp['ACQ_scan_name'] == 'T1_FLASH (E1)'
+    assert index_path.exists()
+
+    acqp = path / '1' / 'acqp'
+    acqp.write_text(acqp.read_text().replace('T1_FLASH (E1)', 'T1_FLASH (E9)'))
+    os.utime(acqp, ns=(0, 0))
+    build_study(tmp_path / 'other', num_scans=4)
+    os.rename(tmp_path / 'other' / '4', path / '4')
+    with PvStudy(path, index=index_path) as study:
+        assert study.avail == [1, 2, 3, 4]
+        assert study.get_scan(1).acqp['ACQ_scan_name'] == 'T1_FLASH (E9)'
+        assert study.get_scan(4).acqp['ACQ_scan_name'] == 'T1_FLASH (E4)'
+
+
+def test_index_sizes_follow_in_place_overwrite(tmp_path):
+    path = build_study(tmp_path / 'study')
+    with PvStudy(path, index=True) as study:
+        assert study.get_scan(1).get_reco(1).contents['file_sizes'][0] > 0
+    reco_path = path / '1' / 'pdata' / '1'
+    mtime = os.stat(reco_path).st_mtime_ns
+    with open(reco_path / '2dseq', 'ab') as f:
+        f.write(b'\x00' * 10)
+    os.utime(reco_path, ns=(mtime, mtime))
+    with PvStudy(path, index=True) as study:
+        contents = study.get_scan(1).get_reco(1).contents
+        assert contents['file_sizes'][contents['files'].index('2dseq')] == os.path.getsize(reco_path / '2dseq')
+
+
+class Planted:
+    executed = False
+
+    def __reduce__(self):
+        return (setattr, (Planted, 'executed', True))
+
+
+def test_index_never_unpickles(tmp_path):
+    import json
+    import pickle
+    import sqlite3
+    path = build_study(tmp_path / 'study')
+    with PvStudy(path, index=True) as study:
+        expected = get_parameters(study)
+    conn = sqlite3.connect(MetadataIndex.default_path(path))
+    for (blob,) in conn.execute('SELECT value FROM meta UNION ALL SELECT value FROM params'):
+        json.loads(blob)
+    conn.execute('UPDATE params SET value = ?', (pickle.dumps(Planted()),))
+    conn.commit()
+    conn.close()
+    with PvStudy(path, index=True) as study:
+        assert_same_parameters(get_parameters(study), expected)
+    assert not Planted.executed
+
+
+def test_index_not_created_for_invalid_dataset(tmp_path, monkeypatch):
+    (tmp_path / 'notazip').write_bytes(b'data')
+    for path, error in ((tmp_path / 'missing', FileNotFoundError), (tmp_path / 'notazip', ValueError)):
+        with pytest.raises(error):
+            PvStudy(path, index=True)
+    assert os.listdir(tmp_path) == ['notazip']
+    path = build_study(tmp_path / 'study', num_scans=1)
+    closed = []
+    monkeypatch.setattr(MetadataIndex, 'close', lambda self: closed.append(self))
+    monkeypatch.setattr(PvStudy, '_match_childobj', staticmethod(lambda path: 1 / 0))
+    with pytest.raises(ZeroDivisionError):
+        PvStudy(path, index=True)
+    assert len(closed) == 1
+
+@pytest.mark.parametrize('compressed', [False, True])
+def test_index_benchmark(tmp_path, compressed):
+    path = build_study(tmp_path / 'study', num_scans=40, num_slices=20)
+    if compressed:
+        path = build_study_zip(path, tmp_path / 'study.zip')
+    timings = {}
+    for run in ['cold', 'warm']:
+        start = time.perf_counter()
+        with PvStudy(path, index=True) as study:
+            get_parameters(study)
+        timings[run] = time.perf_counter() - start
+    print(f"\nMetadata index ({'zip' if compressed else 'dir'}): cold {timings['cold']:.3f}s, "
+          f"warm {timings['warm']:.3f}s ({timings['cold'] / timings['warm']:.1f}x)")
@@ -0,0 +1,49 @@
+import zipfile
+from brkraw.api.pvobj import PvStudy
+from brkraw.api.pvobj import base
+
+
+def test_shared_zipfile_handle(monkeypatch, synthetic_study_zip):
+    opened = []
+
+    class CountingZipFile(zipfile.ZipFile):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            opened.append(self)
+
+        def namelist(self):
+            raise AssertionError('members must be looked up by ZipInfo')
+
+    monkeypatch.setattr(base, 'ZipFile', CountingZipFile)
+    with PvStudy(synthetic_study_zip) as study:
+        # the contents are fetched through the shared handle
+        assert len(opened) == 1
+        assert study.subject.is_parameter()
+        for scan_id in study.avail:
+            scan = study.get_scan(scan_id)
+            assert scan.acqp['ACQ_scan_name'] == f'T1_FLASH (E{scan_id})'
+            with scan.fid as fid:
+                assert fid.read(4)
+            reco = scan.get_reco(1)
+            assert reco.visu_pars.is_parameter()
+            with reco.get_2dseq() as f:
+                assert len(f.read()) == reco.contents['file_sizes'][reco.contents['files'].index('2dseq')]
+        assert len(opened) == 1
+        handle = study._zipfile
+        assert not handle.closed
+        data = study.get_scan(1).get_reco(1).get_2dseq()
+    assert handle.closed
+    assert data.read(2)
+    data.close()
+
+
+def test_shared_zipfile_refcount(synthetic_study_zip):
+    study = PvStudy(synthetic_study_zip)
+    scan = study.get_scan(1)
+    handle = study._zipfile
+    assert scan._zipfile is handle and scan.get_reco(1)._zipfile is handle
+    assert scan.acqp.is_parameter() and not handle.closed
+    scan.close()
+    assert scan._zipfile is None and not handle.closed
+    study.close()
+    assert handle.closed
@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+from brkraw.api.data import Study
+
+
+def test_dataarray_memmap(synthetic_study):
+    with Study(synthetic_study) as study:
+        analyzer = study.get_scan(2).get_datarray_analyzer(1)
+        loaded = analyzer.get_dataarray()
+        mapped = analyzer.get_dataarray(mmap=True)
+        assert isinstance(mapped, np.memmap)
+        assert mapped.shape == loaded.shape == (8, 8, 5, 2)
+        assert mapped.dtype == loaded.dtype and mapped.flags['F_CONTIGUOUS']
+        assert not mapped.flags['WRITEABLE']
+        assert np.array_equal(mapped, loaded)
+        with pytest.raises(ValueError):
+            mapped[0, 0, 0, 0] = 0
+
+
+def test_dataarray_memmap_falls_back_for_zip(synthetic_study_zip):
+    with Study(synthetic_study_zip) as study:
+        analyzer = study.get_scan(2).get_datarray_analyzer(1)
+        assert analyzer.filepath is None
+        dataarray = analyzer.get_dataarray(mmap=True)
+        assert not isinstance(dataarray, np.memmap)
+        assert np.array_equal(dataarray.ravel(order='F'), np.arange(8 * 8 * 5 * 2) + 2)
+
+
+@pytest.mark.parametrize('compressed', [False, True])
+def test_dataarray_frames(request, compressed):
+    path = request.getfixturevalue('synthetic_study_zip' if compressed else 'synthetic_study')
+    with Study(path) as study:
+        analyzer = study.get_scan(3).get_datarray_analyzer(1)
+        dataarray = analyzer.get_dataarray()
+        assert analyzer.frame_shape == (8, 8) and analyzer.num_frames == 10
+        flat = dataarray.reshape(analyzer.frame_shape + (-1,), order='F')
+        frames = list(analyzer.iter_frames())
+        assert len(frames) == 10
+        for i, frame in enumerate(frames):
+            assert np.array_equal(frame, flat[..., i])
+        for frames in [slice(2, 9, 3), slice(None, None, -1), slice(-2, None)]:
+            assert np.array_equal(analyzer.get_frames(frames), flat[..., frames])
+        assert np.array_equal(analyzer.get_frames(-1), flat[..., -1])
+        assert analyzer.get_frames(slice(3, 3)).shape == (8, 8, 0)
+        with pytest.raises(IndexError):
+            analyzer.get_frames(10)
@@ -0,0 +1,58 @@
+import numpy as np
+import nibabel as nib
+import pytest
+from brkraw.app.tonifti import StudyToNifti
+
+pytestmark = pytest.mark.filterwarnings("ignore:Failed to identify compatible 'slice_code'")
+
+
+@pytest.mark.parametrize('filename', ['scan.nii', 'scan.nii.gz'])
+@pytest.mark.parametrize('scale_mode', ['header', 'apply'])
+def test_streaming_writer_matches_in_memory(tmp_path, synthetic_study, filename, scale_mode):
+    study = StudyToNifti(synthetic_study)
+    expected = study.get_dataobj(2, 1, scale_mode=scale_mode)
+    affine = study.get_affine(2, 1)
+    paths = study.save_nifti1image(2, tmp_path / filename, reco_id=1, scale_mode=scale_mode,
+                                   chunk_size=8 * 8 * 5 * 2)
+    assert paths == [str(tmp_path / filename)]
+    nii = nib.load(paths[0])
+    assert nii.shape == expected.shape == (8, 8, 5, 2)
+    assert np.allclose(nii.affine, affine)
+    if scale_mode == 'header':
+        assert nii.get_data_dtype() == np.int16
+        assert np.array_equal(np.asanyarray(nii.dataobj.get_unscaled()), expected)
+        assert nii.dataobj.slope == 2.5
+    else:
+        assert nii.get_data_dtype() == np.float64
+        assert np.array_equal(nii.get_fdata(), expected)
+    study.close()
+
+
+def test_streaming_writer_maps_data(synthetic_study, monkeypatch):
+    from brkraw.app.tonifti.base import BaseMethods
+    study = StudyToNifti(synthetic_study)
+    assert not isinstance(study.get_data_dict(2, 1)['data_array'], np.memmap)
+    assert not isinstance(study.get_dataobj(2, 1), np.memmap)
+    mapped = []
+    write_nifti1 = BaseMethods._write_nifti1
+    monkeypatch.setattr(BaseMethods, '_write_nifti1',
+                        staticmethod(lambda path, header, dataobj, *args, **kwargs:
+                                     mapped.append(isinstance(dataobj, np.memmap)) or
+                                     write_nifti1(path, header, dataobj, *args, **kwargs)))
+    study.save_nifti1image(2, synthetic_study.parent / 'scan.nii', reco_id=1)
+    assert mapped == [True]
+    study.close()
+
+
+def test_streaming_writer_slab_size(tmp_path):
+    class RecordingArray(np.ndarray):
+        def __getitem__(self, index):
+            slabs.append(np.shape(np.asarray(self)[index]))
+            return super().__getitem__(index)
+
+    slabs = []
+    dataobj = np.asfortranarray(np.arange(4 * 3 * 2 * 5, dtype=np.int16).reshape(4, 3, 2, 5)).view(RecordingArray)
+    nii = nib.Nifti1Image(np.asarray(dataobj), np.eye(4))
+    StudyToNifti._write_nifti1(str(tmp_path / 'scan.nii'), nii.header, dataobj, chunk_size=4 * 3 * 2 * 2 * 2)
+    assert slabs == [(4, 3, 2, 2), (4, 3, 2, 2), (4, 3, 2, 1)]
+    assert np.array_equal(nib.load(tmp_path / 'scan.nii').get_fdata(), np.asarray(dataobj))
@@ -0,0 +1,61 @@
+import os
+import numpy as np
+import nibabel as nib
+import pytest
+from brkraw.app.tonifti import StudyToNifti, convert_study
+from brkraw.app.tonifti.batch import AtomicOutput, run_tasks
+
+pytestmark = pytest.mark.filterwarnings("ignore:Failed to identify compatible 'slice_code'")
+
+
+@pytest.mark.parametrize('jobs', [1, 2])
+def test_convert_study(tmp_path, synthetic_study, jobs):
+    results = convert_study(synthetic_study, tmp_path / 'out', jobs=jobs)
+    assert [(r.task.scan_id, r.task.reco_id) for r in results] == [(1, 1), (2, 1), (3, 1)]
+    assert all(r.ok for r in results)
+    assert sorted(os.listdir(tmp_path / 'out')) == [f'scan-0{i}_reco-01.nii.gz' for i in (1, 2, 3)]
+    with StudyToNifti(synthetic_study) as study:
+        for result in results:
+            expected = study.get_dataobj(result.task.scan_id, 1)
+            nii = nib.load(result.outputs[0])
+            assert np.array_equal(np.asanyarray(nii.dataobj.get_unscaled()), expected)
+
+
+def test_convert_study_aggregates_errors(tmp_path, synthetic_study):
+    seq = synthetic_study / '2' / 'pdata' / '1' / '2dseq'
+    seq.write_bytes(seq.read_bytes()[:100])
+    with StudyToNifti(synthetic_study) as study:
+        results = study.convert(tmp_path / 'out', jobs=2)
+    assert [r.ok for r in results] == [True, False, True]
+    assert results[1].outputs == [] and 'Error' in results[1].error
+    assert sorted(os.listdir(tmp_path / 'out')) == ['scan-01_reco-01.nii.gz', 'scan-03_reco-01.nii.gz']
+
+
+def exit_on_three(task):
+    if task == 3:
+        os._exit(1)
+    if task == 4:
+        raise ValueError('task 4')
+    return [str(task)]
+
+
+def test_run_tasks_survives_dead_worker():
+    results = run_tasks(exit_on_three, range(8), jobs=2)
+    assert [r.task for r in results] == list(range(8))
+    assert [r.ok for r in results] == [True] * 3 + [False] * 2 + [True] * 3
+    assert [r.outputs for r in results if r.ok] == [[str(i)] for i in (0, 1, 2, 5, 6, 7)]
+    assert 'BrokenProcessPool' in results[3].error and 'ValueError: task 4' in results[4].error
+
+
+def test_atomic_output(tmp_path):
+    with AtomicOutput(tmp_path / 'image') as output:
+        for suffix in ['.nii.gz', '.bval']:
+            with open(output.path + suffix, 'w') as f:
+                f.write('data')
+        assert not (tmp_path / 'image.nii.gz').exists()
+    assert output.outputs == [str(tmp_path / 'image.bval'), str(tmp_path / 'image.nii.gz')]
+    with pytest.raises(RuntimeError):
+        with AtomicOutput(tmp_path / 'failed') as output:
+            open(output.path + '.nii.gz', 'w').close()
+            raise RuntimeError
+    assert sorted(os.listdir(tmp_path)) == ['image.bval', 'image.nii.gz']
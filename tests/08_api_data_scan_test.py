@@ -0,0 +1,120 @@
+import os
+import gc
+import weakref
+import threading
+import numpy as np
+import pytest
+from brkraw.api.data import Study
+from brkraw.api.data.registry import ObjectRegistry, registry
+
+
+def test_registry_lookup():
+    class Item:
+        pass
+    reg = ObjectRegistry()
+    item = Item()
+    address = reg.register(item)
+    item_id = id(item)
+    assert reg.retrieve(address) is item and address in reg
+    del item
+    gc.collect()
+    assert reg.retrieve(address) is None and len(reg) == 0
+    assert reg.retrieve(None) is None
+    # a new object reusing the id() of the collected one never gets its address
+    others = [Item()]
+    while id(others[-1]) != item_id and len(others) < 100000:
+        others.append(Item())
+    assert id(others[-1]) == item_id
+    reused_address = reg.register(others[-1])
+    assert reused_address != address
+    assert reg.retrieve(address) is None
+    assert reg.retrieve(reused_address) is others[-1]
+
+
+@pytest.mark.parametrize('compressed', [False, True])
+def test_scan_does_not_keep_study_alive(request, compressed):
+    path = request.getfixturevalue('synthetic_study_zip' if compressed else 'synthetic_study')
+    study = Study(path)
+    cache = {scan_id: study.get_scan(scan_id) for scan_id in study.avail}
+    scan = cache[2]
+    assert scan.retrieve_study() is study
+    address = study._address
+
+    study_ref = weakref.ref(study)
+    study.close()
+    assert scan.retrieve_study() is None
+    assert registry.retrieve(address) is None
+    del study
+    gc.collect()
+    assert study_ref() is None
+
+    # the scan still owns its pvobj after the study is gone
+    assert scan.pvobj is scan.retrieve_pvobj() and scan.avail == [1]
+    dataarray = scan.get_datarray_analyzer(1).get_dataarray()
+    assert np.array_equal(dataarray.ravel(order='F'), np.arange(8 * 8 * 5 * 2) + 2)
+
+
+def test_scan_shared_across_threads(synthetic_study):
+    with Study(synthetic_study) as study:
+        scan = study.get_scan(1)
+        results = [None] * 4
+
+        def worker(i):
+            results[i] = scan.get_datarray_analyzer(1).get_dataarray()
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        for result in results:
+            assert np.array_equal(result, results[0])
+
+
+def test_scaninfo_analyzer_cached_per_study(synthetic_study, monkeypatch):
+    from brkraw.api.analyzer import ScanInfoAnalyzer
+    calls = []
+    init = ScanInfoAnalyzer.__init__
+
+    def counting_init(self, pvobj, reco_id=None, debug=False):
+        calls.append((pvobj, reco_id))
+        init(self, pvobj, reco_id=reco_id, debug=debug)
+
+    monkeypatch.setattr(ScanInfoAnalyzer, '__init__', counting_init)
+    with Study(synthetic_study) as study:
+        scan = study.get_scan(1)
+        analyzer = scan.get_scaninfo(reco_id=1, get_analyzer=True)
+        for _ in range(3):
+            rescan = study.get_scan(1)
+            assert rescan.get_scaninfo(reco_id=1, get_analyzer=True) is analyzer
+            info = rescan.get_scaninfo(reco_id=1)
+            assert info.num_warns == scan.get_scaninfo(reco_id=1).num_warns
+            rescan.get_affine_analyzer(1)
+            rescan.get_datarray_analyzer(1)
+        assert len(calls) == 2
+
+        # the analyzer is rebuilt when a file it was built from changes on disk
+        visu_pars = synthetic_study / '1' / 'pdata' / '1' / 'visu_pars'
+        stat = visu_pars.stat()
+        os.utime(visu_pars, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        # both (1, None), built by get_scan, and (1, 1) depend on the visu_pars of reco 1
+        assert study.get_scan(1).get_scaninfo(reco_id=1, get_analyzer=True) is not analyzer
+        assert len(calls) == 4
+
+
+def test_scaninfo_does_not_share_cached_containers(synthetic_study):
+    with Study(synthetic_study) as study:
+        info = study.get_scan(1).get_scaninfo(reco_id=1)
+        expected = {name: repr(value) for name, value in vars(info).items()}
+        for value in vars(info).values():
+            if isinstance(value, dict):
+                for item in value.values():
+                    if isinstance(item, list):
+                        item.append('mutated')
+                    elif isinstance(item, dict):
+                        item['mutated'] = True
+                    elif isinstance(item, np.ndarray) and item.flags.writeable:
+                        item.fill(0)
+                value['mutated'] = True
+        fresh = study.get_scan(1).get_scaninfo(reco_id=1)
+        assert {name: repr(value) for name, value in vars(fresh).items()} == expected
@@ -0,0 +1,82 @@
+import time
+import threading
+import pytest
+from brkraw.api.data import Study
+from brkraw.api.pvobj import PvStudy
+from .conftest import build_study, assert_same_value
+
+
+class StubRecipeParser:
+    """Collects the info dicts of the targets in place of the recipes, recording the calling threads."""
+    threads = set()
+
+    def __init__(self, target, recipe):
+        self._targets = target if isinstance(target, list) else [target]
+
+    @staticmethod
+    def _collect(target):
+        if isinstance(target, Study):
+            return {'avail': list(target.avail)}
+        return {name: value for name, value in sorted(vars(target).items()) if isinstance(value, dict)}
+
+    def get(self):
+        StubRecipeParser.threads.add(threading.get_ident())
+        return {'targets': [self._collect(target) for target in self._targets]}
+
+
+@pytest.fixture(autouse=True)
+def stub_recipe_parser(monkeypatch):
+    monkeypatch.setattr('brkraw.api.data.study.RecipeParser', StubRecipeParser)
+    StubRecipeParser.threads = set()
+
+
+@pytest.mark.parametrize('workers', [2, 8])
+def test_info_parallel_identical_to_sequential(synthetic_study, workers):
+    with Study(synthetic_study) as study:
+        sequential = study.info
+    assert StubRecipeParser.threads == {threading.get_ident()}
+    with Study(synthetic_study, workers=workers) as study:
+        parallel = study.info
+    assert StubRecipeParser.threads - {threading.get_ident()}
+    assert list(parallel['scans']) == list(sequential['scans']) == [1, 2, 3]
+    assert_same_value(parallel, sequential)
+
+
+def test_param_cache_shared_across_threads(synthetic_study):
+    with PvStudy(synthetic_study) as study:
+        scans = [study.get_scan(scan_id) for scan_id in study.avail]
+        errors = []
+
+        def hammer(seed):
+            try:
+                for i in range(2000):
+                    scan = scans[(seed + i) % len(scans)]
+                    key = f'key{(seed * i) % 24}'
+                    if scan._get_cached_param(key, (i % 3,)) is None:
+                        scan._set_cached_param(key, (i % 3,), None)
+                    if i % 97 == 0:
+                        scan.clear_param_cache(key)
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=hammer, args=(seed,)) for seed in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert not errors
+        assert all(len(scan._param_cache) <= scan._param_cache_size for scan in scans)
+
+
+def test_info_parallel_benchmark(tmp_path):
+    path = build_study(tmp_path / 'study', num_scans=80, num_slices=10)
+    timings = {}
+    infos = {}
+    for workers in [1, 8]:
+        start = time.perf_counter()
+        with Study(path, workers=workers) as study:
+            infos[workers] = study.info
+        timings[workers] = time.perf_counter() - start
+    assert_same_value(infos[8], infos[1])
+    print(f"\nStudy.info of 80 scans: sequential {timings[1]:.3f}s, "
+          f"8 workers {timings[8]:.3f}s ({timings[1] / timings[8]:.1f}x)")
@@ -0,0 +1,70 @@
+import os
+import shutil
+from brkraw.api.pvobj import PvStudy
+from brkraw.api.data import Study
+from .conftest import build_study, assert_same_value
+
+
+def copy_scan(path, src, dst, with_reco=True):
+    shutil.copytree(path / str(src), path / str(dst),
+                    ignore=None if with_reco else shutil.ignore_patterns('pdata'))
+
+
+def test_refresh_adds_new_scans(tmp_path):
+    path = build_study(tmp_path / 'study', num_scans=2)
+    with PvStudy(path) as study:
+        scanobj = study.get_scan(1)
+        acqp = scanobj.acqp
+        assert not study.refresh()
+
+        # a scan being acquired: parameters and fid first, reconstruction later
+        copy_scan(path, 2, 3, with_reco=False)
+        changes = study.refresh()
+        assert changes.added_scans == [3] and changes.added_recos == []
+        assert study.avail == [1, 2, 3] and study.get_scan(3).avail == []
+
+        shutil.copytree(path / '2' / 'pdata', path / '3' / 'pdata')
+        changes = study.refresh()
+        assert changes.added_scans == [] and changes.added_recos == [(3, 1)]
+        assert '3' in changes.updated
+        assert study.get_scan(3).avail == [1] and study.get_scan(3).contents['dirs'] == ['pdata']
+        assert_same_value(study.get_scan(3).get_visu_pars(1).parameters, study.get_scan(2).get_visu_pars(1).parameters)
+
+        # existing objects and their parsed parameters are kept
+        assert study.get_scan(1) is scanobj and scanobj.acqp is acqp
+
+
+def test_refresh_removes_scans(tmp_path):
+    path = build_study(tmp_path / 'study', num_scans=3)
+    with PvStudy(path) as study:
+        shutil.rmtree(path / '2')
+        shutil.rmtree(path / '3' / 'pdata' / '1')
+        changes = study.refresh()
+        assert changes.removed_scans == [2]
+        assert changes.removed_recos == [(2, 1), (3, 1)]
+        assert study.avail == [1, 3] and study.get_scan(3).avail == []
+
+
+def test_refresh_lists_only_changed_directories(tmp_path, monkeypatch):
+    path = build_study(tmp_path / 'study', num_scans=20)
+    with PvStudy(path) as study:
+        listed = []
+        scandir = os.scandir
+        monkeypatch.setattr(os, 'scandir', lambda p: listed.append(os.path.relpath(p, path)) or scandir(p))
+        study.refresh()
+        assert listed == []
+        copy_scan(path, 1, 21)
+        listed.clear()
+        changes = study.refresh()
+        assert changes.added_scans == [21] and changes.updated == ['.']
+        assert sorted(listed) == ['.', '21', '21/pdata', '21/pdata/1']
+
+
+def test_study_refresh_rebuilds_header(tmp_path):
+    path = build_study(tmp_path / 'study', num_scans=1)
+    with Study(path) as study:
+        scan = study.get_scan(1)
+        copy_scan(path, 1, 2)
+        assert study.refresh().added_scans == [2]
+        assert study.get_scan(2).get_scaninfo(1, get_analyzer=True) is not None
+        assert scan.retrieve_study() is study and study.header is not None
@@ -0,0 +1,130 @@
+import os
+import shutil
+import pytest
+from brkraw.app.tonifti.watch import Watcher, Inotify
+from .conftest import build_study
+
+pytestmark = pytest.mark.filterwarnings("ignore:Failed to identify compatible 'slice_code'")
+
+
+def outputs(path):
+    return sorted(f for f in os.listdir(path) if not f.startswith('.'))
+
+
+def test_watch_converts_complete_scans(tmp_path):
+    root = tmp_path / 'raw'
+    build_study(root / 'study', num_scans=2)
+    watcher = Watcher(root, tmp_path / 'out', settle=0, use_inotify=False)
+    watcher.start()
+    try:
+        assert watcher.poll() == 0  # the first poll only records the size of each 2dseq
+        assert watcher.poll() == 2
+        watcher.join()
+        assert outputs(tmp_path / 'out' / 'study') == ['scan-01_reco-01.nii.gz', 'scan-02_reco-01.nii.gz']
+
+        # a scan being acquired: the reconstruction is written after the parameters
+        shutil.copytree(root / 'study' / '2', root / 'study' / '3', ignore=shutil.ignore_patterns('2dseq'))
+        seq = (root / 'study' / '2' / 'pdata' / '1' / '2dseq').read_bytes()
+        (root / 'study' / '3' / 'pdata' / '1' / '2dseq').write_bytes(seq[:len(seq) // 2])
+        assert watcher.poll() == 0
+        (root / 'study' / '3' / 'pdata' / '1' / '2dseq').write_bytes(seq)
+        assert watcher.poll() == 0  # the size changed since the last poll
+        assert watcher.poll() == 1
+        watcher.join()
+        assert outputs(tmp_path / 'out' / 'study')[-1] == 'scan-03_reco-01.nii.gz'
+        assert all(result.ok for result in watcher.results) and len(watcher.results) == 3
+    finally:
+        watcher.stop()
+
+
+def test_watch_waits_for_visu_pars(tmp_path):
+    root = tmp_path / 'raw'
+    build_study(root / 'study', num_scans=1)
+    os.remove(root / 'study' / '1' / 'pdata' / '1' / 'visu_pars')
+    watcher = Watcher(root / 'study', tmp_path / 'out', settle=0, use_inotify=False)
+    assert watcher.poll() == 0 and watcher.poll() == 0
+    watcher.stop()
+
+
+def test_watch_restart_skips_converted(tmp_path):
+    root = tmp_path / 'raw'
+    build_study(root / 'study', num_scans=2)
+    out = tmp_path / 'out' / 'study'
+    out.mkdir(parents=True)
+    (out / 'scan-01_reco-01.nii.gz').write_bytes(b'converted')
+    stale = out / '.scan-02_reco-01.999999999.tmp.nii.gz'
+    stale.write_bytes(b'partial')
+    watcher = Watcher(root, tmp_path / 'out', settle=0, use_inotify=False)
+    assert watcher.poll() == 0 and not stale.exists()
+    assert watcher.poll() == 1
+    assert watcher.queued == 1
+    watcher.start()
+    watcher.stop()
+    assert outputs(out) == ['scan-01_reco-01.nii.gz', 'scan-02_reco-01.nii.gz']
+    assert (out / 'scan-01_reco-01.nii.gz').read_bytes() == b'converted'
+
+
+def test_clean_temporary_never_signals_outside_posix(tmp_path, monkeypatch):
+    import os
+    import time
+    fresh = tmp_path / '.scan-01_reco-01.999999999.tmp.nii.gz'
+    old = tmp_path / '.scan-02_reco-01.999999999.tmp.nii.gz'
+    fresh.write_bytes(b'partial')
+    old.write_bytes(b'partial')
+    past = time.time() - Watcher.stale_age - 60
+    os.utime(old, (past, past))
+    monkeypatch.setattr(os, 'name', 'nt')
+    monkeypatch.setattr(os, 'kill', pytest.fail)
+    Watcher._clean_temporary(str(tmp_path))
+    assert fresh.exists() and not old.exists()
+
+
+def test_watch_queue_is_bounded(tmp_path):
+    root = tmp_path / 'raw'
+    build_study(root / 'study', num_scans=3)
+    watcher = Watcher(root, tmp_path / 'out', settle=0, maxsize=1, use_inotify=False)
+    watcher.poll()
+    assert watcher.poll() == 1 and watcher.poll() == 0 and watcher.queued == 1
+    watcher.start()
+    watcher.join()
+    # stop the conversion thread, so that it does not make room in the queue while polling
+    watcher.stop()
+    assert watcher.poll() == 1
+    watcher.start()
+    watcher.stop()
+    assert len(outputs(tmp_path / 'out' / 'study')) == 2
+
+
+def test_inotify_wakes_up_on_events(tmp_path):
+    try:
+        inotify = Inotify()
+    except OSError:
+        pytest.skip('inotify is not available')
+    try:
+        inotify.add(str(tmp_path))
+        assert not inotify.wait(0)
+        (tmp_path / 'file').write_bytes(b'data')
+        assert inotify.wait(1)
+        assert not inotify.wait(0)
+    finally:
+        inotify.close()
+
+
+def test_inotify_ignores_writes_to_open_files(tmp_path):
+    assert not Inotify.mask & 0x00000002  # IN_MODIFY
+    try:
+        inotify = Inotify()
+    except OSError:
+        pytest.skip('inotify is not available')
+    try:
+        path = tmp_path / '2dseq'
+        path.write_bytes(b'')
+        inotify.add(str(tmp_path))
+        with open(path, 'ab') as f:
+            for _ in range(3):
+                f.write(b'data')
+                f.flush()
+                assert not inotify.wait(0.05)
+        assert inotify.wait(1)
+    finally:
+        inotify.close()
@@ -0,0 +1,78 @@
+import os
+import time
+import pickle
+from collections import OrderedDict
+from brkraw.api.pvobj import PvStudy
+from brkraw.api.pvobj.base import BaseMethods, LazyFileSizes
+from .conftest import build_study
+
+
+def fetch_dir_walk(path):
+    """The os.walk based implementation of _fetch_dir, as a reference."""
+    contents = OrderedDict()
+    abspath = path.absolute()
+    for dirpath, dirnames, filenames in os.walk(abspath):
+        relative_path = os.path.relpath(os.path.normpath(dirpath), abspath)
+        file_sizes = [os.path.getsize(os.path.join(dirpath, f)) for f in filenames]
+        contents[relative_path] = {'dirs': dirnames, 'files': filenames,
+                                   'file_indexes': [], 'file_sizes': file_sizes}
+    return contents
+
+
+def build_adjustments(path, num_dirs=5, num_files=20):
+    for i in range(num_dirs):
+        adj = path / 'AdjResult' / f'adj_{i}'
+        adj.mkdir(parents=True)
+        for j in range(num_files):
+            (adj / f'result_{j}').write_bytes(b'0' * j)
+
+
+def test_fetch_dir_identical_to_walk(tmp_path):
+    path = build_study(tmp_path / 'study', num_scans=5)
+    build_adjustments(path)
+    os.symlink(path / '1', path / 'link')
+    assert BaseMethods._fetch_dir(path) == fetch_dir_walk(path)
+    assert list(BaseMethods._fetch_dir(path)) == list(fetch_dir_walk(path))
+
+
+def test_fetch_dir_pruned(tmp_path, monkeypatch):
+    path = build_study(tmp_path / 'study', num_scans=5)
+    build_adjustments(path)
+    contents = BaseMethods._fetch_dir(path, prune=True)
+    reference = fetch_dir_walk(path)
+    assert 'AdjResult' in contents['.']['dirs']
+    assert set(contents) == {p for p in reference if not p.startswith('AdjResult')}
+    study = PvStudy(path)
+    monkeypatch.setattr(PvStudy, 'default_prune', True)
+    with study, PvStudy(path) as pruned:
+        assert '.' in pruned._dir_mtimes and 'AdjResult' not in pruned._dir_mtimes
+        assert pruned.avail == study.avail
+        assert pruned.get_scan(3).get_reco(1).contents == study.get_scan(3).get_reco(1).contents
+
+
+def test_fetch_dir_lazy_sizes(tmp_path):
+    path = build_study(tmp_path / 'study', num_scans=2)
+    contents = BaseMethods._fetch_dir(path, lazy_sizes=True)
+    reference = fetch_dir_walk(path)
+    sizes = contents['1/pdata/1']['file_sizes']
+    assert isinstance(sizes, LazyFileSizes) and sizes._sizes is None
+    assert len(sizes) == len(reference['1/pdata/1']['files']) and sizes._sizes is None
+    assert contents == reference
+    assert pickle.loads(pickle.dumps(sizes)) == reference['1/pdata/1']['file_sizes']
+
+
+def test_fetch_dir_benchmark(tmp_path):
+    path = build_study(tmp_path / 'study', num_scans=100, num_slices=2, num_cycles=1)
+    build_adjustments(path, num_dirs=50)
+    fetchers = {'os.walk': fetch_dir_walk,
+                'scandir': BaseMethods._fetch_dir,
+                'scandir+prune': lambda p: BaseMethods._fetch_dir(p, prune=True),
+                'scandir+prune+lazy': lambda p: BaseMethods._fetch_dir(p, prune=True, lazy_sizes=True)}
+    timings = {}
+    for name, fetch in fetchers.items():
+        start = time.perf_counter()
+        for _ in range(5):
+            fetch(path)
+        timings[name] = (time.perf_counter() - start) / 5
+    print('\n_fetch_dir on 100 scans: ' + ', '.join(f"{name} {t * 1000:.1f}ms ({timings['os.walk'] / t:.1f}x)"
+                                                  for name, t in timings.items()))
@@ -0,0 +1,89 @@
+import os
+import re
+import time
+import zipfile
+from collections import defaultdict
+from brkraw.api.pvobj import PvStudy
+from brkraw.api.pvobj.base import BaseMethods
+from .conftest import build_study
+
+
+def fetch_zip_split(path):
+    """The os.path.split based implementation of _fetch_zip, as a reference."""
+    with zipfile.ZipFile(path) as zip_file:
+        contents = defaultdict(lambda: {'dirs': set(), 'files': [], 'file_indexes': [],
+                                        'file_sizes': [], 'file_crcs': []})
+        for i, item in enumerate(zip_file.infolist()):
+            if not item.is_dir():
+                dirpath, filename = os.path.split(item.filename)
+                contents[dirpath]['files'].append(filename)
+                contents[dirpath]['file_indexes'].append(i)
+                contents[dirpath]['file_sizes'].append(item.file_size)
+                contents[dirpath]['file_crcs'].append(item.CRC)
+                while dirpath:
+                    dirpath, dirname = os.path.split(dirpath)
+                    if dirname:
+                        contents[dirpath]['dirs'].add(dirname)
+    return contents
+
+
+def match_childobj_regex(path):
+    """The two-pattern implementation of _match_childobj, as a reference."""
+    if matched := re.match(r'(?:.*/)?(\d+)/(\D+)/(\d+)$', path):
+        return int(matched.group(1)), matched.group(2), int(matched.group(3))
+    if matched := re.match(r'(?:.*/)?(\d+)$', path):
+        return int(matched.group(1)), None, None
+    return None
+
+
+def build_multi_study_zip(root, path, num_studies=3, num_scans=5):
+    studies = [build_study(root / f'study_{i}', num_scans=num_scans, num_slices=1, num_cycles=1, size=2)
+               for i in range(num_studies)]
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_STORED) as zf:
+        zf.writestr('study_0/', '')
+        for study in studies:
+            for file in sorted(study.rglob('*')):
+                if file.is_file():
+                    zf.write(file, os.path.join('archive', study.name, file.relative_to(study)))
+    return path
+
+
+def test_fetch_zip_identical_to_split(tmp_path):
+    path = build_multi_study_zip(tmp_path, tmp_path / 'multi.zip')
+    contents = BaseMethods._fetch_zip(path)
+    reference = fetch_zip_split(path)
+    assert contents == reference
+    assert list(contents) == list(reference)
+    with zipfile.ZipFile(path) as zip_file:
+        assert BaseMethods._fetch_zip(zip_file) == reference
+        assert zip_file.fp is not None
+
+
+def test_match_childobj_identical_to_regex():
+    paths = ['1', '12', 'a', 'study/3', 'study/3/pdata/1', 'a/b/10/pdata/2', '3/pdata', '3/pdata/x',
+             '3/fid', 'AdjResult', '2/pdata/1/extra', '4/other/5', 'a/1/b/c/2', '1/2', '1/2/3', 'x1/pdata/1']
+    for path in paths:
+        assert PvStudy._match_childobj(path) == match_childobj_regex(path), path
+
+
+def test_construct_zip_and_folder(synthetic_study, synthetic_study_zip):
+    with PvStudy(synthetic_study) as folder, PvStudy(synthetic_study_zip) as archive:
+        assert folder.avail == archive.avail == [1, 2, 3]
+        for scan_id in folder.avail:
+            assert folder.get_scan(scan_id).avail == archive.get_scan(scan_id).avail == [1]
+        assert folder.contents['files'] == archive.contents['files'] == ['subject']
+        assert 'AdjResult' in folder._contents
+        assert not any(PvStudy._match_childobj(p) for p in list(folder._contents) + list(archive._contents))
+
+
+def test_construct_large_zip_benchmark(tmp_path):
+    path = build_multi_study_zip(tmp_path, tmp_path / 'large.zip', num_studies=3, num_scans=100)
+    start = time.perf_counter()
+    reference = fetch_zip_split(path)
+    elapsed_split = time.perf_counter() - start
+    start = time.perf_counter()
+    contents = BaseMethods._fetch_zip(path)
+    elapsed = time.perf_counter() - start
+    assert contents == reference
+    print(f"\n_fetch_zip of {len(contents)} folders: split {elapsed_split * 1e3:.1f}ms, "
+          f"single pass {elapsed * 1e3:.1f}ms")
@@ -0,0 +1,60 @@
+import pytest
+from brkraw.api.pvobj import PvStudy
+
+
+@pytest.mark.parametrize('compressed', [False, True])
+def test_file_lookup(request, compressed):
+    path = request.getfixturevalue('synthetic_study_zip' if compressed else 'synthetic_study')
+    with PvStudy(path) as study:
+        scan = study.get_scan(1)
+        files = scan.contents['files']
+        for pos, filename in enumerate(files):
+            assert scan._get_file_position(filename) == pos
+            assert scan._get_file_position(filename.replace('.', '_'), alias=True) == pos
+        assert scan._get_file_position('2dseq') is None
+        assert scan.acqp is scan._acqp is scan['acqp']
+        with pytest.raises(KeyError):
+            scan._open_as_fileobject('missing')
+        with pytest.raises(AttributeError):
+            scan.missing
+
+        # aliases only resolve attribute names, and exact names take precedence over aliases
+        scan.contents['files'] = ['a.b', 'a_b', 'c.d']
+        scan.contents.pop('file_lookup')
+        assert scan._get_file_position('a_b', alias=True) == 1
+        assert scan._get_file_position('c_d', alias=True) == 2
+        assert scan._get_file_position('c_d') is None
+
+
+@pytest.mark.parametrize('compressed', [False, True])
+def test_known_file_types_are_not_sniffed(tmp_path, monkeypatch, compressed):
+    from brkraw.api.pvobj.base import BaseMethods
+    from .conftest import build_study, build_study_zip
+    path = build_study(tmp_path / 'study', num_scans=1)
+    (path / '1' / 'notes').write_text('free text\n')
+    (path / '1' / 'extra.bin').write_bytes(b'\x00\x01' * 16)
+    if compressed:
+        path = build_study_zip(path, tmp_path / 'study.zip')
+    sniffed = []
+    is_binary = BaseMethods._is_binary
+
+    def counting_is_binary(fileobj, bytes=512):
+        sniffed.append(fileobj)
+        return is_binary(fileobj, bytes)
+
+    monkeypatch.setattr(BaseMethods, '_is_binary', staticmethod(counting_is_binary))
+    with PvStudy(path) as study:
+        scan = study.get_scan(1)
+        reco = scan.get_reco(1)
+        for _ in range(2):
+            assert scan.acqp.is_parameter() and reco.visu_pars.is_parameter()
+            with reco['2dseq'] as f, scan.fid as fid:
+                assert f.tell() == 0 and len(f.read()) == 8 * 8 * 5 * 2 * 2
+                assert fid.read(4)
+        assert not sniffed
+        for _ in range(2):
+            assert scan.notes == ['free text', '']
+            with scan.extra_bin as f:
+                assert f.read() == b'\x00\x01' * 16
+        assert len(sniffed) == 2
+        assert scan.contents['file_binary']['extra.bin'] and not scan.contents['file_binary']['notes']
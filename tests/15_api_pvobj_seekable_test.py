@@ -0,0 +1,102 @@
+import time
+import zipfile
+import numpy as np
+import pytest
+from brkraw.api.pvobj import PvStudy
+from brkraw.api.pvobj.base import BaseMethods, SharedZipFile
+from brkraw.api.pvobj.seekable import SeekIndex, SeekableZipMember
+from .conftest import build_study, build_study_zip
+
+
+@pytest.fixture
+def member_zip(tmp_path):
+    rng = np.random.default_rng(0)
+    data = rng.integers(0, 64, size=1 << 20, dtype='<i2').tobytes()
+    path = tmp_path / 'members.zip'
+    with zipfile.ZipFile(path, 'w') as zf:
+        zf.writestr(zipfile.ZipInfo('deflated'), data, compress_type=zipfile.ZIP_DEFLATED)
+        zf.writestr(zipfile.ZipInfo('stored'), data, compress_type=zipfile.ZIP_STORED)
+        zf.writestr(zipfile.ZipInfo('bzip2'), data, compress_type=zipfile.ZIP_BZIP2)
+    return path, data
+
+
+def test_seekable_member_random_access(member_zip):
+    path, data = member_zip
+    rng = np.random.default_rng(1)
+    with zipfile.ZipFile(path) as zf:
+        deflated, stored, bzip2 = zf.infolist()
+        assert not SeekableZipMember.is_supported(bzip2)
+        index = SeekIndex(1 << 16)
+        for zinfo in (deflated, stored):
+            with SeekableZipMember(path, zinfo, index) as f:
+                f.seek(-100, 2)
+                assert f.read() == data[-100:] and f.read() == b''
+                for offset, size in rng.integers(0, len(data) + 10, size=(200, 2)):
+                    f.seek(offset)
+                    assert f.read(size % 100000) == data[offset:offset + size % 100000]
+                    assert f.tell() == min(offset + size % 100000, max(offset, len(data)))
+                f.seek(0)
+                assert f.read() == data
+        assert len(index) == len(data) // (1 << 16) + 1
+        # a second reader resumes from the checkpoints of the first one
+        with SeekableZipMember(path, deflated, index) as f:
+            f.seek(len(data) - 10)
+            assert f.read(10) == data[-10:]
+
+
+def test_seek_index_bounds_checkpoints(member_zip, monkeypatch):
+    path, data = member_zip
+    monkeypatch.setattr(SeekIndex, 'max_points', 8)
+    assert SeekIndex(1 << 16, 1000).span == 1 << 16
+    with zipfile.ZipFile(path) as zf:
+        deflated = zf.infolist()[0]
+        for index in (SeekIndex(1 << 10, len(data)), SeekIndex(1 << 10)):
+            with SeekableZipMember(path, deflated, index) as f:
+                assert f.read() == data
+                f.seek(len(data) - 10)
+                assert f.read(10) == data[-10:]
+            assert len(index) == 8
+        assert SeekIndex(1 << 10, len(data)).span == len(data) // 8
+        with open(path, 'r+b') as f:
+            f.seek(deflated.header_offset)
+            f.write(b'PK\x00\x00')
+        with pytest.raises(ValueError, match='Bad local file header'):
+            SeekableZipMember(path, deflated, SeekIndex(1 << 16))
+
+
+def test_study_opens_binary_members_seekable(tmp_path, monkeypatch):
+    path = build_study_zip(build_study(tmp_path / 'study', num_scans=1), tmp_path / 'study.zip')
+    with PvStudy(path) as study:
+        assert not isinstance(study.get_scan(1).get_reco(1).get_2dseq(), SeekableZipMember)
+    monkeypatch.setattr(BaseMethods, 'default_seekable', True)
+    with PvStudy(path) as study:
+        reco = study.get_scan(1).get_reco(1)
+        assert reco.visu_pars.is_parameter()
+        with reco.get_2dseq() as f, study.get_scan(1).fid as fid:
+            assert isinstance(f, SeekableZipMember) and isinstance(fid, SeekableZipMember)
+            f.seek(8 * 8 * 2 * 9)
+            frame = np.frombuffer(f.read(8 * 8 * 2), '<i2')
+            assert np.array_equal(frame, np.arange(8 * 8 * 9, 8 * 8 * 10) + 1)
+
+
+def test_seekable_member_benchmark(tmp_path):
+    rng = np.random.default_rng(0)
+    frame_size, num_frames = 128 * 128 * 2, 400
+    data = rng.integers(0, 64, size=frame_size * num_frames // 2, dtype='<i2').tobytes()
+    path = tmp_path / 'large.zip'
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr('2dseq', data)
+    frames = rng.permutation(num_frames)[:20]
+    handle = SharedZipFile(path).acquire()
+    try:
+        for seekable in (False, True):
+            start = time.perf_counter()
+            with handle.open(0, seekable=seekable) as f:
+                for index in frames:
+                    f.seek(int(index) * frame_size)
+                    assert f.read(frame_size) == data[index * frame_size:(index + 1) * frame_size]
+            elapsed = time.perf_counter() - start
+            print(f"\n{len(frames)} random frames of a {len(data) >> 20}MiB member, seekable={seekable}: "
+                  f"{elapsed * 1e3:.1f}ms")
+    finally:
+        handle.release()
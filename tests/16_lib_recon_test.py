@@ -0,0 +1,412 @@
+import os
+import time
+import warnings
+import numpy as np
+import pytest
+from brkraw.lib.recon import Reconstruction
+
+
+def sort_kspace_loop(recon, fid):
+    """The CS loop and Cartesian branch of the former Reconstruction.sort_kspace, as a reference."""
+    dims = recon.acqp.get('ACQ_dim')
+    obj_order = recon.acqp.get('ACQ_obj_order')
+    kSize = np.round(np.array(recon.method.get('PVM_AntiAlias'))*np.array(recon.method.get('PVM_Matrix')))
+    zerofill = 2*np.floor((kSize - kSize/np.array(recon.method.get('PVM_EncZf')))/2)
+    kSize = kSize - zerofill
+    center = np.floor(kSize/2)
+    EncMatrix = recon.method.get('PVM_EncMatrix')
+    NPE = recon.method.get('PVM_EncGenTotalSteps') if recon.CS else np.prod(EncMatrix[1:])
+    phase_encode2 = (recon.method.get('PVM_EncSteps2') + center[2]).astype(int)
+    phase_encode1 = (recon.method.get('PVM_EncSteps1') + center[1]).astype(int)
+    Nreadout = fid.shape[2]
+    readStart = int(kSize[0]-Nreadout)
+    temp = np.zeros([int(kSize[0]), int(kSize[1]), int(kSize[2]) if dims == 3 else 1,
+                     recon.NRecs, recon.NI, recon.NR], dtype=complex)
+    if recon.CS:
+        phase_index1 = (recon.method.get('PVM_EncGenSteps1') + center[1]).astype(int)
+        phase_index2 = (recon.method.get('PVM_EncGenSteps2') + center[2]).astype(int)
+        fid = fid.reshape((recon.NR, NPE, recon.NI, recon.NRecs, Nreadout)).transpose(4, 1, 3, 2, 0)
+        for index, (i, j) in enumerate(zip(phase_index1, phase_index2)):
+            temp[readStart:, i, j, :, :, :] = fid[:, index, :, :, :]
+    else:
+        phase_factor = recon.acqp.get('ACQ_phase_factor')
+        fid = fid.reshape((recon.NR, -1, recon.NI, phase_factor, recon.NRecs, Nreadout)).transpose(0, 2, 4, 1, 3, 5)
+        fid = fid.reshape((recon.NR, recon.NI, recon.NRecs, NPE, Nreadout)).transpose((4, 3, 2, 1, 0))
+        fid = fid.reshape(Nreadout, int(EncMatrix[1]), int(EncMatrix[2]), recon.NRecs, recon.NI, recon.NR, order='F')
+        temp[readStart:, phase_encode1, :, :, :, :] = fid[:, :, phase_encode2, :, :, :]
+    kspace = np.zeros_like(temp)
+    kspace[:, :, :, :, obj_order, :] = temp
+    return kspace
+
+
+def build_reconstruction(matrix=(32, 24, 20), num_steps=300, NI=3, NR=2, NRecs=2, cs=True, seed=0):
+    rng = np.random.default_rng(seed)
+    recon = Reconstruction.__new__(Reconstruction)
+    recon.CS = cs
+    recon.NI, recon.NR, recon.NRecs = NI, NR, NRecs
+    recon.supported_protocol = True
+    recon.acqp = {'ACQ_dim': 3, 'ACQ_obj_order': list(rng.permutation(NI)), 'ACQ_phase_factor': 1}
+    center = np.array(matrix) // 2
+    recon.method = {'Method': 'User:FLASH',
+                    'PVM_Matrix': list(matrix),
+                    'PVM_AntiAlias': [1, 1, 1],
+                    'PVM_EncZf': [1, 1, 1],
+                    'PVM_EncMatrix': list(matrix),
+                    'PVM_EncGenTotalSteps': num_steps,
+                    # duplicated steps are kept, the last acquisition wins
+                    'PVM_EncGenSteps1': rng.integers(0, matrix[1], num_steps) - center[1],
+                    'PVM_EncGenSteps2': rng.integers(0, matrix[2], num_steps) - center[2],
+                    'PVM_EncSteps1': np.arange(matrix[1]) - center[1],
+                    'PVM_EncSteps2': np.arange(matrix[2]) - center[2]}
+    num_lines = (num_steps if cs else matrix[1] * matrix[2]) * NI * NR
+    fid = rng.standard_normal((num_lines, NRecs, matrix[0])) + 1j * rng.standard_normal((num_lines, NRecs, matrix[0]))
+    return recon, fid
+
+
+def test_sort_kspace_cs_matches_loop():
+    recon, fid = build_reconstruction()
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        kspace = recon.sort_kspace(fid.copy())
+    reference = sort_kspace_loop(recon, fid.copy())
+    assert kspace.shape == reference.shape == (32, 24, 20, 2, 3, 2)
+    assert np.array_equal(kspace, reference)
+
+
+@pytest.mark.parametrize('phase_factor', [1, 4])
+def test_sort_kspace_cartesian_matches_reference(phase_factor):
+    recon, fid = build_reconstruction(matrix=(16, 12, 8), NI=3, NR=2, NRecs=2, cs=False, seed=1)
+    recon.acqp['ACQ_phase_factor'] = phase_factor
+    recon.method['PVM_EncSteps2'] = np.random.default_rng(2).permutation(8) - 4
+    kspace = recon.sort_kspace(fid.copy())
+    assert np.array_equal(kspace, sort_kspace_loop(recon, fid.copy()))
+
+
+def test_sort_kspace_cs_benchmark():
+    recon, fid = build_reconstruction(matrix=(64, 64, 64), num_steps=20000, NI=1, NR=1, NRecs=2)
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        start = time.perf_counter()
+        kspace = recon.sort_kspace(fid.copy())
+        elapsed = time.perf_counter() - start
+    start = time.perf_counter()
+    reference = sort_kspace_loop(recon, fid.copy())
+    elapsed_loop = time.perf_counter() - start
+    assert np.array_equal(kspace, reference)
+    print(f"\nsort_kspace of {fid.shape[0]} CS lines: loop {elapsed_loop * 1e3:.1f}ms, "
+          f"scatter {elapsed * 1e3:.1f}ms")
+
+
+def phase_rotate_tile(frame, RECO_rotate, framenumber):
+    """The np.tile based phase_rotate of recoFunctions, as a reference."""
+    if RECO_rotate.shape[1] > framenumber:
+        RECO_rotate = RECO_rotate[:, framenumber] - 0.5
+    else:
+        RECO_rotate = RECO_rotate[:, 0]
+    dims = [frame.shape[0], frame.shape[1], frame.shape[2]]
+    phase_matrix = np.ones(shape=dims, dtype=complex)
+    for index in range(len(RECO_rotate)):
+        f = np.arange(dims[index])
+        phase_vector = np.exp(1j*2*np.pi*(1-RECO_rotate[index])*f)
+        if index == 0:
+            phase_matrix *= np.tile(phase_vector[:, np.newaxis, np.newaxis], [1, dims[1], dims[2]])
+        elif index == 1:
+            phase_matrix *= np.tile(phase_vector[np.newaxis, :, np.newaxis], [dims[0], 1, dims[2]])
+        elif index == 2:
+            tmp = np.zeros((1, 1, dims[2]), dtype=complex)
+            tmp[0, 0, :] = phase_vector
+            phase_matrix *= np.tile(tmp, [dims[0], dims[1], 1])
+    return phase_matrix
+
+
+def process_kspace_loop(recon, kspace):
+    """The per frame and per channel phase rotation and zero filling of process_kspace, as a reference."""
+    from brkraw.lib.recoFunctions import zero_filling_slices
+    map_index = np.reshape(np.arange(0, kspace.shape[4]*kspace.shape[5]), (kspace.shape[5], kspace.shape[4])).flatten()
+    for NR in range(recon.NR):
+        for NI in range(recon.NI):
+            kspace[:, :, :, :, NI, NR] *= np.tile(phase_rotate_tile(kspace[:, :, :, :, NI, NR],
+                                                                    recon.reco.get('RECO_rotate'),
+                                                                    map_index[(NI+1)*(NR+1)-1])[:, :, :, np.newaxis],
+                                                  [1, 1, 1, recon.NRecs])
+    RECO_ft_size = recon.reco.get('RECO_ft_size')
+    newdata_dims = [1, 1, 1]
+    newdata_dims[0:len(RECO_ft_size)] = RECO_ft_size
+    newdata = np.zeros(shape=newdata_dims + [recon.NRecs, recon.NI, recon.NR], dtype=complex)
+    pos = zero_filling_slices(kspace.shape[:3], RECO_ft_size)
+    for NR in range(recon.NR):
+        for NI in range(recon.NI):
+            for chan in range(recon.NRecs):
+                frame = np.zeros(newdata_dims, dtype=complex)
+                frame[pos] = kspace[:, :, :, chan, NI, NR]
+                newdata[:, :, :, chan, NI, NR] = frame
+    return newdata
+
+
+def build_kspace_reconstruction(monkeypatch, shape, ft_size, num_frames, seed=0):
+    rng = np.random.default_rng(seed)
+    recon = Reconstruction.__new__(Reconstruction)
+    recon.NRecs, recon.NI, recon.NR = shape[3:]
+    recon.reco = {'RECO_rotate': rng.random((len(ft_size), num_frames)), 'RECO_ft_size': list(ft_size)}
+    kspace = rng.standard_normal(shape) + 1j * rng.standard_normal(shape)
+    monkeypatch.setattr(recon, 'sort_kspace', lambda: kspace.copy(), raising=False)
+    return recon, kspace
+
+
+@pytest.mark.parametrize('shape, ft_size, num_frames', [
+    ((12, 10, 8, 2, 3, 2), (16, 12, 8), 6),
+    ((12, 10, 8, 2, 2, 3), (12, 10, 8), 1),
+    ((12, 9, 1, 4, 1, 2), (16, 12), 2),
+])
+def test_process_kspace_matches_reference(monkeypatch, shape, ft_size, num_frames):
+    recon, kspace = build_kspace_reconstruction(monkeypatch, shape, ft_size, num_frames)
+    newdata = recon.process_kspace()
+    reference = process_kspace_loop(recon, kspace.copy())
+    assert newdata.shape == reference.shape
+    np.testing.assert_allclose(newdata, reference, rtol=1e-12, atol=1e-12)
+
+
+def test_process_kspace_benchmark(monkeypatch):
+    import tracemalloc
+    recon, kspace = build_kspace_reconstruction(monkeypatch, (96, 96, 1, 8, 1, 50), (128, 128), 50)
+    for name, func in (('loop', lambda: process_kspace_loop(recon, recon.sort_kspace())),
+                       ('in place', recon.process_kspace)):
+        tracemalloc.start()
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print(f"\nprocess_kspace of {kspace.shape}, {name}: {elapsed * 1e3:.1f}ms, peak {peak / 2**20:.1f}MiB")
+
+
+def phase_corr_slices(frame):
+    """The strided assignment based phase_corr of recoFunctions, as a reference."""
+    checkerboard = np.ones(shape=frame.shape[:3])
+    checkerboard[::2, ::2, ::2] = -1
+    checkerboard[1::2, 1::2, ::2] = -1
+    checkerboard[::2, 1::2, 1::2] = -1
+    checkerboard[1::2, ::2, 1::2] = -1
+    checkerboard *= -1
+    return checkerboard
+
+
+def build_image_reconstruction(monkeypatch, shape, seed=0):
+    rng = np.random.default_rng(seed)
+    recon = Reconstruction.__new__(Reconstruction)
+    recon.CS = False
+    recon.NRecs, recon.NI, recon.NR = shape[3:]
+    kspace = rng.standard_normal(shape) + 1j * rng.standard_normal(shape)
+    monkeypatch.setattr(recon, 'process_kspace', lambda: kspace.copy(), raising=False)
+    return recon, kspace
+
+
+@pytest.mark.parametrize('shape', [(8, 7, 1), (6, 5, 4), (1, 3, 2)])
+def test_phase_corr_matches_reference(shape):
+    from brkraw.lib.recoFunctions import phase_corr
+    frame = np.zeros(shape + (2,))
+    assert np.array_equal(phase_corr(frame), phase_corr_slices(frame))
+    assert phase_corr(frame).dtype == phase_corr_slices(frame).dtype
+
+
+def test_reconstruct_backends(monkeypatch):
+    from brkraw.lib.recoFunctions import available_fft_backends, get_fft_backend
+    recon, kspace = build_image_reconstruction(monkeypatch, (16, 12, 4, 2, 2, 3))
+    reference = np.fft.fftshift(np.fft.ifftn(kspace, axes=(0, 1, 2)), axes=(0, 1, 2))
+    reference *= np.tile(phase_corr_slices(reference)[:, :, :, np.newaxis, np.newaxis, np.newaxis], [1, 1, 1, 2, 2, 3])
+    assert 'numpy' in available_fft_backends()
+    for backend in available_fft_backends():
+        for workers in (None, 2):
+            image = recon.reconstruct(rms=False, fft_backend=backend, fft_workers=workers)
+            assert np.allclose(image, reference)
+        # a k-space given by the caller is left untouched
+        given = kspace.copy()
+        recon.reconstruct(given, fft_backend=backend, fft_workers=2)
+        assert np.array_equal(given, kspace)
+    assert np.array_equal(recon.reconstruct(rms=False), reference)
+    with pytest.raises(ValueError):
+        get_fft_backend('fftpack')
+
+
+def test_reconstruct_benchmark(monkeypatch):
+    from brkraw.lib.recoFunctions import available_fft_backends
+    shape = (128, 128, 1, 4, 1, 20)
+    recon, kspace = build_image_reconstruction(monkeypatch, shape)
+    for backend in available_fft_backends():
+        for workers in sorted({1, os.cpu_count() or 1}):
+            start = time.perf_counter()
+            recon.reconstruct(fft_backend=backend, fft_workers=workers)
+            elapsed = time.perf_counter() - start
+            print(f"\nreconstruct of {shape}, {backend} with {workers} workers: "
+                  f"{kspace.nbytes / 2**20 / elapsed:.0f}MiB/s")
+
+
+def sort_fid_whole(recon, raw):
+    """The whole file implementation of Reconstruction.sort_fid, as a reference."""
+    dt_code = 'int32'
+    if recon.acqp.get('ACQ_ScanPipeJobSettings') is not None:
+        if recon.acqp['ACQ_ScanPipeJobSettings'][0][1] == 'STORE_64bit_float':
+            dt_code = 'float64'
+    bits = 64 if '64' in dt_code else 32
+    DT_CODE = np.dtype(dt_code).newbyteorder('<' if recon.acqp['BYTORDA'] == 'little' else '>')
+    fid = np.frombuffer(raw, DT_CODE)
+    if '360' in recon.protocol['sw_version']:
+        NRecs = recon.acqp['ACQ_ReceiverSelectPerChan'].count('Yes')
+        scanSize = recon.acqp['ACQ_jobs'][0][0]
+        X = fid[::2] + 1j*fid[1::2]
+    else:
+        NRecs = recon.acqp.get('ACQ_ReceiverSelect').count('Yes')
+        ACQ_size = recon.acqp['ACQ_size']
+        scanSize = ACQ_size[0]
+        if recon.acqp['GO_block_size'] == 'Standard_KBlock_Format':
+            blocksize = int(np.ceil(ACQ_size[0]*NRecs*(bits/8)/1024)*1024/(bits/8))
+        else:
+            blocksize = int(ACQ_size[0]*NRecs)
+        X = fid[::2] + 1j*fid[1::2]
+        X = X.reshape([-1, blocksize//2])
+        if blocksize != scanSize*NRecs:
+            X = X[:, :scanSize//2*NRecs]
+    return X.reshape((-1, NRecs, scanSize//2))
+
+
+def build_fid_reconstruction(tmp_path, version, dt_code, byteorder, kblock, NRecs=3, scanSize=20,
+                             num_pe=6, NI=2, NR=4, seed=0):
+    rng = np.random.default_rng(seed)
+    recon = Reconstruction.__new__(Reconstruction)
+    recon.NI, recon.NR, recon.NRecs = NI, NR, 1
+    recon.protocol = {'sw_version': 'PV 360.3.5' if version == 360 else 'PV 6.0.1'}
+    recon.acqp = {'BYTORDA': byteorder,
+                  'ACQ_ScanPipeJobSettings': [['job0', 'STORE_64bit_float' if dt_code == 'float64' else 'STORE_32bit_signed']],
+                  'ACQ_ReceiverSelectPerChan': ['Yes'] * NRecs + ['No'],
+                  'ACQ_jobs': [[scanSize]],
+                  'ACQ_ReceiverSelect': ['Yes'] * NRecs + ['No'],
+                  'ACQ_size': [scanSize, num_pe],
+                  'GO_block_size': 'Standard_KBlock_Format' if kblock else 'continuous'}
+    itemsize = np.dtype(dt_code).itemsize
+    blocksize = scanSize * NRecs
+    if version != 360 and kblock:
+        blocksize = int(np.ceil(blocksize * itemsize / 1024) * 1024 / itemsize)
+    values = rng.integers(-2**31, 2**31 - 1, size=blocksize * num_pe * NI * NR)
+    raw = values.astype(np.dtype(dt_code).newbyteorder('<' if byteorder == 'little' else '>')).tobytes()
+    path = tmp_path / 'fid'
+    path.write_bytes(raw)
+    recon.fid_size = len(raw)
+    return recon, raw, path
+
+
+@pytest.mark.parametrize('version, dt_code, byteorder, kblock', [
+    (360, 'int32', 'little', False),
+    (360, 'float64', 'big', False),
+    (6, 'int32', 'little', True),
+    (6, 'int32', 'big', False),
+    (6, 'float64', 'little', True),
+])
+def test_sort_fid_matches_reference(tmp_path, version, dt_code, byteorder, kblock):
+    import io
+    recon, raw, path = build_fid_reconstruction(tmp_path, version, dt_code, byteorder, kblock)
+    reference = sort_fid_whole(recon, raw)
+    for fileobj in (io.BytesIO(raw), open(path, 'rb')):
+        with fileobj:
+            recon.fid = fileobj
+            X = recon.sort_fid()
+            assert X.dtype == reference.dtype and np.array_equal(X, reference)
+            assert recon.NRecs == 3
+            reps = list(recon.iter_fid())
+            assert len(reps) == recon.NR
+            assert np.array_equal(np.concatenate(reps), reference)
+            assert recon.sort_fid(dtype=np.complex64).dtype == np.complex64
+
+
+def test_sort_fid_size_mismatch(tmp_path):
+    import io
+    recon, raw, _ = build_fid_reconstruction(tmp_path, 6, 'int32', 'little', True)
+    recon.fid, recon.fid_size = io.BytesIO(raw[:-4]), len(raw) - 4
+    with pytest.raises(ValueError):
+        recon.sort_fid()
+
+
+@pytest.mark.parametrize('trim, NR', [(8, 5), (0, 7)])
+def test_iter_fid_size_mismatch_pv360(tmp_path, trim, NR):
+    recon, path = build_series_reconstruction(tmp_path)
+    recon.fid_size -= trim
+    recon.NR = NR
+    with open(path, 'rb') as recon.fid:
+        for read in (recon.sort_fid, lambda: next(recon.iter_fid())):
+            with pytest.raises(ValueError, match='FID size'):
+                read()
+
+
+def test_sort_fid_benchmark(tmp_path):
+    import tracemalloc
+    recon, raw, path = build_fid_reconstruction(tmp_path, 6, 'int32', 'little', True, NRecs=4, scanSize=256,
+                                                num_pe=256, NI=1, NR=8)
+    for name, func in (('whole', lambda: sort_fid_whole(recon, open(path, 'rb').read())),
+                       ('streaming', recon.sort_fid),
+                       ('per repetition', lambda: [x.sum() for x in recon.iter_fid()])):
+        with open(path, 'rb') as recon.fid:
+            tracemalloc.start()
+            start = time.perf_counter()
+            func()
+            elapsed = time.perf_counter() - start
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        print(f"\nsort_fid of {len(raw) >> 20}MiB, {name}: {elapsed * 1e3:.1f}ms, peak {peak / 2**20:.1f}MiB")
+
+
+def build_series_reconstruction(tmp_path, matrix=(16, 12, 6), NI=2, NR=5, NRecs=3, cs=False, seed=0):
+    recon, _ = build_reconstruction(matrix=matrix, num_steps=40, NI=NI, NR=NR, NRecs=NRecs, cs=cs, seed=seed)
+    rng = np.random.default_rng(seed)
+    recon.protocol = {'sw_version': 'PV 360.3.5'}
+    recon.acqp.update({'BYTORDA': 'little',
+                       'ACQ_ReceiverSelectPerChan': ['Yes'] * NRecs,
+                       'ACQ_jobs': [[2 * matrix[0]]]})
+    recon.reco = {'RECO_rotate': rng.random((3, NI * NR)), 'RECO_ft_size': [20, 12, 8]}
+    num_lines = (40 if cs else matrix[1] * matrix[2]) * NI * NR
+    raw = rng.integers(-2**20, 2**20, size=num_lines * NRecs * 2 * matrix[0]).astype('<i4').tobytes()
+    path = tmp_path / 'fid'
+    path.write_bytes(raw)
+    recon.fid_size = len(raw)
+    return recon, path
+
+
+@pytest.mark.parametrize('cs', [False, True])
+def test_iter_reconstruct_matches_reconstruct(tmp_path, cs):
+    recon, path = build_series_reconstruction(tmp_path, cs=cs)
+    with open(path, 'rb') as recon.fid, warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        for process, kwargs, reference in (('readout', {}, recon.sort_fid),
+                                           ('kspace', {}, recon.process_kspace),
+                                           ('image', {'rms': False}, lambda: recon.reconstruct(rms=False)),
+                                           ('image', {}, recon.reconstruct)):
+            reps = list(recon.iter_reconstruct(process=process, **kwargs))
+            assert len(reps) == recon.NR
+            axis = 0 if process == 'readout' else -1
+            assert np.allclose(np.concatenate(reps, axis=axis), reference())
+
+
+def test_iter_reconstruct_unsupported_protocol(tmp_path):
+    recon, path = build_series_reconstruction(tmp_path)
+    recon.supported_protocol = False
+    with open(path, 'rb') as recon.fid:
+        with pytest.warns(UserWarning) as record:
+            reps = list(recon.iter_reconstruct())
+        assert len(record) == 1
+        assert np.array_equal(np.concatenate(reps), recon.sort_fid())
+
+
+def test_iter_reconstruct_benchmark(tmp_path):
+    import tracemalloc
+    recon, path = build_series_reconstruction(tmp_path, matrix=(64, 64, 1), NI=1, NR=40, NRecs=4)
+    recon.acqp['ACQ_dim'] = 2
+    recon.method['PVM_EncSteps2'] = np.zeros(1, dtype=int)
+    recon.reco = {'RECO_rotate': np.full((2, 40), 0.5), 'RECO_ft_size': [64, 64]}
+    for name, func in (('whole', recon.reconstruct),
+                       ('per repetition', lambda: [x.sum() for x in recon.iter_reconstruct()])):
+        with open(path, 'rb') as recon.fid:
+            tracemalloc.start()
+            start = time.perf_counter()
+            func()
+            elapsed = time.perf_counter() - start
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        print(f"\nreconstruct of {recon.NR} repetitions, {name}: {elapsed * 1e3:.1f}ms, peak {peak / 2**20:.1f}MiB")
@@ -37,4 +37,195 @@ def get_dataset():
                 if version not in dataset.keys():
                     dataset[version] = {}
                 dataset[version][raw.path.name] = raw
-    return dataset
\ No newline at end of file
+    return dataset
+
+# synthetic dataset
+JCAMP_HEADER = ("##TITLE=Parameter List, ParaVision 360 V3.5\n"
+                "##JCAMPDX=4.24\n"
+                "##DATATYPE=Parameter Values\n"
+                "##ORIGIN=Bruker BioSpin MRI GmbH\n"
+                "##OWNER=nmrsu\n"
+                "$$ Mon Jan 1 00:00:00 2024 EST (UT-5h)  nmrsu\n"
+                "$$ /opt/PV-360.3.5/data/nmrsu/{name}\n")
+
+
+def assert_same_value(a, b):
+    """Asserts that two parsed values are equal, including their types and array dtypes."""
+    import numpy as np
+    assert type(a) is type(b), (a, b)
+    if isinstance(a, np.ndarray):
+        assert a.dtype == b.dtype and a.shape == b.shape
+        assert np.array_equal(a, b)
+    elif isinstance(a, dict):
+        assert list(a.keys()) == list(b.keys())
+        for key in a:
+            assert_same_value(a[key], b[key])
+    elif isinstance(a, list):
+        assert len(a) == len(b)
+        for ea, eb in zip(a, b):
+            assert_same_value(ea, eb)
+    else:
+        assert a == b
+
+
+def build_jcamp(name, entries):
+    lines = [JCAMP_HEADER.format(name=name)]
+    lines.extend(f"##${key}={value}\n" for key, value in entries)
+    lines.append("##END=\n")
+    return ''.join(lines)
+
+
+def build_subject():
+    return build_jcamp('subject', [
+        ('SUBJECT_id', '( 60 )\n<mouse01>'),
+        ('SUBJECT_study_name', '( 64 )\n<synthetic>'),
+        ('SUBJECT_study_nr', '1'),
+        ('SUBJECT_name_string', '( 64 )\n<mouse01>'),
+        ('SUBJECT_type', 'Quadruped'),
+        ('SUBJECT_date', '( 32 )\n<2024-01-01T00:00:00,000-0500>'),
+        ])
+
+
+def build_acqp(scan_id, num_slices, num_cycles, readout, num_lines):
+    return build_jcamp('acqp', [
+        ('ACQ_sw_version', '( 65 )\n<PV 360.3.5>'),
+        ('ACQ_operator', '( 64 )\n<nmrsu>'),
+        ('PULPROG', '( 20 )\n<FLASH.ppg>'),
+        ('NUCLEUS', '( 8 )\n<1H>'),
+        ('ACQ_protocol_name', f'( 64 )\n<T1_FLASH_{scan_id}>'),
+        ('ACQ_scan_name', f'( 64 )\n<T1_FLASH (E{scan_id})>'),
+        ('ACQ_method', '( 40 )\n<Bruker:FLASH>'),
+        ('ACQ_patient_pos', 'Head_Prone'),
+        ('ACQ_word_size', '_32_BIT'),
+        ('BYTORDA', 'little'),
+        ('ACQ_dim', '2'),
+        ('ACQ_dim_desc', '( 2 )\nSpatial Spatial'),
+        ('ACQ_size', f'( 2 )\n{readout * 2} {num_lines}'),
+        ('NI', str(num_slices)),
+        ('NR', str(num_cycles)),
+        ('ACQ_obj_order', f'( {num_slices} )\n' + ' '.join(str(i) for i in range(num_slices))),
+        ('ACQ_phase_factor', '1'),
+        ('GO_block_size', 'continuous'),
+        ('ACQ_ReceiverSelect', '( 1 )\nYes'),
+        ('ACQ_ReceiverSelectPerChan', '( 1 )\nYes'),
+        ('ACQ_jobs', f'( 1 )\n({readout * 2}, {num_lines}, {num_slices * num_cycles}, 1, <job0>, 0, 0, 0)'),
+        ('ACQ_grad_matrix', f'( {num_slices}, 3, 3 )\n' + ' '.join(['1 0 0 0 1 0 0 0 1'] * num_slices)),
+        ('ACQ_vd_list', '( 10 )\n@10*(1e-05)'),
+        ('ACQ_comment', '( 2048 )\n<>'),
+        ])
+
+
+def build_method(num_slices, readout, num_lines):
+    steps = ' '.join(str(i - num_lines // 2) for i in range(num_lines))
+    return build_jcamp('method', [
+        ('Method', '<Bruker:FLASH>'),
+        ('PVM_Matrix', f'( 2 )\n{readout} {num_lines}'),
+        ('PVM_EncMatrix', f'( 2 )\n{readout} {num_lines}'),
+        ('PVM_AntiAlias', '( 2 )\n1 1'),
+        ('PVM_EncZf', '( 2 )\n1 1'),
+        ('PVM_EncSteps1', f'( {num_lines} )\n{steps}'),
+        ('PVM_EncCS', 'No'),
+        ('PVM_IsEpiScan', 'No'),
+        ('PVM_ObjOrderScheme', 'Interlaced'),
+        ('PVM_SPackArrGradOrient', '( 1, 3, 3 )\n1 0 0 0 1 0 0 0 1'),
+        ('PVM_DwEffBval', '( 3 )\n0 1000.5 1000.5'),
+        ('PVM_DwGradVec', '( 3, 3 )\n0 0 0 1 0 0 0 1 0'),
+        ('PVM_SliceThick', '0.5'),
+        ('PVM_SPackArrNSlices', f'( 1 )\n{num_slices}'),
+        ('PVM_Fov', '( 2 )\n20 20'),
+        ('PVM_ScanTimeStr', '( 64 )\n<0h0m2s0ms>'),
+        ('PVM_ExcPul', '(1, 5400, 30, Yes, 3, 4200, 0.5, 0.2, 0, 50, 0.2, <$ExcPul_Bis#>, <gauss.exc>)'),
+        ('PVM_Toggle', '( 4 )\n@3*(Yes) No'),
+        ('PVM_NestedList', '( 2 )\n((1, <a>), 2.5) ((3, <b>), -4e-05)'),
+        ])
+
+
+def build_visu_pars(num_slices, num_cycles, size):
+    num_frames = num_slices * num_cycles
+    orient = ' '.join(['1 0 0 0 1 0 0 0 1'] * num_frames)
+    position = ' '.join(f'-10 -10 {-1 + 0.5 * (i % num_slices)}' for i in range(num_frames))
+    return build_jcamp('visu_pars', [
+        ('VisuVersion', '5'),
+        ('VisuUid', '( 65 )\n<2.16.756.5.5.100.1>'),
+        ('VisuCoreFrameCount', str(num_frames)),
+        ('VisuCoreDim', '2'),
+        ('VisuCoreSize', f'( 2 )\n{size} {size}'),
+        ('VisuCoreDimDesc', '( 2 )\nspatial spatial'),
+        ('VisuCoreExtent', '( 2 )\n20 20'),
+        ('VisuCoreFrameThickness', '0.5'),
+        ('VisuCoreUnits', '( 2, 65 )\n<mm> <mm>'),
+        ('VisuCoreOrientation', f'( {num_frames}, 9 )\n{orient}'),
+        ('VisuCorePosition', f'( {num_frames}, 3 )\n{position}'),
+        ('VisuCoreDataMin', f'( {num_frames} )\n' + ' '.join(['0'] * num_frames)),
+        ('VisuCoreDataMax', f'( {num_frames} )\n' + ' '.join(['32767'] * num_frames)),
+        ('VisuCoreDataSlope', f'( {num_frames} )\n@{num_frames}*(2.5)'),
+        ('VisuCoreDataOffs', f'( {num_frames} )\n@{num_frames}*(0)'),
+        ('VisuCoreFrameType', 'MAGNITUDE_IMAGE'),
+        ('VisuCoreWordType', '_16BIT_SGN_INT'),
+        ('VisuCoreByteOrder', 'littleEndian'),
+        ('VisuCoreDiskSliceOrder', 'disk_normal_slice_order'),
+        ('VisuFGOrderDescDim', '2'),
+        ('VisuFGOrderDesc', f'( 2 )\n({num_slices}, <FG_SLICE>, <>, 0, 2) ({num_cycles}, <FG_CYCLE>, <>, 2, 0)'),
+        ('VisuGroupDepVals', '( 2 )\n(<VisuCoreOrientation>, 0) (<VisuCorePosition>, 0)'),
+        ('VisuSubjectType', 'Quadruped'),
+        ('VisuSubjectPosition', 'Head_Prone'),
+        ('VisuAcqScanTime', '2000'),
+        ('VisuCoreSlicePacksDef', '(0, 1)'),
+        ('VisuCoreSlicePacksSlices', f'( 1 )\n(0, {num_slices})'),
+        ('VisuCoreSlicePacksSliceDist', '( 1 )\n0.5'),
+        ('VisuAcqGradEncoding', '( 2 )\nread_enc phase_enc'),
+        ('VisuAcquisitionProtocol', '( 64 )\n<T1_FLASH>'),
+        ])
+
+
+def build_reco(num_slices, size):
+    rotate = ' '.join(['0.5'] * num_slices * 2 + ['0'] * num_slices)
+    return build_jcamp('reco', [
+        ('RECO_ft_size', f'( 2 )\n{size} {size}'),
+        ('RECO_rotate', f'( 3, {num_slices} )\n{rotate}'),
+        ('RECO_wordtype', '_16BIT_SGN_INT'),
+        ])
+
+
+def build_study(root: Path, num_scans=3, num_slices=5, num_cycles=2, size=8):
+    """Writes a synthetic PvDataset with FLASH scans and one reconstruction per scan."""
+    import numpy as np
+    rng = np.random.default_rng(0)
+    root.mkdir(parents=True, exist_ok=True)
+    (root / 'subject').write_text(build_subject())
+    (root / 'AdjResult').mkdir(exist_ok=True)
+    (root / 'AdjResult' / 'adjustments').write_text('')
+    for scan_id in range(1, num_scans + 1):
+        scan_path = root / str(scan_id)
+        reco_path = scan_path / 'pdata' / '1'
+        reco_path.mkdir(parents=True, exist_ok=True)
+        (scan_path / 'acqp').write_text(build_acqp(scan_id, num_slices, num_cycles, size, size))
+        (scan_path / 'method').write_text(build_method(num_slices, size, size))
+        (scan_path / 'visu_pars').write_text(build_visu_pars(num_slices, num_cycles, size))
+        fid = rng.integers(-1000, 1000, size=2 * size * size * num_slices * num_cycles, dtype='<i4')
+        (scan_path / 'fid').write_bytes(fid.tobytes())
+        (reco_path / 'visu_pars').write_text(build_visu_pars(num_slices, num_cycles, size))
+        (reco_path / 'reco').write_text(build_reco(num_slices, size))
+        data = np.arange(size * size * num_slices * num_cycles, dtype='<i2') + scan_id
+        (reco_path / '2dseq').write_bytes(data.tobytes())
+    return root
+
+
+def build_study_zip(root: Path, path: Path):
+    """Compresses a PvDataset folder into a zip archive with the dataset folder at its root."""
+    import zipfile
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as zf:
+        for file in sorted(root.rglob('*')):
+            if file.is_file():
+                zf.write(file, Path(root.name) / file.relative_to(root))
+    return path
+
+
+@pytest.fixture
+def synthetic_study(tmp_path):
+    return build_study(tmp_path / '20240101_000000_synthetic_1_1')
+
+
+@pytest.fixture
+def synthetic_study_zip(tmp_path, synthetic_study):
+    return build_study_zip(synthetic_study, tmp_path / '20240101_000000_synthetic_1_1.zip')